@@ -2,8 +2,7 @@
 
 import sys
 import os
-from pymongo import MongoClient
-import redis
+import json
 from pprint import pprint
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -11,44 +10,192 @@ if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 # ---------------------------------
 
+# Sólo módulos sin pymongo/redis: la ayuda y los errores de argumentos no los importan.
 from src.logger import getLogger
-from src.service.services import ServicioAseguradora
+from src.service.conexion import Conexiones
+from src.service.consultas import (
+    BATCH_SIZE_STREAMING, CONSULTAS_LECTURA, MINIMO_Q11_DEFAULT, PAGINA_Q9_DEFAULT, TOP_Q7_DEFAULT
+)
+from src.service.fechas import parsear_fecha
 
-# --- Configuración de Conexión ---
-MONGO_HOST = "mongo"
-REDIS_HOST = "redis"
-DB_NAME = "aseguradora_db"
+# La conexión se configura con variables de entorno (MONGO_HOST, REDIS_HOST, timeouts, pools,
+# keepalive; ver src/service/conexion.py) y se abre recién al ejecutar la consulta.
+
+# Cache de resultados de las consultas 1-12 en Redis (opt-in): TTL en segundos, 0 = desactivado.
+CACHE_CONSULTAS_TTL = int(os.environ.get("CACHE_CONSULTAS_TTL", "0"))
+
+# Métricas por método al terminar (opt-in): "json" o "prometheus". METRICAS_EXPLAIN=1 agrega explain(executionStats).
+METRICAS = os.environ.get("METRICAS", "").lower()
+METRICAS_EXPLAIN = os.environ.get("METRICAS_EXPLAIN", "0") == "1"
+
+# Emisión de pólizas con outbox (opt-in): las vistas de Redis las aplica src/api/trabajador_outbox.py.
+OUTBOX = os.environ.get("OUTBOX", "0") == "1"
+
+# Salida de las consultas 1-12: "pprint" (default) o "ndjson" (un documento JSON por línea, en
+# streaming desde el cursor: la memoria no depende del tamaño del resultado).
+SALIDA = os.environ.get("SALIDA", "pprint").lower()
+STREAMING_BATCH_SIZE = int(os.environ.get("STREAMING_BATCH_SIZE", str(BATCH_SIZE_STREAMING)))
+
+SERVICIOS_ESCRITURA = ('13', '14', '15')
 
 log = getLogger("QUERY_RUNNER")
 
-# --- Conexión Global ---
-try:
-    log.info("Conectando a bases de datos...")
-    mongo_client = MongoClient(MONGO_HOST, 27017, serverSelectionTimeoutMS=5000)
-    mongo_client.server_info()
-    db = mongo_client[DB_NAME]
-    
-    redis_client = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
-    redis_client.ping()
-    
-except Exception as e:
-    log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
-    sys.exit(1)
+
+class ServicioDiferido:
+    """Crea el ServicioAseguradora (y se conecta a las bases) al usar su primer método.
+
+    Las ramas que sólo validan argumentos o muestran la ayuda terminan sin tocarlo,
+    así que no importan pymongo/redis ni esperan a la red.
+    """
+
+    def __init__(self):
+        self.conexiones = None
+        self.cache = None
+        self.registro = None
+        self._servicio = None
+
+    def __getattr__(self, nombre):
+        # Sólo se llama para lo que no es atributo propio: los métodos del servicio.
+        if self._servicio is None:
+            self._servicio = self._crear()
+        return getattr(self._servicio, nombre)
+
+    def _crear(self):
+        from src.service.cache import CacheConsultas
+        from src.service.metricas import LISTENER_MONGO, RegistroMetricas, instrumentar_servicio
+        from src.service.services import ServicioAseguradora
+
+        try:
+            log.info("Conectando a bases de datos...")
+            self.conexiones = Conexiones(event_listeners=[LISTENER_MONGO] if METRICAS else [])
+            self.conexiones.verificar()
+        except Exception as e:
+            log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
+            sys.exit(1)
+
+        redis_client = self.conexiones.redis_client
+        self.cache = CacheConsultas(redis_client, ttl=CACHE_CONSULTAS_TTL) if CACHE_CONSULTAS_TTL > 0 else None
+        servicio = ServicioAseguradora(self.conexiones.db, redis_client, cache=self.cache, outbox=OUTBOX)
+        if METRICAS:
+            self.registro = RegistroMetricas(explain=METRICAS_EXPLAIN)
+            instrumentar_servicio(servicio, self.registro)
+        return servicio
+
+    def cerrar(self):
+        if self._servicio is not None:
+            self._servicio.cerrar()
+        if self.conexiones is not None:
+            self.conexiones.cerrar()
+            log.info("Conexiones a BBDD cerradas.")
+
+
+def _parametros_q8():
+    """desde, hasta y tipo de la consulta 8 desde sys.argv[2:5]; valida las fechas antes de conectarse."""
+    desde = sys.argv[2] if len(sys.argv) > 2 else None
+    hasta = sys.argv[3] if len(sys.argv) > 3 else None
+    try:
+        for fecha in (desde, hasta):
+            if fecha is not None:
+                parsear_fecha(fecha)
+    except ValueError:
+        log.error("Error: desde y hasta (argumentos 2 y 3) deben tener formato DD/MM/YYYY.")
+        print("Uso: python main.py 8 [desde] [hasta] [tipo|todos]")
+        sys.exit(1)
+    parametros = {'desde': desde, 'hasta': hasta}
+    if len(sys.argv) > 4:
+        parametros['tipo'] = None if sys.argv[4].lower() == 'todos' else sys.argv[4]
+    return parametros
+
 
 if __name__ == "__main__":
     
-    servicio = ServicioAseguradora(db, redis_client)
-    
     if len(sys.argv) < 2:
         log.error("¡Error! Debes especificar un número de query para correr.")
         log.error("Usa el menú 'Run and Debug' de VS Code para elegir una query.")
         sys.exit(1)
         
     query_num = sys.argv[1]
+    if query_num not in CONSULTAS_LECTURA and query_num not in SERVICIOS_ESCRITURA:
+        log.error(f"Número de query '{query_num}' no válido. Debe ser de 1 a 15.")
+        sys.exit(1)
+
+    servicio = ServicioDiferido()
     
     log.info(f"--- Ejecutando Query/Servicio N° {query_num} ---")
-        
-    if query_num == '1':
+
+    # Servicios 13-15 en lote: python main.py <13|14|15> lote <archivo.json> (lista de ítems)
+    if query_num in SERVICIOS_ESCRITURA and len(sys.argv) > 2 and sys.argv[2] == 'lote':
+        try:
+            with open(sys.argv[3], encoding='utf-8') as archivo:
+                items = json.load(archivo)
+        except (IndexError, OSError, ValueError) as e:
+            log.error(f"Error: no se pudo leer el archivo del lote: {e}")
+            print(f"Uso: python main.py {query_num} lote <archivo.json>")
+            sys.exit(1)
+        if not (isinstance(items, list) and all(isinstance(item, dict) for item in items)):
+            log.error("Error: el archivo del lote debe tener una lista de objetos JSON.")
+            print(f"Uso: python main.py {query_num} lote <archivo.json>")
+            sys.exit(1)
+        for item in items:
+            if query_num != '13' and isinstance(item.get('nro_poliza'), str):
+                item['nro_poliza'] = item['nro_poliza'].upper()
+        lotes = {
+            '13': servicio.q13_abm_clientes_lote,
+            '14': servicio.q14_alta_siniestros_lote,
+            '15': servicio.q15_emitir_polizas_lote,
+        }
+        pprint(lotes[query_num](items))
+
+    # Consultas 1-12 en NDJSON: SALIDA=ndjson python main.py <n> [parámetros]
+    # (en q9, sin limit se recorre todo el índice desde offset)
+    elif SALIDA == 'ndjson' and query_num in CONSULTAS_LECTURA:
+        parametros = {}
+        if query_num == '9':
+            try:
+                parametros['offset'] = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+                parametros['limit'] = int(sys.argv[3]) if len(sys.argv) > 3 else None
+            except ValueError:
+                log.error("Error: offset y limit (argumentos 2 y 3) deben ser números.")
+                print("Uso: SALIDA=ndjson python main.py 9 [offset] [limit]")
+                sys.exit(1)
+        elif query_num == '7':
+            try:
+                parametros['n'] = int(sys.argv[2]) if len(sys.argv) > 2 else TOP_Q7_DEFAULT
+                parametros['offset'] = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+            except ValueError:
+                log.error("Error: n y offset (argumentos 2 y 3) deben ser números.")
+                print("Uso: SALIDA=ndjson python main.py 7 [n] [offset] [tipo]")
+                sys.exit(1)
+            parametros['tipo'] = sys.argv[4] if len(sys.argv) > 4 else None
+        elif query_num == '4':
+            parametros['desde_mongo'] = sys.argv[-1].lower() == 'mongo'
+            paginacion = sys.argv[2:-1] if parametros['desde_mongo'] else sys.argv[2:]
+            try:
+                parametros['offset'] = int(paginacion[0]) if len(paginacion) > 0 else 0
+                parametros['limit'] = int(paginacion[1]) if len(paginacion) > 1 else None
+            except ValueError:
+                log.error("Error: offset y limit (argumentos 2 y 3) deben ser números.")
+                print("Uso: SALIDA=ndjson python main.py 4 [offset] [limit] [mongo]")
+                sys.exit(1)
+        elif query_num == '11':
+            try:
+                parametros['minimo'] = int(sys.argv[2]) if len(sys.argv) > 2 else MINIMO_Q11_DEFAULT
+            except ValueError:
+                log.error("Error: minimo (argumento 2) debe ser un número.")
+                print("Uso: SALIDA=ndjson python main.py 11 [minimo]")
+                sys.exit(1)
+        elif query_num == '8':
+            parametros = _parametros_q8()
+        elif query_num == '12':
+            parametros['desde_mongo'] = len(sys.argv) > 2 and sys.argv[2].lower() == 'mongo'
+        documentos = 0
+        for documento in servicio.iterar_consulta(query_num, batch_size=STREAMING_BATCH_SIZE, **parametros):
+            sys.stdout.write(json.dumps(documento, ensure_ascii=False, default=str) + "\n")
+            documentos += 1
+        sys.stdout.flush()
+        log.info(f"{documentos} documentos escritos en NDJSON.")
+
+    elif query_num == '1':
         pprint(servicio.q1_clientes_activos_con_polizas())
     
     elif query_num == '2':
@@ -58,7 +205,17 @@ if __name__ == "__main__":
         pprint(servicio.q3_vehiculos_asegurados_con_cliente_poliza())
         
     elif query_num == '4':
-        pprint(servicio.q4_clientes_sin_polizas_activas())
+        # python main.py 4 [offset] [limit] [mongo]: 'mongo' usa el anti-join en lugar de los sets de Redis.
+        desde_mongo = sys.argv[-1].lower() == 'mongo'
+        paginacion = sys.argv[2:-1] if desde_mongo else sys.argv[2:]
+        try:
+            offset = int(paginacion[0]) if len(paginacion) > 0 else 0
+            limit = int(paginacion[1]) if len(paginacion) > 1 else None
+        except ValueError:
+            log.error("Error: offset y limit (argumentos 2 y 3) deben ser números.")
+            print("Uso: python main.py 4 [offset] [limit] [mongo]")
+            sys.exit(1)
+        pprint(servicio.q4_clientes_sin_polizas_activas(offset=offset, limit=limit, desde_mongo=desde_mongo))
         
     elif query_num == '5':
         pprint(servicio.q5_agentes_activos_con_polizas())
@@ -67,22 +224,46 @@ if __name__ == "__main__":
         pprint(servicio.q6_polizas_vencidas_con_cliente())
         
     elif query_num == '7':
-        pprint(servicio.q7_top_10_clientes_cobertura())
+        try:
+            n = int(sys.argv[2]) if len(sys.argv) > 2 else TOP_Q7_DEFAULT
+            offset = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+        except ValueError:
+            log.error("Error: n y offset (argumentos 2 y 3) deben ser números.")
+            print("Uso: python main.py 7 [n] [offset] [tipo]")
+            sys.exit(1)
+        tipo = sys.argv[4] if len(sys.argv) > 4 else None
+        pprint(servicio.q7_top_10_clientes_cobertura(n=n, offset=offset, tipo=tipo))
         
     elif query_num == '8':
-        pprint(servicio.q8_siniestros_accidente_ultimo_anio())
+        # python main.py 8 [desde] [hasta] [tipo]: fechas DD/MM/YYYY (default: el último año), tipo 'todos' = sin filtro.
+        parametros = _parametros_q8()
+        pprint(servicio.q8_siniestros_accidente_ultimo_anio(**parametros))
         
     elif query_num == '9':
-        pprint(servicio.q9_vista_polizas_activas_ordenadas())
+        try:
+            offset = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+            limit = int(sys.argv[3]) if len(sys.argv) > 3 else PAGINA_Q9_DEFAULT
+        except ValueError:
+            log.error("Error: offset y limit (argumentos 2 y 3) deben ser números.")
+            print("Uso: python main.py 9 [offset] [limit]")
+            sys.exit(1)
+        pprint(servicio.q9_vista_polizas_activas_ordenadas(offset=offset, limit=limit))
         
     elif query_num == '10':
         pprint(servicio.q10_polizas_suspendidas_estado_cliente())
         
     elif query_num == '11':
-        pprint(servicio.q11_clientes_con_mas_de_un_vehiculo())
+        try:
+            minimo = int(sys.argv[2]) if len(sys.argv) > 2 else MINIMO_Q11_DEFAULT
+        except ValueError:
+            log.error("Error: minimo (argumento 2) debe ser un número.")
+            print("Uso: python main.py 11 [minimo]")
+            sys.exit(1)
+        pprint(servicio.q11_clientes_con_mas_de_un_vehiculo(minimo=minimo))
         
     elif query_num == '12':
-        pprint(servicio.q12_agentes_y_siniestros_asociados())
+        desde_mongo = len(sys.argv) > 2 and sys.argv[2].lower() == 'mongo'
+        pprint(servicio.q12_agentes_y_siniestros_asociados(desde_mongo=desde_mongo))
         
     elif query_num == '13':
         log.info("--- (S13: ABM Clientes por CLI) ---")
@@ -185,7 +366,7 @@ if __name__ == "__main__":
         try:
             if len(sys.argv) < 11:
                 log.error("Error EMITIR PÓLIZA: Faltan argumentos.")
-                print("Uso: python main.py 15 <nro_poliza> <id_cliente> <id_agente> <tipo> <fecha_inicio_DD/MM/YYYY> <fecha_fin_DD/MM/YYYY> <prima_mensual> <cobertura_total> <estado>")
+                print("Uso: python main.py 15 <nro_poliza> <id_cliente> <id_agente> <tipo> <fecha_inicio_DD/MM/YYYY> <fecha_fin_DD/MM/YYYY> <prima_mensual> <cobertura_total> <estado> [rapida]")
                 sys.exit(1)
 
             datos_nuevos = {
@@ -200,22 +381,25 @@ if __name__ == "__main__":
                 "estado": sys.argv[10]
             }
         
-            resultado = servicio.q15_emitir_poliza(datos_nuevos)
+            rapida = len(sys.argv) > 11 and sys.argv[11].lower() == 'rapida'
+            if rapida:
+                resultado = servicio.q15_emitir_poliza_rapida(datos_nuevos)
+            else:
+                resultado = servicio.q15_emitir_poliza(datos_nuevos)
             pprint(resultado)
             
         except IndexError:
             log.error("Error de Emisión Póliza: Faltan argumentos de línea de comando.")
-            print("Uso: python main.py 15 <nro_poliza> <id_cliente> <id_agente> <tipo> <fecha_inicio_DD/MM/YYYY> <fecha_fin_DD/MM/YYYY> <prima_mensual> <cobertura_total> <estado>")
+            print("Uso: python main.py 15 <nro_poliza> <id_cliente> <id_agente> <tipo> <fecha_inicio_DD/MM/YYYY> <fecha_fin_DD/MM/YYYY> <prima_mensual> <cobertura_total> <estado> [rapida]")
         except ValueError:
             log.error("Error: IDs o montos no son numéricos.")
         except Exception as e:
             log.error(f"Error inesperado en Emisión Póliza: {e}")
-    
-    else:
-        log.error(f"Número de query '{query_num}' no válido. Debe ser de 1 a 15.")
 
     log.info(f"--- Fin de Query/Servicio N° {query_num} ---")
+    if servicio.cache is not None:
+        log.info(f"Cache de consultas: {servicio.cache.estadisticas()}")
+    if servicio.registro is not None:
+        print(servicio.registro.a_prometheus() if METRICAS == 'prometheus' else servicio.registro.a_json())
     
-    mongo_client.close()
-    redis_client.close()
-    log.info("Conexiones a BBDD cerradas.")
\ No newline at end of file
+    servicio.cerrar()
\ No newline at end of file
@@ -0,0 +1,110 @@
+# src/api/dashboard.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+
+from src.api.servidor import _parametros_lectura
+from src.logger import getLogger
+from src.service.conexion import Conexiones, configuracion_desde_entorno
+from src.service.consultas import CONSULTAS_LECTURA
+from src.service.dashboard import CONCURRENCIA_DEFAULT, ejecutar_dashboard
+
+# bson y services (pymongo/redis) se importan en main(): --help y los errores de argumentos no los cargan.
+
+log = getLogger("DASHBOARD")
+
+
+def _parsear_parametros(valores):
+    """['7.n=5', '4.limit=20'] -> {'7': {'n': '5'}, '4': {'limit': '20'}} (como el query string de la API)."""
+    por_consulta = {}
+    for valor in valores:
+        consulta, _, asignacion = valor.partition('.')
+        clave, igual, dato = asignacion.partition('=')
+        if not (consulta in CONSULTAS_LECTURA and clave and igual):
+            raise ValueError(f"parámetro '{valor}' no válido (formato: <consulta>.<clave>=<valor>)")
+        por_consulta.setdefault(consulta, {})[clave] = dato
+    return por_consulta
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Corre en paralelo un subconjunto de las consultas de lectura 1-12 y devuelve "
+                    "los resultados juntos, con el tiempo de cada una y el total."
+    )
+    parser.add_argument('--consultas', default=','.join(CONSULTAS_LECTURA),
+                        help="Consultas a correr, separadas por coma (default: todas, 1-12).")
+    parser.add_argument('--concurrencia', type=int, default=CONCURRENCIA_DEFAULT,
+                        help=f"Consultas corriendo a la vez (default: {CONCURRENCIA_DEFAULT}).")
+    parser.add_argument('--mongo-pool', type=int, default=None,
+                        help="maxPoolSize del MongoClient (default: la concurrencia).")
+    parser.add_argument('--redis-pool', type=int, default=None,
+                        help="Conexiones máximas del pool de Redis (default: la concurrencia).")
+    parser.add_argument('-p', '--parametro', action='append', default=[],
+                        help="Parámetro de una consulta como en la API, p. ej. 7.n=5, 7.tipo=Auto, "
+                             "4.limit=50, 11.minimo=3, 12.mongo=1. Se puede repetir.")
+    parser.add_argument('--sin-resultados', action='store_true',
+                        help="Muestra sólo los tiempos y la cantidad de documentos de cada consulta.")
+    args = parser.parse_args(argv)
+
+    args.consultas = [q.strip() for q in args.consultas.split(',') if q.strip()]
+    invalidas = [q for q in args.consultas if q not in CONSULTAS_LECTURA]
+    if invalidas or not args.consultas:
+        parser.error(f"Consultas no válidas: {', '.join(invalidas) or '(ninguna)'}. Deben ser de 1 a 12.")
+    if args.concurrencia < 1:
+        parser.error("--concurrencia debe ser >= 1.")
+    args.mongo_pool = args.mongo_pool or args.concurrencia
+    args.redis_pool = args.redis_pool or args.concurrencia
+    for opcion in ('mongo_pool', 'redis_pool'):
+        if getattr(args, opcion) < 1:
+            parser.error(f"--{opcion.replace('_', '-')} debe ser >= 1.")
+    try:
+        args.parametros = {
+            q: _parametros_lectura(q, params) for q, params in _parsear_parametros(args.parametro).items()
+        }
+    except ValueError as e:
+        parser.error(f"Parámetros inválidos: {e}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from bson import json_util
+
+    from src.service.services import ServicioAseguradora
+
+    conexiones = Conexiones(configuracion_desde_entorno(mongo_pool=args.mongo_pool, redis_pool=args.redis_pool))
+    try:
+        log.info("Conectando a bases de datos...")
+        conexiones.verificar()
+    except Exception as e:
+        log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
+        sys.exit(1)
+
+    servicio = ServicioAseguradora(conexiones.db, conexiones.redis_client)
+    try:
+        reporte = ejecutar_dashboard(servicio, args.consultas, args.concurrencia, args.parametros)
+        if isinstance(reporte, str):
+            log.error(reporte)
+            sys.exit(1)
+        if args.sin_resultados:
+            for resultado in reporte['consultas'].values():
+                resultado.pop('resultado')
+        print(json_util.dumps(reporte, indent=2, ensure_ascii=False))
+        return reporte
+    finally:
+        servicio.cerrar()
+        conexiones.cerrar()
+        log.info("Conexiones a BBDD cerradas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# src/api/servidor.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.logger import getLogger
+from src.service.conexion import Conexiones, configuracion_desde_entorno
+from src.service.consultas import CONSULTAS_LECTURA, MINIMO_Q11_DEFAULT, PAGINA_Q9_DEFAULT, TOP_Q7_DEFAULT
+from src.service.dashboard import CONCURRENCIA_DEFAULT, ejecutar_dashboard
+from src.service.fechas import parsear_fecha
+
+# bson y los módulos que usan pymongo/redis (services, cache, outbox, metricas) se importan
+# dentro de main() y de los handlers: --help y los errores de argumentos no los cargan.
+
+log = getLogger("API")
+
+HILOS_DEFAULT = 8
+MONGO_POOL_DEFAULT = 20
+REDIS_POOL_DEFAULT = 20
+
+SERVICIOS_ESCRITURA = ('13', '14', '15')
+
+
+def _parametros_lectura(query_num, params):
+    """Argumentos de cada consulta de lectura a partir del query string."""
+    if query_num == '9':
+        return {
+            'offset': int(params.get('offset', 0)),
+            'limit': int(params.get('limit', PAGINA_Q9_DEFAULT)),
+        }
+    if query_num == '7':
+        return {
+            'n': int(params.get('n', TOP_Q7_DEFAULT)),
+            'offset': int(params.get('offset', 0)),
+            'tipo': params.get('tipo') or None,
+        }
+    if query_num == '4':
+        return {
+            'offset': int(params.get('offset', 0)),
+            'limit': int(params['limit']) if params.get('limit') else None,
+            'desde_mongo': params.get('mongo', '').lower() in ('1', 'true', 'si'),
+        }
+    if query_num == '8':
+        return _parametros_q8(params.get('desde'), params.get('hasta'), params.get('tipo'))
+    if query_num == '11':
+        return {'minimo': int(params.get('minimo', MINIMO_Q11_DEFAULT))}
+    if query_num == '12':
+        return {'desde_mongo': params.get('mongo', '').lower() in ('1', 'true', 'si')}
+    return {}
+
+
+def _parametros_q8(desde, hasta, tipo):
+    """Rango [desde, hasta] (DD/MM/YYYY, validado acá) y tipo de la consulta 8; 'todos' = sin filtro de tipo."""
+    for fecha in (desde, hasta):
+        if fecha:
+            parsear_fecha(fecha)
+    parametros = {'desde': desde or None, 'hasta': hasta or None}
+    if tipo:
+        parametros['tipo'] = None if tipo.lower() == 'todos' else tipo
+    return parametros
+
+
+def _ejecutar_escritura(servicio, query_num, cuerpo, rapida=False):
+    if query_num == '13':
+        return servicio.q13_abm_clientes(
+            accion=cuerpo.get('accion'), datos=cuerpo.get('datos'), cliente_id=cuerpo.get('cliente_id')
+        )
+    if isinstance(cuerpo.get('nro_poliza'), str):
+        cuerpo['nro_poliza'] = cuerpo['nro_poliza'].upper()
+    if query_num == '14':
+        return servicio.q14_alta_siniestro(cuerpo)
+    if rapida:
+        return servicio.q15_emitir_poliza_rapida(cuerpo)
+    return servicio.q15_emitir_poliza(cuerpo)
+
+
+def _ejecutar_escritura_lote(servicio, query_num, items):
+    if query_num == '13':
+        return servicio.q13_abm_clientes_lote(items)
+    for item in items:
+        if isinstance(item.get('nro_poliza'), str):
+            item['nro_poliza'] = item['nro_poliza'].upper()
+    if query_num == '14':
+        return servicio.q14_alta_siniestros_lote(items)
+    return servicio.q15_emitir_polizas_lote(items)
+
+
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Rutas:
+
+      GET  /salud                  -> ping a Mongo y Redis
+      GET  /consultas/<1-12>       -> consulta de lectura (q7: ?n=&offset=&tipo=, q8: ?desde=&hasta=&tipo=,
+                                      q9: ?offset=&limit=, q12: ?mongo=1)
+      GET  /dashboard              -> varias consultas en paralelo (?consultas=1,2,7&concurrencia=4&7.n=5)
+      POST /servicios/<13-15>      -> servicio de escritura, cuerpo JSON con los datos (15: ?modo=rapida)
+      POST /servicios/<13-15>/lote -> variante en lote, cuerpo JSON con una lista de ítems
+      GET  /cache                  -> hits/misses del cache de consultas (si está activo)
+      GET  /outbox                 -> eventos pendientes y lag de las vistas de Redis (con --outbox)
+      GET  /metricas               -> métricas por método en texto Prometheus (?formato=json para JSON)
+    """
+
+    def do_GET(self):
+        ruta = urlparse(self.path)
+        partes = ruta.path.strip('/').split('/')
+        servicio = self.server.servicio
+
+        if partes == ['salud']:
+            return self._ejecutar(self.server.salud)
+        if partes == ['cache']:
+            if servicio.cache is None:
+                return self._responder(404, {'error': "El cache de consultas no está activo."})
+            return self._ejecutar(servicio.cache.estadisticas)
+        if partes == ['outbox']:
+            if self.server.trabajador_outbox is None:
+                return self._responder(404, {'error': "El outbox de vistas no está activo (usar --outbox)."})
+            return self._ejecutar(self.server.trabajador_outbox.estadisticas)
+        if partes == ['metricas']:
+            registro = getattr(servicio, 'metricas', None)
+            if registro is None:
+                return self._responder(404, {'error': "Las métricas no están activas (usar --metricas)."})
+            if parse_qs(ruta.query).get('formato', [''])[-1] == 'json':
+                return self._responder(200, registro.a_dict())
+            return self._responder_texto(200, registro.a_prometheus())
+        if partes == ['dashboard']:
+            params = {clave: valores[-1] for clave, valores in parse_qs(ruta.query).items()}
+            consultas = [q.strip() for q in params.pop('consultas', '').split(',') if q.strip()]
+            try:
+                concurrencia = int(params.pop('concurrencia', CONCURRENCIA_DEFAULT))
+                parametros = {}
+                for clave, valor in params.items():
+                    consulta, _, campo = clave.partition('.')
+                    parametros.setdefault(consulta, {})[campo] = valor
+                kwargs = {q: _parametros_lectura(q, valores) for q, valores in parametros.items()}
+            except ValueError:
+                return self._responder(400, {'error': "Parámetros inválidos (números o fechas DD/MM/YYYY)."})
+            return self._ejecutar(lambda: ejecutar_dashboard(servicio, consultas, concurrencia, kwargs))
+        if len(partes) == 2 and partes[0] == 'consultas' and partes[1] in CONSULTAS_LECTURA:
+            query_num = partes[1]
+            params = {clave: valores[-1] for clave, valores in parse_qs(ruta.query).items()}
+            try:
+                kwargs = _parametros_lectura(query_num, params)
+            except ValueError:
+                return self._responder(400, {'error': "Parámetros inválidos (números o fechas DD/MM/YYYY)."})
+            metodo = getattr(servicio, CONSULTAS_LECTURA[query_num])
+            return self._ejecutar(lambda: metodo(**kwargs))
+
+        self._responder(404, {'error': f"Ruta no encontrada: {ruta.path}"})
+
+    def do_POST(self):
+        ruta = urlparse(self.path)
+        partes = ruta.path.strip('/').split('/')
+        lote = len(partes) == 3 and partes[2] == 'lote'
+        if not ((len(partes) == 2 or lote) and partes[0] == 'servicios' and partes[1] in SERVICIOS_ESCRITURA):
+            return self._responder(404, {'error': f"Ruta no encontrada: {self.path}"})
+
+        try:
+            largo = int(self.headers.get('Content-Length', 0))
+            cuerpo = json.loads(self.rfile.read(largo) or (b'[]' if lote else b'{}'))
+            if lote and not (isinstance(cuerpo, list) and all(isinstance(item, dict) for item in cuerpo)):
+                raise ValueError("se esperaba una lista de objetos JSON")
+            if not lote and not isinstance(cuerpo, dict):
+                raise ValueError("se esperaba un objeto JSON")
+        except ValueError as e:
+            return self._responder(400, {'error': f"Cuerpo JSON inválido: {e}"})
+
+        servicio = self.server.servicio
+        if lote:
+            return self._ejecutar(lambda: _ejecutar_escritura_lote(servicio, partes[1], cuerpo))
+        rapida = parse_qs(ruta.query).get('modo', [''])[-1] == 'rapida'
+        self._ejecutar(lambda: _ejecutar_escritura(servicio, partes[1], cuerpo, rapida=rapida))
+
+    def _ejecutar(self, funcion):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion()
+        except Exception as e:
+            log.error(f"Error atendiendo {self.command} {self.path}: {e}")
+            return self._responder(500, {'error': str(e)})
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        self._responder(200, {'resultado': resultado, 'duracion_ms': round(duracion_ms, 3)})
+
+    def _responder(self, estado, cuerpo):
+        from bson import json_util
+
+        datos = json_util.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _responder_texto(self, estado, texto):
+        datos = texto.encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, formato, *args):
+        log.info(f"{self.address_string()} - {formato % args}")
+
+
+class ServidorAPI(HTTPServer):
+    """Servidor HTTP que atiende las peticiones con un pool acotado de `hilos`.
+
+    Todas las peticiones comparten el mismo ServicioAseguradora, y por lo tanto el
+    mismo MongoClient y el mismo pool de conexiones de Redis.
+    """
+
+    def __init__(self, direccion, servicio, mongo_client, redis_client, hilos=HILOS_DEFAULT):
+        super().__init__(direccion, ManejadorAPI)
+        self.servicio = servicio
+        self.mongo_client = mongo_client
+        self.redis_client = redis_client
+        self.trabajador_outbox = None
+        self._pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='api')
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._procesar, request, client_address)
+
+    def _procesar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def salud(self):
+        self.mongo_client.admin.command('ping')
+        self.redis_client.ping()
+        return 'ok'
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Expone las consultas y servicios 1-15 como API HTTP/JSON.")
+    parser.add_argument('--host', default='0.0.0.0', help="Dirección de escucha (default: 0.0.0.0).")
+    parser.add_argument('--puerto', type=int, default=8000, help="Puerto de escucha (default: 8000).")
+    parser.add_argument('--hilos', type=int, default=HILOS_DEFAULT,
+                        help=f"Peticiones atendidas en paralelo (default: {HILOS_DEFAULT}).")
+    parser.add_argument('--mongo-pool', type=int, default=int(os.environ.get("MONGO_POOL", MONGO_POOL_DEFAULT)),
+                        help=f"maxPoolSize del MongoClient (default: $MONGO_POOL o {MONGO_POOL_DEFAULT}).")
+    parser.add_argument('--redis-pool', type=int, default=int(os.environ.get("REDIS_POOL", REDIS_POOL_DEFAULT)),
+                        help=f"Conexiones máximas del pool de Redis (default: $REDIS_POOL o {REDIS_POOL_DEFAULT}).")
+    parser.add_argument('--cache-ttl', type=int, default=int(os.environ.get("CACHE_CONSULTAS_TTL", "0")),
+                        help="TTL del cache de consultas en segundos, 0 = desactivado (default: $CACHE_CONSULTAS_TTL o 0).")
+    parser.add_argument('--metricas', action='store_true',
+                        help="Instrumenta los métodos del servicio y expone GET /metricas.")
+    parser.add_argument('--explain', action='store_true',
+                        help="Con --metricas, agrega explain(executionStats) de cada consulta (más lento).")
+    parser.add_argument('--outbox', action='store_true',
+                        help="Las emisiones registran las actualizaciones de vistas en un outbox en Mongo, "
+                             "que un hilo de este proceso aplica en Redis en segundo plano.")
+    args = parser.parse_args(argv)
+    if args.explain and not args.metricas:
+        parser.error("--explain requiere --metricas.")
+    for opcion in ('hilos', 'mongo_pool', 'redis_pool'):
+        if getattr(args, opcion) < 1:
+            parser.error(f"--{opcion.replace('_', '-')} debe ser >= 1.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from src.service.cache import CacheConsultas
+    from src.service.metricas import LISTENER_MONGO, RegistroMetricas, instrumentar_servicio
+    from src.service.outbox import KEY_OUTBOX_LEASE, TrabajadorOutbox
+    from src.service.services import ServicioAseguradora
+
+    conexiones = Conexiones(
+        configuracion_desde_entorno(mongo_pool=args.mongo_pool, redis_pool=args.redis_pool),
+        event_listeners=[LISTENER_MONGO] if args.metricas else []
+    )
+    try:
+        log.info("Conectando a bases de datos...")
+        conexiones.verificar()
+    except Exception as e:
+        log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
+        sys.exit(1)
+    mongo_client, redis_client, db = conexiones.mongo_client, conexiones.redis_client, conexiones.db
+
+    cache = CacheConsultas(redis_client, ttl=args.cache_ttl) if args.cache_ttl > 0 else None
+    servicio = ServicioAseguradora(db, redis_client, cache=cache, outbox=args.outbox)
+    if args.metricas:
+        instrumentar_servicio(servicio, RegistroMetricas(explain=args.explain))
+    servidor = ServidorAPI((args.host, args.puerto), servicio, mongo_client, redis_client, hilos=args.hilos)
+    if args.outbox:
+        trabajador = TrabajadorOutbox(db, redis_client)
+        if trabajador.tomar_lease():
+            servidor.trabajador_outbox = trabajador.iniciar()
+        else:
+            # Las emisiones igual van al outbox: las aplica el trabajador que tiene el lease.
+            log.warning(f"Otro trabajador de outbox tiene el lease ({redis_client.get(KEY_OUTBOX_LEASE)}); "
+                        f"este servidor no inicia el suyo.")
+
+    log.info(
+        f"API escuchando en http://{args.host}:{args.puerto} "
+        f"({args.hilos} hilos, pool Mongo {args.mongo_pool}, pool Redis {args.redis_pool})."
+    )
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Deteniendo API...")
+    finally:
+        servidor.server_close()
+        if servidor.trabajador_outbox is not None:
+            servidor.trabajador_outbox.detener()
+        servicio.cerrar()
+        conexiones.cerrar()
+        log.info("Conexiones a BBDD cerradas.")
+
+
+if __name__ == "__main__":
+    main()
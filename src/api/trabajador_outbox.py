@@ -0,0 +1,76 @@
+# src/api/trabajador_outbox.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import time
+
+from src.logger import getLogger
+from src.service.conexion import DB_NAME, conectar
+from src.service.outbox import INTERVALO_DEFAULT, KEY_OUTBOX_LEASE, LOTE_DEFAULT, TrabajadorOutbox, estado_outbox
+
+log = getLogger("OUTBOX")
+
+REPORTE_CADA_DEFAULT = 30
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Aplica en Redis los eventos del outbox de vistas (emisiones con OUTBOX=1)."
+    )
+    parser.add_argument('--lote', type=int, default=LOTE_DEFAULT,
+                        help=f"Eventos aplicados por pipeline (default: {LOTE_DEFAULT}).")
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_DEFAULT,
+                        help=f"Segundos de espera cuando el outbox está vacío (default: {INTERVALO_DEFAULT}).")
+    parser.add_argument('--reporte-cada', type=int, default=REPORTE_CADA_DEFAULT,
+                        help=f"Segundos entre reportes de lag en el log (default: {REPORTE_CADA_DEFAULT}).")
+    parser.add_argument('--una-vez', action='store_true',
+                        help="Drena el outbox y termina, en lugar de quedar escuchando.")
+    args = parser.parse_args(argv)
+    if args.lote < 1 or args.intervalo <= 0 or args.reporte_cada < 1:
+        parser.error("--lote, --intervalo y --reporte-cada deben ser positivos.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        mongo_client, redis_client = conectar()
+        db = mongo_client[DB_NAME]
+    except Exception as e:
+        log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
+        sys.exit(1)
+
+    trabajador = TrabajadorOutbox(db, redis_client, lote=args.lote, intervalo=args.intervalo)
+    if not trabajador.tomar_lease():
+        log.error(f"Otro trabajador de outbox ya está drenando ({redis_client.get(KEY_OUTBOX_LEASE)}). "
+                  f"Con más de uno los eventos se aplicarían dos veces.")
+        mongo_client.close()
+        redis_client.close()
+        sys.exit(1)
+    trabajador.iniciar()
+    try:
+        while True:
+            time.sleep(args.intervalo if args.una_vez else args.reporte_cada)
+            estado = estado_outbox(db)
+            if args.una_vez and estado['pendientes'] == 0:
+                break
+            log.info(f"Outbox: {estado['pendientes']} eventos pendientes, lag {estado['lag_segundos']:.1f}s, "
+                     f"{trabajador.aplicados} aplicados.")
+    except KeyboardInterrupt:
+        log.info("Deteniendo trabajador de outbox...")
+    finally:
+        trabajador.detener()
+        mongo_client.close()
+        redis_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# src/bench/benchmark.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import copy
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from src.logger import getLogger
+from src.service.cache import invalidar_colecciones
+from src.bench import generar_datos
+from src.loader import load_data
+from src.service.metricas import LISTENER_MONGO, RegistroMetricas, instrumentar_servicio
+from src.service.normalizacion import TIPO_POLIZA_AUTO
+from src.service.services import CONSULTAS_LECTURA, ServicioAseguradora
+from src.service.vistas import KEY_CLIENTES_CON_POLIZA_ACTIVA, KEY_RANKING_COBERTURA, clave_ranking_tipo
+
+log = getLogger(__name__)
+
+REPETICIONES_DEFAULT = 20
+
+# Modos de emisión de pólizas que compara --emisiones.
+MODOS_EMISION = {
+    'actual': 'q15_emitir_poliza',
+    'rapida': 'q15_emitir_poliza_rapida',
+}
+PREFIJO_POLIZA_BENCH = 'BENCH-'
+
+# Consultas con $lookup -> (colección, método que arma su pipeline), para medir los bytes del join.
+PIPELINES_CON_LOOKUP = {
+    '1': ('clientes', '_pipeline_q1'),
+    '3': ('clientes', '_pipeline_q3'),
+    '4': ('clientes', '_pipeline_q4'),
+    '6': ('polizas', '_pipeline_q6'),
+    '10': ('polizas', '_pipeline_q10'),
+    '12': ('siniestros', '_pipeline_q12'),
+}
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) con interpolación lineal entre los dos valores más cercanos."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def resumir(tiempos_ms):
+    return {
+        'n': len(tiempos_ms),
+        'min': min(tiempos_ms),
+        'p50': percentil(tiempos_ms, 50),
+        'p95': percentil(tiempos_ms, 95),
+        'p99': percentil(tiempos_ms, 99),
+        'max': max(tiempos_ms),
+        'media': sum(tiempos_ms) / len(tiempos_ms),
+    }
+
+
+def medir(funcion):
+    """Ejecuta `funcion` y devuelve (milisegundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def medir_consultas(servicio, consultas, repeticiones):
+    """Mide cada consulta de lectura: una ejecución en frío y `repeticiones` en caliente.
+
+    Si el servicio está instrumentado (src.service.metricas), agrega los round trips
+    promedio por llamada a Mongo y a Redis.
+    """
+    resultados = {}
+    for query_num in consultas:
+        metodo = getattr(servicio, CONSULTAS_LECTURA[query_num])
+        log.info(f"Midiendo Q{query_num} ({metodo.__name__})...")
+        cold_ms, resultado = medir(metodo)
+        warm_ms = [medir(metodo)[0] for _ in range(repeticiones)]
+        resultados[query_num] = {
+            'metodo': metodo.__name__,
+            'filas': len(resultado) if isinstance(resultado, list) else None,
+            'cold_ms': cold_ms,
+            'warm_ms': resumir(warm_ms) if warm_ms else None,
+        }
+    registro = getattr(servicio, 'metricas', None)
+    if registro is not None:
+        metricas = registro.a_dict()
+        for datos in resultados.values():
+            m = metricas.get(datos['metodo'])
+            if m and m['llamadas']:
+                datos['roundtrips'] = {
+                    'mongo': m['mongo_roundtrips'] / m['llamadas'],
+                    'redis': m['redis_roundtrips'] / m['llamadas'],
+                }
+    return resultados
+
+
+def sin_poda(pipeline):
+    """Copia de `pipeline` cuyos $lookup traen los documentos completos.
+
+    Quita los $project y $limit de los sub-pipelines de cada $lookup, que es como
+    estaban antes de proyectar sólo los campos usados.
+    """
+    resultado = copy.deepcopy(pipeline)
+    for etapa in resultado:
+        lookup = etapa.get('$lookup')
+        if lookup and 'pipeline' in lookup:
+            lookup['pipeline'] = [sub for sub in lookup['pipeline'] if not {'$project', '$limit'} & set(sub)]
+            if not lookup['pipeline']:
+                del lookup['pipeline']
+    return resultado
+
+
+def bytes_lookup(coleccion, pipeline):
+    """Bytes (BSON) que traen en total los $lookup de `pipeline`, sumando los de cada uno."""
+    total = 0
+    for i, etapa in enumerate(pipeline):
+        if '$lookup' not in etapa:
+            continue
+        medicion = pipeline[:i + 1] + [
+            {'$group': {'_id': None, 'bytes': {'$sum': {'$bsonSize': {'v': f"${etapa['$lookup']['as']}"}}}}}
+        ]
+        grupo = next(iter(coleccion.aggregate(medicion, allowDiskUse=True)), None)
+        total += grupo['bytes'] if grupo else 0
+    return total
+
+
+def medir_bytes_lookup(servicio, consultas):
+    """Bytes que cruzan los $lookup de cada consulta, con y sin proyectar en el sub-pipeline."""
+    resultados = {}
+    for query_num in consultas:
+        if query_num not in PIPELINES_CON_LOOKUP:
+            continue
+        coleccion, nombre_pipeline = PIPELINES_CON_LOOKUP[query_num]
+        pipeline = getattr(servicio, nombre_pipeline)()
+        con = bytes_lookup(servicio.db[coleccion], pipeline)
+        sin = bytes_lookup(servicio.db[coleccion], sin_poda(pipeline))
+        resultados[query_num] = {
+            'bytes_sin_proyeccion': sin,
+            'bytes_con_proyeccion': con,
+            'reduccion': 1 - con / sin if sin else None,
+        }
+    return resultados
+
+
+def medir_emision(servicio, cantidad):
+    """Compara los modos de emisión de pólizas (MODOS_EMISION) emitiendo `cantidad` pólizas con cada uno.
+
+    Las llamadas se intercalan para que ambos modos vean el mismo estado de las
+    bases. Al final se borran las pólizas emitidas y se revierten sus vistas en Redis.
+    """
+    db, r = servicio.db, servicio.r
+    cliente = db.clientes.find_one({'activo': True}, {'id_cliente': 1})
+    agente = db.agentes.find_one({'activo': True}, {'id_agente': 1})
+    if not cliente or not agente:
+        log.warning("No hay un cliente y un agente activos: no se mide la emisión.")
+        return None
+
+    cobertura = 1000.0
+    en_ranking = {
+        clave: r.zscore(clave, str(cliente['id_cliente'])) is not None
+        for clave in (KEY_RANKING_COBERTURA, clave_ranking_tipo(TIPO_POLIZA_AUTO))
+    }
+    tenia_activa = r.sismember(KEY_CLIENTES_CON_POLIZA_ACTIVA, str(cliente['id_cliente']))
+    tiempos = {modo: [] for modo in MODOS_EMISION}
+    emitidas = []
+    for i in range(cantidad):
+        for modo, nombre_metodo in MODOS_EMISION.items():
+            nro_poliza = f"{PREFIJO_POLIZA_BENCH}{modo.upper()}-{i}"
+            datos = {
+                'nro_poliza': nro_poliza, 'id_cliente': cliente['id_cliente'], 'id_agente': agente['id_agente'],
+                'tipo': TIPO_POLIZA_AUTO, 'fecha_inicio': '01/01/2025', 'fecha_fin': '01/01/2026',
+                'prima_mensual': cobertura / 80, 'cobertura_total': cobertura, 'estado': 'Activa',
+            }
+            ms, resultado = medir(lambda: getattr(servicio, nombre_metodo)(datos))
+            if resultado.startswith('Error'):
+                log.warning(f"Emisión {modo} {nro_poliza}: {resultado}")
+                continue
+            tiempos[modo].append(ms)
+            emitidas.append(nro_poliza)
+
+    db.polizas.delete_many({'nro_poliza': {'$in': emitidas}})
+    pipe = r.pipeline(transaction=False)
+    if emitidas:
+        pipe.hincrby('agente:stats', str(agente['id_agente']), -len(emitidas))
+        for clave, estaba in en_ranking.items():
+            if estaba:
+                pipe.zincrby(clave, -cobertura * len(emitidas), str(cliente['id_cliente']))
+            else:
+                pipe.zrem(clave, str(cliente['id_cliente']))
+        pipe.zrem('idx:polizas:activas', *emitidas)
+        if not tenia_activa:
+            pipe.srem(KEY_CLIENTES_CON_POLIZA_ACTIVA, str(cliente['id_cliente']))
+    pipe.execute()
+    invalidar_colecciones(r, 'polizas')
+
+    return {modo: resumir(valores) if valores else None for modo, valores in tiempos.items()}
+
+
+def _commit_actual():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Genera y carga un dataset sintético y mide las consultas 1-12 (salida JSON)."
+    )
+    parser.add_argument('--clientes', type=int, default=10000,
+                        help="Tamaño del dataset a generar si no existe (default: 10000).")
+    parser.add_argument('--datos', default=None,
+                        help="Carpeta con los CSV (default: bench_data/<clientes>; se genera si no existe).")
+    parser.add_argument('--sin-carga', action='store_true',
+                        help="No genera ni carga datos: mide sobre lo que ya hay en las bases.")
+    parser.add_argument('--streaming', action='store_true', help="Carga con el modo streaming del loader.")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES_DEFAULT,
+                        help=f"Ejecuciones en caliente por consulta (default: {REPETICIONES_DEFAULT}).")
+    parser.add_argument('--consultas', default=','.join(CONSULTAS_LECTURA),
+                        help="Consultas a medir, separadas por coma (default: todas).")
+    parser.add_argument('--salida', default=None,
+                        help="Archivo JSON de resultados (default: bench_results/<fecha>_<clientes>.json).")
+    parser.add_argument('--emisiones', type=int, default=0,
+                        help="Pólizas a emitir con cada modo de q15 para compararlos (default: 0, no se mide).")
+    parser.add_argument('--sin-bytes-lookup', action='store_true',
+                        help="No mide los bytes que traen los $lookup con y sin proyección.")
+    args = parser.parse_args(argv)
+
+    args.consultas = [c.strip() for c in args.consultas.split(',') if c.strip()]
+    invalidas = [c for c in args.consultas if c not in CONSULTAS_LECTURA]
+    if invalidas:
+        parser.error(f"Consultas no válidas: {', '.join(invalidas)}. Deben ser de 1 a 12.")
+    if args.repeticiones < 0 or args.emisiones < 0:
+        parser.error("--repeticiones y --emisiones deben ser >= 0.")
+    if args.datos is None:
+        args.datos = os.path.join('bench_data', str(args.clientes))
+    if args.salida is None:
+        marca = datetime.now().strftime('%Y%m%d_%H%M%S')
+        args.salida = os.path.join('bench_results', f"{marca}_{args.clientes}.json")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    reporte = {
+        'meta': {
+            'fecha': datetime.now(timezone.utc).isoformat(),
+            'commit': _commit_actual(),
+            'python': platform.python_version(),
+            'datos': args.datos,
+            'repeticiones': args.repeticiones,
+        },
+    }
+
+    if not args.sin_carga:
+        if not os.path.exists(os.path.join(args.datos, 'clientes.csv')):
+            generar_datos.main(['--clientes', str(args.clientes), '--salida', args.datos])
+        argv_carga = ['--csv-dir', args.datos] + (['--streaming'] if args.streaming else [])
+        carga_ms, exito = medir(lambda: load_data.main(argv_carga))
+        if not exito:
+            log.error("La carga de datos falló; no se mide.")
+            sys.exit(1)
+        reporte['carga'] = {'modo': 'streaming' if args.streaming else 'bulk', 'segundos': carga_ms / 1000}
+
+    try:
+        mongo_client, redis_client = load_data.conectar(event_listeners=[LISTENER_MONGO])
+    except Exception as e:
+        log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
+        sys.exit(1)
+
+    servicio = None
+    try:
+        db = mongo_client[load_data.DB_NAME]
+        reporte['meta']['documentos'] = {
+            nombre: db[nombre].estimated_document_count()
+            for nombre in ('clientes', 'agentes', 'polizas', 'siniestros')
+        }
+        servicio = instrumentar_servicio(ServicioAseguradora(db, redis_client), RegistroMetricas())
+        reporte['consultas'] = medir_consultas(servicio, args.consultas, args.repeticiones)
+        if not args.sin_bytes_lookup:
+            reporte['bytes_lookup'] = medir_bytes_lookup(servicio, args.consultas)
+        if args.emisiones:
+            reporte['emision'] = medir_emision(servicio, args.emisiones)
+    finally:
+        if servicio is not None:
+            servicio.cerrar()
+        mongo_client.close()
+        redis_client.close()
+
+    directorio = os.path.dirname(args.salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    log.info(f"Resultados escritos en {args.salida}")
+
+    for query_num, datos in reporte['consultas'].items():
+        warm = datos['warm_ms']
+        resumen = f"p50={warm['p50']:.1f}ms p95={warm['p95']:.1f}ms p99={warm['p99']:.1f}ms" if warm else "-"
+        log.info(f"Q{query_num}: cold={datos['cold_ms']:.1f}ms {resumen} ({datos['filas']} filas)")
+    for query_num, datos in (reporte.get('bytes_lookup') or {}).items():
+        reduccion = f"{datos['reduccion']:.0%}" if datos['reduccion'] is not None else "-"
+        log.info(f"Q{query_num} $lookup: {datos['bytes_sin_proyeccion']} -> {datos['bytes_con_proyeccion']} bytes "
+                 f"(-{reduccion})")
+    for modo, resumen in (reporte.get('emision') or {}).items():
+        if resumen:
+            log.info(f"Emisión {modo}: p50={resumen['p50']:.2f}ms p95={resumen['p95']:.2f}ms p99={resumen['p99']:.2f}ms")
+    return reporte
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# src/bench/generar_datos.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import bisect
+import csv
+import itertools
+import random
+import time
+from datetime import date, timedelta
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+COLUMNAS = {
+    'clientes': ['id_cliente', 'nombre', 'apellido', 'dni', 'email', 'telefono', 'direccion', 'ciudad', 'provincia', 'activo'],
+    'vehiculos': ['id_vehiculo', 'id_cliente', 'marca', 'modelo', 'anio', 'patente', 'nro_chasis', 'asegurado'],
+    'agentes': ['id_agente', 'nombre', 'apellido', 'matricula', 'telefono', 'email', 'zona', 'activo'],
+    'polizas': ['nro_poliza', 'id_cliente', 'tipo', 'fecha_inicio', 'fecha_fin', 'prima_mensual', 'cobertura_total', 'id_agente', 'estado'],
+    'siniestros': ['id_siniestro', 'nro_poliza', 'fecha', 'tipo', 'monto_estimado', 'descripcion', 'estado'],
+}
+
+NOMBRES = ['Laura', 'Martín', 'Sofía', 'Juan', 'Lucía', 'Carlos', 'Valentina', 'Diego', 'Camila', 'Pablo',
+           'María', 'Jorge', 'Florencia', 'Nicolás', 'Agustina', 'Federico', 'Julieta', 'Matías']
+APELLIDOS = ['Gómez', 'Pérez', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'García', 'Sánchez',
+             'Romero', 'Díaz', 'Torres', 'Ruiz', 'Álvarez', 'Suárez', 'Herrero', 'Ramos']
+LOCALIDADES = [('Buenos Aires', 'Buenos Aires'), ('La Plata', 'Buenos Aires'), ('Rosario', 'Santa Fe'),
+               ('Córdoba', 'Córdoba'), ('Mendoza', 'Mendoza'), ('Salta', 'Salta'), ('Neuquén', 'Neuquén')]
+ZONAS = ['Norte', 'Sur', 'Centro', 'Oeste', 'Cuyo', 'Noreste', 'Patagonia']
+VEHICULOS = [('Toyota', 'Corolla'), ('Ford', 'Fiesta'), ('Volkswagen', 'Gol'), ('Chevrolet', 'Onix'),
+             ('Fiat', 'Cronos'), ('Renault', 'Sandero'), ('Peugeot', '208'), ('Honda', 'Civic')]
+
+# Distribuciones sesgadas, como en la cartera real.
+TIPOS_POLIZA = (['Auto', 'Vida', 'Hogar', 'Salud'], [70, 10, 10, 10])
+POLIZAS_POR_CLIENTE = ([0, 1, 2, 3, 4], [25, 50, 15, 7, 3])
+VEHICULOS_POR_CLIENTE = ([0, 1, 2, 3], [15, 60, 20, 5])
+SINIESTROS_POR_POLIZA = ([0, 1, 2, 3, 5], [60, 25, 9, 4, 2])
+TIPOS_SINIESTRO = {
+    'Auto': (['Accidente', 'Robo', 'Danio'], [60, 25, 15]),
+    'Hogar': (['Incendio', 'Robo', 'Danio'], [30, 40, 30]),
+    'Vida': (['Accidente'], [1]),
+    'Salud': (['Accidente'], [1]),
+}
+ESTADOS_SINIESTRO = (['Abierto', 'Cerrado', 'En evaluacion'], [40, 40, 20])
+COBERTURAS = [500000, 800000, 1000000, 1200000, 2000000, 2500000, 5000000]
+
+# Exponente de la ley de Zipf para repartir pólizas entre agentes (pocos agentes concentran la cartera).
+ZIPF_AGENTES = 1.1
+
+
+def _acumulados(pesos):
+    return list(itertools.accumulate(pesos))
+
+
+class _Elector:
+    """random.choices con los pesos acumulados precalculados (búsqueda binaria por elección)."""
+
+    def __init__(self, rnd, valores, pesos):
+        self.rnd = rnd
+        self.valores = valores
+        self.acumulados = _acumulados(pesos)
+        self.total = self.acumulados[-1]
+
+    def __call__(self):
+        return self.valores[bisect.bisect(self.acumulados, self.rnd.random() * self.total)]
+
+
+def _fecha(d):
+    # Mismo formato que los CSV originales: sin ceros a la izquierda.
+    return f"{d.day}/{d.month}/{d.year}"
+
+
+def generar(directorio, clientes, agentes=None, semilla=42, hoy=None):
+    """Escribe los cinco CSV en `directorio`, fila a fila (memoria constante).
+
+    Los datos son referencialmente consistentes: cada vehículo y póliza pertenece a
+    un cliente existente, cada póliza a un agente existente y cada siniestro a una
+    póliza existente. Devuelve la cantidad de filas escritas por archivo.
+    """
+    rnd = random.Random(semilla)
+    hoy = hoy or date.today()
+    agentes = agentes or max(10, clientes // 2000)
+    os.makedirs(directorio, exist_ok=True)
+
+    elegir_tipo_poliza = _Elector(rnd, *TIPOS_POLIZA)
+    elegir_cant_polizas = _Elector(rnd, *POLIZAS_POR_CLIENTE)
+    elegir_cant_vehiculos = _Elector(rnd, *VEHICULOS_POR_CLIENTE)
+    elegir_cant_siniestros = _Elector(rnd, *SINIESTROS_POR_POLIZA)
+    elegir_estado_siniestro = _Elector(rnd, *ESTADOS_SINIESTRO)
+    elegir_tipo_siniestro = {tipo: _Elector(rnd, *dist) for tipo, dist in TIPOS_SINIESTRO.items()}
+    ids_agente = list(range(101, 101 + agentes))
+    elegir_agente = _Elector(rnd, ids_agente, [1 / (rango ** ZIPF_AGENTES) for rango in range(1, agentes + 1)])
+
+    archivos = {nombre: open(os.path.join(directorio, f"{nombre}.csv"), 'w', newline='', encoding='utf-8')
+                for nombre in COLUMNAS}
+    try:
+        escritores = {nombre: csv.writer(archivo) for nombre, archivo in archivos.items()}
+        for nombre, escritor in escritores.items():
+            escritor.writerow(COLUMNAS[nombre])
+        filas = dict.fromkeys(COLUMNAS, 0)
+
+        for id_agente in ids_agente:
+            nombre, apellido = rnd.choice(NOMBRES), rnd.choice(APELLIDOS)
+            escritores['agentes'].writerow([
+                id_agente, nombre, apellido, f"MAT{id_agente:06d}", f"11{rnd.randrange(10**8):08d}",
+                f"agente{id_agente}@seguros.com", rnd.choice(ZONAS), rnd.random() > 0.1
+            ])
+            filas['agentes'] += 1
+
+        id_vehiculo = 5000
+        nro_poliza = 1000
+        id_siniestro = 9000
+        for id_cliente in range(1, clientes + 1):
+            nombre, apellido = rnd.choice(NOMBRES), rnd.choice(APELLIDOS)
+            ciudad, provincia = rnd.choice(LOCALIDADES)
+            escritores['clientes'].writerow([
+                id_cliente, nombre, apellido, 20000000 + id_cliente, f"cliente{id_cliente}@mail.com",
+                f"11{rnd.randrange(10**8):08d}", f"Calle {rnd.randrange(1, 300)} {rnd.randrange(1, 5000)}",
+                ciudad, provincia, rnd.random() > 0.25
+            ])
+            filas['clientes'] += 1
+
+            for _ in range(elegir_cant_vehiculos()):
+                id_vehiculo += 1
+                marca, modelo = rnd.choice(VEHICULOS)
+                escritores['vehiculos'].writerow([
+                    id_vehiculo, id_cliente, marca, modelo, rnd.randrange(2005, hoy.year + 1),
+                    f"AB{id_vehiculo:07d}", f"CHS{id_vehiculo}", rnd.random() > 0.2
+                ])
+                filas['vehiculos'] += 1
+
+            for _ in range(elegir_cant_polizas()):
+                nro_poliza += 1
+                tipo = elegir_tipo_poliza()
+                inicio = hoy - timedelta(days=rnd.randrange(0, 3 * 365))
+                fin = inicio + timedelta(days=365)
+                if fin < hoy:
+                    estado = 'Vencida'
+                else:
+                    estado = 'Suspendida' if rnd.random() < 0.15 else 'Activa'
+                cobertura = rnd.choice(COBERTURAS)
+                codigo = f"POL{nro_poliza}"
+                escritores['polizas'].writerow([
+                    codigo, id_cliente, tipo, _fecha(inicio), _fecha(fin),
+                    cobertura // 80, cobertura, elegir_agente(), estado
+                ])
+                filas['polizas'] += 1
+
+                for _ in range(elegir_cant_siniestros()):
+                    id_siniestro += 1
+                    fecha = inicio + timedelta(days=rnd.randrange(0, max(1, min(365, (hoy - inicio).days + 1))))
+                    tipo_siniestro = elegir_tipo_siniestro[tipo]()
+                    escritores['siniestros'].writerow([
+                        id_siniestro, codigo, _fecha(fecha), tipo_siniestro,
+                        rnd.randrange(50, 2000) * 1000, f"{tipo_siniestro} (sintético)", elegir_estado_siniestro()
+                    ])
+                    filas['siniestros'] += 1
+        return filas
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un dataset sintético con el formato de csv/.")
+    parser.add_argument('--clientes', type=int, default=10000, help="Cantidad de clientes (default: 10000).")
+    parser.add_argument('--agentes', type=int, default=None,
+                        help="Cantidad de agentes (default: clientes / 2000, mínimo 10).")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador (default: 42).")
+    parser.add_argument('--salida', default=None,
+                        help="Carpeta de salida (default: bench_data/<clientes>).")
+    args = parser.parse_args(argv)
+    if args.clientes < 1:
+        parser.error("--clientes debe ser >= 1.")
+    if args.salida is None:
+        args.salida = os.path.join('bench_data', str(args.clientes))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log.info(f"Generando dataset sintético de {args.clientes} clientes en '{args.salida}'...")
+    inicio = time.perf_counter()
+    filas = generar(args.salida, args.clientes, agentes=args.agentes, semilla=args.semilla)
+    log.info(f"-> Dataset generado en {time.perf_counter() - inicio:.1f}s: {filas}")
+    return filas
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# src/bench/tiempos_arranque.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import statistics
+import subprocess
+import time
+
+from src.logger import getLogger
+from src.service.conexion import Conexiones
+
+log = getLogger(__name__)
+
+REPETICIONES_DEFAULT = 5
+LIMITE_MS_DEFAULT = 500
+
+# Caminos que sólo validan argumentos o muestran ayuda: no deberían importar pymongo/redis/pandas.
+CAMINOS_RAPIDOS = {
+    'main sin argumentos': ['main.py'],
+    'main consulta inválida': ['main.py', '99'],
+    'main ayuda q13': ['main.py', '13'],
+    'main uso q14': ['main.py', '14'],
+    'load_data --help': [os.path.join('src', 'loader', 'load_data.py'), '--help'],
+    'load_data argumento inválido': [os.path.join('src', 'loader', 'load_data.py'), '--batch-size', '0'],
+    'servidor --help': [os.path.join('src', 'api', 'servidor.py'), '--help'],
+    'dashboard --help': [os.path.join('src', 'api', 'dashboard.py'), '--help'],
+    'reconstruir_vistas --help': [os.path.join('src', 'loader', 'reconstruir_vistas.py'), '--help'],
+    'trabajador_outbox --help': [os.path.join('src', 'api', 'trabajador_outbox.py'), '--help'],
+}
+
+# Imports que los caminos rápidos evitan, medidos por separado como referencia.
+IMPORTS = ('pymongo', 'redis', 'pandas', 'src.service.services', 'src.loader.streaming')
+
+
+def medir_proceso(argumentos, repeticiones):
+    """Mediana y máximo en ms de correr `python <argumentos>` desde la raíz del proyecto."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *argumentos], cwd=project_root,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tiempos), 'max_ms': max(tiempos)}
+
+
+def medir_imports(repeticiones):
+    """Costo de cada import en ms: `python -c "import X"` menos un intérprete vacío."""
+    base = medir_proceso(['-c', 'pass'], repeticiones)['mediana_ms']
+    return {
+        modulo: max(medir_proceso(['-c', f'import {modulo}'], repeticiones)['mediana_ms'] - base, 0.0)
+        for modulo in IMPORTS
+    }
+
+
+def medir_conexion():
+    """Tiempo de crear los clientes y conectarse con la configuración del entorno."""
+    conexiones = Conexiones()
+    try:
+        inicio = time.perf_counter()
+        _ = conexiones.mongo_client, conexiones.redis_client
+        creacion_ms = (time.perf_counter() - inicio) * 1000
+        return {'creacion_clientes_ms': creacion_ms, **conexiones.verificar()}
+    except Exception as e:
+        return {'error': str(e)}
+    finally:
+        conexiones.cerrar()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Mide el arranque de las CLI (ayuda y validación de argumentos), el costo de los "
+                    "imports pesados y el tiempo de conexión a MongoDB y Redis."
+    )
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES_DEFAULT,
+                        help=f"Veces que se corre cada comando (default: {REPETICIONES_DEFAULT}).")
+    parser.add_argument('--limite-ms', type=float, default=LIMITE_MS_DEFAULT,
+                        help="Mediana máxima aceptada para los caminos rápidos; si alguno la supera el script "
+                             f"termina con código 1 (default: {LIMITE_MS_DEFAULT}).")
+    parser.add_argument('--sin-conexion', action='store_true',
+                        help="No mide la conexión (para correrlo sin las bases levantadas).")
+    args = parser.parse_args(argv)
+    if args.repeticiones < 1 or args.limite_ms <= 0:
+        parser.error("--repeticiones y --limite-ms deben ser positivos.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    log.info(f"Midiendo {len(CAMINOS_RAPIDOS)} caminos rápidos ({args.repeticiones} repeticiones)...")
+    reporte = {
+        'caminos_rapidos': {
+            nombre: medir_proceso(argumentos, args.repeticiones) for nombre, argumentos in CAMINOS_RAPIDOS.items()
+        },
+        'imports_ms': medir_imports(args.repeticiones),
+    }
+    if not args.sin_conexion:
+        reporte['conexion'] = medir_conexion()
+
+    lentos = [
+        nombre for nombre, tiempos in reporte['caminos_rapidos'].items() if tiempos['mediana_ms'] > args.limite_ms
+    ]
+    reporte['limite_ms'] = args.limite_ms
+    reporte['lentos'] = lentos
+    print(json.dumps(reporte, indent=2, ensure_ascii=False))
+    if lentos:
+        log.error(f"Caminos rápidos por encima de {args.limite_ms:.0f} ms: {', '.join(lentos)}.")
+        sys.exit(1)
+    return reporte
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# src/loader/incremental.py
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+from pymongo import UpdateOne
+
+from src.logger import getLogger
+from src.loader.lotes import BATCH_SIZE_DEFAULT, MedidorCarga, en_lotes
+from src.loader.vistas_redis import (
+    aplicar_diferencia_vistas, calcular_vistas, calcular_vistas_clientes, diferencia_vistas, escribir_vistas
+)
+from src.service.cache import invalidar_colecciones
+from src.service.derivados import CAMPO_ID_CLIENTE_SINIESTRO, embeber_clientes_en_siniestros
+from src.service.indices import asegurar_indices
+from src.service.normalizacion import normalizar_df
+from src.service.vistas import (
+    KEY_CLIENTES_CON_POLIZA_ACTIVA, KEY_SINIESTROS_POR_AGENTE, clave_agente, clientes_con_poliza_activa,
+    siniestros_de_agentes
+)
+
+log = getLogger(__name__)
+
+# Huella (hash) de la última versión cargada de cada documento, con _id '<coleccion>:<clave>'.
+COLECCION_HUELLAS = 'huellas_carga'
+
+# Lotes con cambios de la carga en curso: versión anterior y nueva de sus documentos.
+# Se escriben antes de tocar la colección y se borran al terminar la carga (ver ejecutar).
+COLECCION_LOTES_PENDIENTES = 'carga_lotes_pendientes'
+
+# Set con los ids de los lotes cuyo delta ya se aplicó en Redis.
+KEY_LOTES_APLICADOS = 'carga:lotes_aplicados'
+
+# Clave de negocio de cada colección: identifica la fila del CSV entre cargas.
+CLAVES_NEGOCIO = {
+    'clientes': 'id_cliente',
+    'agentes': 'id_agente',
+    'polizas': 'nro_poliza',
+    'siniestros': 'id_siniestro',
+}
+
+# Campos de las pólizas que alimentan las vistas de Redis.
+CAMPOS_VISTAS_POLIZA = ['nro_poliza', 'id_agente', 'id_cliente', 'tipo', 'cobertura_total', 'estado', 'fecha_inicio']
+
+
+def huella(documento):
+    """Hash estable del contenido de un documento (independiente del orden de los campos)."""
+    texto = json.dumps(documento, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def _id_huella(coleccion, clave):
+    return f"{coleccion}:{clave}"
+
+
+class CargaIncremental:
+    """Carga sólo lo nuevo o modificado de los CSV, sin borrar las bases.
+
+    Cada documento se compara por su clave de negocio contra la huella guardada en
+    la carga anterior; los nuevos o distintos se escriben con bulk_write (upsert) y
+    a Redis sólo se le aplican las diferencias que producen. Las consultas siguen
+    funcionando mientras corre.
+
+    Las filas que desaparecieron del CSV no se borran de Mongo.
+
+    Si la carga se corta, volver a correrla la completa: cada lote con cambios se
+    registra en COLECCION_LOTES_PENDIENTES (con la versión anterior de sus documentos)
+    antes de escribirlo, y al arrancar se reaplican los lotes que quedaron de la
+    corrida anterior. Su delta de Redis se aplica junto con la marca del lote en
+    KEY_LOTES_APLICADOS, así que no se suma dos veces.
+    """
+
+    def __init__(self, db, redis_client, csv_base_path, batch_size=BATCH_SIZE_DEFAULT):
+        self.db = db
+        self.r = redis_client
+        self.csv_base_path = csv_base_path
+        self.batch_size = batch_size
+        # Agentes cuyo conteo de siniestros puede haber cambiado.
+        self._agentes_afectados = set()
+        # Pólizas con siniestros nuevos o modificados (su agente se resuelve al final).
+        self._polizas_con_siniestros = set()
+        # Pólizas y clientes modificados: cambian el cliente embebido en sus siniestros.
+        self._polizas_modificadas = set()
+        self._clientes_modificados = set()
+
+    def _leer(self, nombre):
+        return pd.read_csv(os.path.join(self.csv_base_path, f"{nombre}.csv"))
+
+    def ejecutar(self):
+        """Devuelve {coleccion: {'nuevos', 'modificados', 'sin_cambios'}}."""
+        asegurar_indices(self.db)
+        self._reaplicar_lotes_pendientes()
+
+        df_clientes = self._leer('clientes')
+        df_vehiculos = self._leer('vehiculos')
+        df_agentes = self._leer('agentes')
+        df_polizas = self._leer('polizas')
+        df_siniestros = self._leer('siniestros')
+        log.info("Archivos CSV leídos correctamente.")
+        normalizar_df(df_polizas, 'polizas')
+        normalizar_df(df_siniestros, 'siniestros')
+
+        # Import diferido: load_data importa este módulo.
+        from src.loader.load_data import construir_clientes
+
+        resumen = {
+            'clientes': self.sincronizar('clientes', construir_clientes(df_clientes, df_vehiculos), ['id_cliente']),
+            'agentes': self.sincronizar('agentes', df_agentes.to_dict('records')),
+            'polizas': self.sincronizar('polizas', df_polizas.to_dict('records'), CAMPOS_VISTAS_POLIZA),
+            'siniestros': self.sincronizar('siniestros', df_siniestros.to_dict('records'), ['nro_poliza']),
+        }
+        self._actualizar_siniestros_por_agente()
+        self._actualizar_clientes_en_siniestros()
+        if any(conteo['nuevos'] or conteo['modificados'] for conteo in resumen.values()):
+            # Las actualizaciones de arriba cambian siniestros aunque su CSV no haya cambiado.
+            invalidar_colecciones(self.r, 'siniestros')
+        self._descartar_lotes_pendientes()
+        return resumen
+
+    def _al_cambiar(self, coleccion):
+        return {
+            'clientes': self._vistas_clientes,
+            'polizas': self._vistas_polizas,
+            'siniestros': self._vistas_siniestros,
+        }.get(coleccion)
+
+    def _reaplicar_lotes_pendientes(self):
+        """Termina de aplicar los lotes que dejó una carga anterior que se cortó."""
+        for lote in self.db[COLECCION_LOTES_PENDIENTES].find().sort('_id', 1):
+            coleccion = lote['coleccion']
+            log.warning(f"Reaplicando un lote pendiente de {coleccion} ({len(lote['nuevos'])} documentos) "
+                        f"de una carga anterior que no terminó.")
+            self._aplicar_lote(coleccion, lote['nuevos'], lote['viejos'], lote['huellas'], str(lote['_id']))
+
+    def _descartar_lotes_pendientes(self):
+        # Recién acá: hasta las actualizaciones finales, un corte obliga a reaplicarlos.
+        ids = [str(lote['_id']) for lote in self.db[COLECCION_LOTES_PENDIENTES].find({}, {'_id': 1})]
+        if ids:
+            self.db[COLECCION_LOTES_PENDIENTES].delete_many({})
+            for lote in en_lotes(ids, self.batch_size):
+                self.r.srem(KEY_LOTES_APLICADOS, *lote)
+
+    def _aplicar_lote(self, coleccion, docs, viejos, huellas, id_lote):
+        """Escribe un lote en Mongo, aplica sus diferencias en Redis y guarda sus huellas.
+
+        Todos los pasos se pueden repetir: el upsert deja el mismo documento y el delta
+        de Redis se saltea si el lote ya está en KEY_LOTES_APLICADOS.
+        """
+        clave = CLAVES_NEGOCIO[coleccion]
+        self.db[coleccion].bulk_write(
+            [UpdateOne({clave: doc[clave]}, {'$set': doc}, upsert=True) for doc in docs],
+            ordered=False
+        )
+        al_cambiar = self._al_cambiar(coleccion)
+        if al_cambiar is not None:
+            al_cambiar(viejos, docs, id_lote)
+        # Por lote, para que el cache de consultas no sirva resultados viejos mientras dura la carga.
+        invalidar_colecciones(self.r, coleccion)
+        self.db[COLECCION_HUELLAS].bulk_write(
+            [UpdateOne({'_id': id_huella}, {'$set': {'huella': valor}}, upsert=True) for id_huella, valor in huellas],
+            ordered=False
+        )
+
+    def sincronizar(self, coleccion, documentos, campos=None):
+        """Escribe los documentos nuevos o modificados de `coleccion`, de a `batch_size`.
+
+        Por cada lote con cambios se guarda primero, en COLECCION_LOTES_PENDIENTES, la
+        versión anterior (de Mongo, sólo con `campos`) y la nueva de esos documentos;
+        después se escriben en Mongo, se aplican sus diferencias en Redis (ver
+        _al_cambiar) y se guardan sus huellas.
+        """
+        clave = CLAVES_NEGOCIO[coleccion]
+        conteo = {'nuevos': 0, 'modificados': 0, 'sin_cambios': 0}
+        log.info(f"Sincronizando {coleccion}...")
+
+        with MedidorCarga(f"{coleccion} nuevos/modificados") as medidor:
+            for lote in en_lotes(documentos, self.batch_size):
+                ids = [_id_huella(coleccion, doc[clave]) for doc in lote]
+                huellas = [huella(doc) for doc in lote]
+                guardadas = {
+                    h['_id']: h['huella']
+                    for h in self.db[COLECCION_HUELLAS].find({'_id': {'$in': ids}})
+                }
+                cambiados = [
+                    (id_huella, valor, doc)
+                    for id_huella, valor, doc in zip(ids, huellas, lote) if guardadas.get(id_huella) != valor
+                ]
+                nuevos = sum(1 for id_huella, _, _ in cambiados if id_huella not in guardadas)
+                conteo['nuevos'] += nuevos
+                conteo['modificados'] += len(cambiados) - nuevos
+                conteo['sin_cambios'] += len(lote) - len(cambiados)
+                if not cambiados:
+                    continue
+
+                docs = [doc for _, _, doc in cambiados]
+                viejos = []
+                if campos is not None:
+                    viejos = list(self.db[coleccion].find(
+                        {clave: {'$in': [doc[clave] for doc in docs]}}, {'_id': 0, **dict.fromkeys(campos, 1)}
+                    ))
+                huellas_lote = [[id_huella, valor] for id_huella, valor, _ in cambiados]
+                id_lote = self.db[COLECCION_LOTES_PENDIENTES].insert_one(
+                    {'coleccion': coleccion, 'viejos': viejos, 'nuevos': docs, 'huellas': huellas_lote}
+                ).inserted_id
+                self._aplicar_lote(coleccion, docs, viejos, huellas_lote, str(id_lote))
+                medidor.cantidad += len(docs)
+
+        log.info(f"-> {coleccion}: {conteo['nuevos']} nuevos, {conteo['modificados']} modificados, "
+                 f"{conteo['sin_cambios']} sin cambios.")
+        return conteo
+
+    def _vistas_clientes(self, viejos, nuevos, id_lote):
+        escribir_vistas(self.r, calcular_vistas_clientes(nuevos), self.batch_size)
+        self._clientes_modificados.update(cliente['id_cliente'] for cliente in nuevos)
+
+    def _vistas_polizas(self, viejas, nuevas, id_lote):
+        vistas_viejas = calcular_vistas(pd.DataFrame(viejas, columns=CAMPOS_VISTAS_POLIZA))
+        vistas_nuevas = calcular_vistas(pd.DataFrame(nuevas, columns=CAMPOS_VISTAS_POLIZA))
+        delta = diferencia_vistas(vistas_nuevas, vistas_viejas)
+        if self.r.sismember(KEY_LOTES_APLICADOS, id_lote):
+            log.info(f"-> Las diferencias de {len(nuevas)} pólizas ya estaban aplicadas en Redis.")
+        else:
+            comandos = aplicar_diferencia_vistas(self.r, delta, marca=(KEY_LOTES_APLICADOS, id_lote))
+            log.info(f"-> Diferencias de {len(nuevas)} pólizas aplicadas en Redis ({comandos} comandos).")
+
+        # Mongo ya tiene las pólizas nuevas: salen del set los clientes que no conservan ninguna activa.
+        if delta['clientes_a_verificar']:
+            sin_activas = delta['clientes_a_verificar'] - clientes_con_poliza_activa(self.db, delta['clientes_a_verificar'])
+            if sin_activas:
+                self.r.srem(KEY_CLIENTES_CON_POLIZA_ACTIVA, *sin_activas)
+
+        # Si una póliza cambia de agente, sus siniestros pasan al nuevo agente.
+        for poliza in viejas + nuevas:
+            self._agentes_afectados.add(poliza.get('id_agente'))
+            self._polizas_modificadas.add(poliza.get('nro_poliza'))
+
+    def _vistas_siniestros(self, viejos, nuevos, id_lote):
+        for siniestro in viejos + nuevos:
+            self._polizas_con_siniestros.add(siniestro.get('nro_poliza'))
+
+    def _actualizar_siniestros_por_agente(self):
+        """Recalcula 'agente:siniestros' sólo para los agentes afectados por la carga.
+
+        Se recalcula (en lugar de aplicar un delta) porque un cambio de agente en una
+        póliza mueve todos sus siniestros, no sólo los que cambiaron en el CSV.
+        """
+        if self._polizas_con_siniestros:
+            for poliza in self.db.polizas.find(
+                {'nro_poliza': {'$in': list(self._polizas_con_siniestros)}}, {'_id': 0, 'id_agente': 1}
+            ):
+                self._agentes_afectados.add(poliza.get('id_agente'))
+
+        ids_agente = [id_agente for id_agente in self._agentes_afectados if clave_agente(id_agente) is not None]
+        if not ids_agente:
+            return
+        conteo = siniestros_de_agentes(self.db, ids_agente)
+        pipe = self.r.pipeline(transaction=False)
+        con_siniestros = {clave: cantidad for clave, cantidad in conteo.items() if cantidad}
+        if con_siniestros:
+            pipe.hset(KEY_SINIESTROS_POR_AGENTE, mapping=con_siniestros)
+        sin_siniestros = [clave for clave, cantidad in conteo.items() if not cantidad]
+        if sin_siniestros:
+            pipe.hdel(KEY_SINIESTROS_POR_AGENTE, *sin_siniestros)
+        pipe.execute()
+        log.info(f"-> Siniestros por agente recalculados para {len(conteo)} agentes.")
+
+    def _actualizar_clientes_en_siniestros(self):
+        """Vuelve a copiar el cliente de su póliza en los siniestros afectados por la carga.
+
+        Son los siniestros nuevos o modificados, los de pólizas modificadas (pueden
+        cambiar de cliente) y los de clientes modificados (pueden cambiar de nombre).
+        """
+        polizas = self._polizas_con_siniestros | self._polizas_modificadas
+        if not polizas and not self._clientes_modificados:
+            return
+        embeber_clientes_en_siniestros(self.db, {'$or': [
+            {'nro_poliza': {'$in': list(polizas)}},
+            {CAMPO_ID_CLIENTE_SINIESTRO: {'$in': list(self._clientes_modificados)}},
+        ]})
+        log.info(f"-> Cliente embebido actualizado en los siniestros de {len(polizas)} pólizas "
+                 f"y {len(self._clientes_modificados)} clientes.")
@@ -9,122 +9,262 @@ project_root = os.path.dirname(src_dir)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
+import argparse
 from src.logger import getLogger
-import pandas as pd
-from pymongo import MongoClient
-import redis
-from datetime import datetime
+from src.loader.lotes import (
+    BATCH_SIZE_DEFAULT, CHUNK_ROWS_DEFAULT, MAX_CHUNKS_EN_COLA_DEFAULT, WRITERS_DEFAULT, MedidorCarga,
+    insertar_en_lotes
+)
+from src.service.conexion import DB_NAME, conectar
+from src.service.vistas import KEY_SINIESTROS_POR_AGENTE
+from src.service.derivados import CAMPO_VEHICULOS_ASEGURADOS, cliente_de_siniestro, contar_vehiculos_asegurados
+from src.service.normalizacion import normalizar_df
 import time
 
-log = getLogger(__name__)
+# pandas, pymongo y los módulos de carga que los usan (vistas_redis, incremental, streaming,
+# indices) se importan dentro de cada función: --help y los errores de argumentos no los cargan.
 
-MONGO_HOST = "mongo"
-REDIS_HOST = "redis"
-DB_NAME = "aseguradora_db"
+log = getLogger(__name__)
 
 CSV_BASE_PATH = "csv/"
 
-log.info("Iniciando script de carga de datos...")
 
-try:
-    mongo_client = MongoClient(MONGO_HOST, 27017, serverSelectionTimeoutMS=5000)
-    mongo_client.server_info()
-    db = mongo_client[DB_NAME]
-    log.info("Conexión a MongoDB exitosa.")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Carga los CSV en MongoDB y Redis (carga limpia, o incremental con --incremental).")
+    parser.add_argument(
+        '--csv-dir', default=CSV_BASE_PATH,
+        help=f"Carpeta con los CSV a cargar (default: {CSV_BASE_PATH})."
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=BATCH_SIZE_DEFAULT,
+        help=f"Documentos por llamada a insert_many (default: {BATCH_SIZE_DEFAULT})."
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="No borra las bases: escribe sólo las filas nuevas o modificadas desde la última carga "
+             "y aplica sus diferencias en Redis."
+    )
+    streaming = parser.add_argument_group(
+        'modo streaming',
+        "Lee los CSV por chunks y los escribe con un pool de hilos. La memoria queda acotada a "
+        "(max-chunks-en-cola + writers + 5) chunks de chunk-rows filas."
+    )
+    streaming.add_argument('--streaming', action='store_true',
+                           help="Activa la carga por chunks con memoria acotada.")
+    streaming.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS_DEFAULT,
+                           help=f"Filas por chunk leído de cada CSV (default: {CHUNK_ROWS_DEFAULT}).")
+    streaming.add_argument('--max-chunks-en-cola', type=int, default=MAX_CHUNKS_EN_COLA_DEFAULT,
+                           help=f"Capacidad de la cola entre lectores y escritores (default: {MAX_CHUNKS_EN_COLA_DEFAULT}).")
+    streaming.add_argument('--writers', type=int, default=WRITERS_DEFAULT,
+                           help=f"Hilos escritores contra Mongo/Redis (default: {WRITERS_DEFAULT}).")
+    args = parser.parse_args(argv)
+    if args.incremental and args.streaming:
+        parser.error("--incremental y --streaming no se pueden combinar.")
+    for opcion in ('batch_size', 'chunk_rows', 'max_chunks_en_cola', 'writers'):
+        if getattr(args, opcion) < 1:
+            parser.error(f"--{opcion.replace('_', '-')} debe ser >= 1.")
+    return args
+
+
+def limpiar_bases(db, redis_client):
+    log.info("Limpiando colecciones y claves existentes para una carga limpia...")
+    try:
+        for collection_name in db.list_collection_names():
+            db[collection_name].drop()
+        log.info("Colecciones de MongoDB limpiadas.")
+
+        redis_client.flushdb()
+        log.info("Claves de Redis limpiadas.")
+
+    except Exception as e:
+        log.error(f"Error durante la limpieza de bases de datos: {e}")
 
-    redis_client = redis.Redis(host=REDIS_HOST, port=6379, db=0, decode_responses=True)
-    redis_client.ping()
-    log.info("Conexión a Redis exitosa.")
 
-except Exception as e:
-    log.error(f"Error al conectar con las bases de datos: {e}")
-    exit()
+def construir_clientes(df_clientes, df_vehiculos):
+    """Genera los documentos de clientes con sus vehículos embebidos y el conteo de asegurados.
 
-log.info("Limpiando colecciones y claves existentes para una carga limpia...")
-try:
-    for collection_name in db.list_collection_names():
-        db[collection_name].drop()
-    log.info("Colecciones de MongoDB limpiadas.")
+    Los vehículos se agrupan por id_cliente en una sola pasada, en lugar de
+    filtrar el DataFrame completo de vehículos por cada cliente.
+    """
+    vehiculos_por_cliente = {}
+    for vehiculo in df_vehiculos.to_dict('records'):
+        id_cliente = vehiculo.pop('id_cliente')
+        vehiculos_por_cliente.setdefault(id_cliente, []).append(vehiculo)
 
-    redis_client.flushdb()
-    log.info("Claves de Redis limpiadas.")
+    for cliente_doc in df_clientes.to_dict('records'):
+        cliente_doc['vehiculos'] = vehiculos_por_cliente.get(cliente_doc['id_cliente'], [])
+        cliente_doc[CAMPO_VEHICULOS_ASEGURADOS] = contar_vehiculos_asegurados(cliente_doc['vehiculos'])
+        yield cliente_doc
 
-except Exception as e:
-    log.error(f"Error durante la limpieza de bases de datos: {e}")
 
-try:
-    df_clientes = pd.read_csv(CSV_BASE_PATH + 'clientes.csv')
-    df_vehiculos = pd.read_csv(CSV_BASE_PATH + 'vehiculos.csv')
-    df_agentes = pd.read_csv(CSV_BASE_PATH + 'agentes.csv')
-    df_polizas = pd.read_csv(CSV_BASE_PATH + 'polizas.csv')
-    df_siniestros = pd.read_csv(CSV_BASE_PATH + 'siniestros.csv')
-    log.info("Archivos CSV leídos correctamente.")
+def cargar_clientes(db, redis_client, df_clientes, df_vehiculos, batch_size):
+    from src.loader.vistas_redis import calcular_vistas_clientes, escribir_vistas
 
     log.info("Procesando y cargando clientes con sus vehículos...")
-    clientes_collection = db.clientes
-    for index, cliente in df_clientes.iterrows():
-        cliente_doc = cliente.to_dict()
-        
-        vehiculos_cliente = df_vehiculos[df_vehiculos['id_cliente'] == cliente['id_cliente']]
-        
-        cliente_doc['vehiculos'] = vehiculos_cliente.drop(columns=['id_cliente']).to_dict('records')
-        
-        clientes_collection.insert_one(cliente_doc)
-    log.info(f"-> {clientes_collection.count_documents({})} clientes cargados en MongoDB.")
-
-    log.info("Procesando y cargando agentes...")
-    agentes_collection = db.agentes
-    agentes_collection.insert_many(df_agentes.to_dict('records'))
-    log.info(f"-> {agentes_collection.count_documents({})} agentes cargados en MongoDB.")
-
-    log.info("Procesando y cargando siniestros...")
-    siniestros_collection = db.siniestros
-    siniestros_collection.insert_many(df_siniestros.to_dict('records'))
-    log.info(f"-> {siniestros_collection.count_documents({})} siniestros cargados en MongoDB.")
+    with MedidorCarga('clientes') as medidor:
+        medidor.cantidad = insertar_en_lotes(
+            db.clientes, construir_clientes(df_clientes, df_vehiculos), batch_size
+        )
+    escribir_vistas(redis_client, calcular_vistas_clientes(df_clientes.to_dict('records')), batch_size)
+    log.info("-> Nombres e índice de clientes actualizados en Redis.")
+
+
+def construir_siniestros(df_siniestros, df_polizas, df_clientes):
+    """Genera los documentos de siniestros con el cliente de su póliza (id y nombre) embebido.
+
+    Los siniestros cuya póliza o cliente no existen se cargan sin esos campos.
+    """
+    import pandas as pd
+
+    ids_cliente = pd.to_numeric(df_polizas['id_cliente'], errors='coerce')
+    cliente_por_poliza = {
+        nro_poliza: int(id_cliente)
+        for nro_poliza, id_cliente in zip(df_polizas['nro_poliza'], ids_cliente) if pd.notna(id_cliente)
+    }
+    clientes = {cliente['id_cliente']: cliente for cliente in df_clientes.to_dict('records')}
+
+    for siniestro_doc in df_siniestros.to_dict('records'):
+        cliente = clientes.get(cliente_por_poliza.get(siniestro_doc['nro_poliza']))
+        if cliente is not None:
+            siniestro_doc.update(cliente_de_siniestro(cliente))
+        yield siniestro_doc
+
+
+def cargar_siniestros(db, df_siniestros, df_polizas, df_clientes, batch_size):
+    log.info("Procesando y cargando siniestros con el cliente de su póliza...")
+    with MedidorCarga('siniestros') as medidor:
+        medidor.cantidad = insertar_en_lotes(
+            db.siniestros, construir_siniestros(df_siniestros, df_polizas, df_clientes), batch_size
+        )
+
+
+def cargar_coleccion(db, nombre, df, batch_size):
+    log.info(f"Procesando y cargando {nombre}...")
+    with MedidorCarga(nombre) as medidor:
+        medidor.cantidad = insertar_en_lotes(db[nombre], df.to_dict('records'), batch_size)
+
+
+def cargar_polizas(db, redis_client, df_polizas, batch_size):
+    from src.loader.vistas_redis import calcular_vistas, escribir_vistas
 
     log.info("Procesando y cargando pólizas (lógica políglota)...")
-    polizas_collection = db.polizas
-    for index, poliza in df_polizas.iterrows():
-        poliza_doc = poliza.to_dict()
-        
-        polizas_collection.insert_one(poliza_doc)
-        
+    cargar_coleccion(db, 'polizas', df_polizas, batch_size)
+
+    inicio = time.perf_counter()
+    vistas = calcular_vistas(df_polizas)
+    comandos = escribir_vistas(redis_client, vistas, batch_size)
+    log.info(
+        f"-> Contadores y rankings de Redis actualizados: {comandos} comandos en un pipeline "
+        f"({time.perf_counter() - inicio:.2f}s)."
+    )
+
+
+def cargar_siniestros_por_agente(redis_client, df_siniestros, df_polizas, batch_size):
+    from src.loader.vistas_redis import calcular_siniestros_por_agente, escribir_vistas
+
+    vistas = calcular_siniestros_por_agente(df_siniestros, df_polizas)
+    escribir_vistas(redis_client, vistas, batch_size)
+    log.info(f"-> Siniestros por agente actualizados en Redis ({len(vistas[KEY_SINIESTROS_POR_AGENTE])} agentes).")
+
+
+def crear_indices(db):
+    from src.service.indices import asegurar_indices
+
+    log.info("Creando índices de MongoDB...")
+    reporte = asegurar_indices(db)
+    if reporte['errores']:
+        log.warning(f"-> {len(reporte['errores'])} índices no se pudieron crear (ver arriba).")
+    log.info(f"-> {len(reporte['creados'])} índices creados.")
+
+
+def main(argv=None):
+    """Ejecuta la carga completa. Devuelve True si terminó sin errores."""
+    args = parse_args(argv)
+
+    import pandas as pd
+    from src.loader.incremental import CargaIncremental
+    from src.loader.streaming import CargaStreaming
+
+    log.info("Iniciando script de carga de datos...")
+
+    try:
+        mongo_client, redis_client = conectar()
+        db = mongo_client[DB_NAME]
+    except Exception as e:
+        log.error(f"Error al conectar con las bases de datos: {e}")
+        sys.exit(1)
+
+    if args.incremental:
+        exito = False
+        try:
+            resumen = CargaIncremental(db, redis_client, args.csv_dir, batch_size=args.batch_size).ejecutar()
+            log.info(f"¡Carga incremental completada con éxito! {resumen}")
+            exito = True
+        except FileNotFoundError as e:
+            log.error(f"No se encontró el archivo {e.filename}.")
+        except Exception as e:
+            log.error(f"Ocurrió un error inesperado durante la carga incremental: {e}")
+        finally:
+            mongo_client.close()
+            log.info("Conexión a MongoDB cerrada.")
+        return exito
+
+    limpiar_bases(db, redis_client)
+
+    if args.streaming:
         try:
-            id_agente_key = str(int(poliza['id_agente']))
-            redis_client.hincrby('agente:stats', id_agente_key, 1)
-            
-            id_cliente_key = str(int(poliza['id_cliente']))
-            redis_client.zincrby('ranking:clientes:cobertura', 
-                                  poliza['cobertura_total'], 
-                                  id_cliente_key)
-
-        except ValueError:
-            log.warning(f"ID de agente/cliente no numérico en póliza {poliza['nro_poliza']}. Saltando.")
-
-        if poliza['estado'].lower() == 'activa': 
-            try:
-                # (Tenemos que parsear la fecha solo para Redis)
-                fecha_inicio_dt = datetime.strptime(poliza['fecha_inicio'], '%d/%m/%Y') 
-                timestamp = int(time.mktime(fecha_inicio_dt.timetuple()))
-                
-                redis_client.zadd('idx:polizas:activas', {str(poliza['nro_poliza']): timestamp})
-            
-            except ValueError as e:
-                log.warning(f"Fecha en formato incorrecto para póliza {poliza['nro_poliza']}: {e}")
-            except Exception as e:
-                log.error(f"Error procesando timestamp para póliza {poliza['nro_poliza']}: {e}")
-
-    log.info(f"-> {polizas_collection.count_documents({})} pólizas cargadas en MongoDB.")
-    log.info("-> Contadores y rankings de Redis actualizados (corregido).")
-    log.info("¡Carga de datos completada con éxito!")
-
-except FileNotFoundError as e:
-    log.error(f"No se encontró el archivo {e.filename}. Asegúrate de que la carpeta 'csv' está en la raíz.")
-except KeyError as e:
-    log.error(f"Error de columna no encontrada: {e}. Revisa los nombres de las columnas en tus CSVs.")
-except Exception as e:
-    log.error(f"Ocurrió un error inesperado durante la carga de datos: {e}")
-
-finally:
-    mongo_client.close()
-    log.info("Conexión a MongoDB cerrada.")
\ No newline at end of file
+            carga = CargaStreaming(
+                db, redis_client, args.csv_dir,
+                chunk_rows=args.chunk_rows,
+                max_chunks_en_cola=args.max_chunks_en_cola,
+                writers=args.writers,
+                batch_size=args.batch_size,
+            )
+            exito = carga.ejecutar()
+            crear_indices(db)
+            if exito:
+                log.info("¡Carga de datos completada con éxito!")
+            else:
+                log.error("La carga streaming terminó con errores (ver arriba).")
+        finally:
+            mongo_client.close()
+            log.info("Conexión a MongoDB cerrada.")
+        return exito
+
+    exito = False
+    try:
+        df_clientes = pd.read_csv(os.path.join(args.csv_dir, 'clientes.csv'))
+        df_vehiculos = pd.read_csv(os.path.join(args.csv_dir, 'vehiculos.csv'))
+        df_agentes = pd.read_csv(os.path.join(args.csv_dir, 'agentes.csv'))
+        df_polizas = pd.read_csv(os.path.join(args.csv_dir, 'polizas.csv'))
+        df_siniestros = pd.read_csv(os.path.join(args.csv_dir, 'siniestros.csv'))
+        log.info("Archivos CSV leídos correctamente.")
+
+        normalizar_df(df_polizas, 'polizas')
+        normalizar_df(df_siniestros, 'siniestros')
+
+        cargar_clientes(db, redis_client, df_clientes, df_vehiculos, args.batch_size)
+        cargar_coleccion(db, 'agentes', df_agentes, args.batch_size)
+        cargar_siniestros(db, df_siniestros, df_polizas, df_clientes, args.batch_size)
+        cargar_polizas(db, redis_client, df_polizas, args.batch_size)
+        cargar_siniestros_por_agente(redis_client, df_siniestros, df_polizas, args.batch_size)
+        crear_indices(db)
+
+        log.info("¡Carga de datos completada con éxito!")
+        exito = True
+
+    except FileNotFoundError as e:
+        log.error(f"No se encontró el archivo {e.filename}. Asegúrate de que la carpeta 'csv' está en la raíz.")
+    except KeyError as e:
+        log.error(f"Error de columna no encontrada: {e}. Revisa los nombres de las columnas en tus CSVs.")
+    except Exception as e:
+        log.error(f"Ocurrió un error inesperado durante la carga de datos: {e}")
+
+    finally:
+        mongo_client.close()
+        log.info("Conexión a MongoDB cerrada.")
+    return exito
+
+
+if __name__ == "__main__":
+    main()
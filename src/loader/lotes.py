@@ -0,0 +1,68 @@
+# src/loader/lotes.py
+
+import time
+from itertools import islice
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+BATCH_SIZE_DEFAULT = 1000
+
+# Defaults de la carga streaming (src/loader/streaming.py). Están acá, y no allá, para que
+# load_data pueda armar su ayuda sin importar pandas.
+CHUNK_ROWS_DEFAULT = 10000
+MAX_CHUNKS_EN_COLA_DEFAULT = 4
+WRITERS_DEFAULT = 4
+
+
+def en_lotes(iterable, tamanio):
+    """Parte cualquier iterable en listas de a lo sumo `tamanio` elementos."""
+    if tamanio < 1:
+        raise ValueError(f"El tamaño de lote debe ser >= 1 (recibido: {tamanio}).")
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamanio))
+        if not lote:
+            return
+        yield lote
+
+
+def insertar_en_lotes(collection, documentos, batch_size=BATCH_SIZE_DEFAULT):
+    """Inserta `documentos` con insert_many desordenado, de a `batch_size` por llamada.
+
+    Devuelve la cantidad de documentos insertados.
+    """
+    total = 0
+    for lote in en_lotes(documentos, batch_size):
+        result = collection.insert_many(lote, ordered=False)
+        total += len(result.inserted_ids)
+    return total
+
+
+class MedidorCarga:
+    """Context manager que mide la carga de una colección y reporta docs/s."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.cantidad = 0
+        self.segundos = 0.0
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.segundos = time.perf_counter() - self._inicio
+        if exc_type is None:
+            log.info(
+                f"-> {self.cantidad} {self.nombre} cargados en {self.segundos:.2f}s "
+                f"({self.docs_por_segundo:,.0f} docs/s)."
+            )
+        return False
+
+    @property
+    def docs_por_segundo(self):
+        if self.segundos <= 0:
+            return float(self.cantidad)
+        return self.cantidad / self.segundos
@@ -0,0 +1,173 @@
+# src/loader/migrar_datos.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+from src.logger import getLogger
+from src.loader.load_data import crear_indices
+from src.service.conexion import DB_NAME, conectar
+from src.service.derivados import (
+    CAMPO_NOMBRE_CLIENTE_SINIESTRO, CAMPO_VEHICULOS_ASEGURADOS, UPDATE_VEHICULOS_ASEGURADOS,
+    embeber_clientes_en_siniestros
+)
+from src.service.fechas import CAMPOS_FECHA, FORMATO_FECHA
+from src.service.normalizacion import (
+    CAMPOS_BOOLEANOS, CAMPOS_CATEGORICOS, normalizar_booleano, normalizar_categoria
+)
+
+log = getLogger(__name__)
+
+
+def migrar_normalizacion(db):
+    """Lleva estado/tipo a su valor canónico y los booleanos guardados como texto a bool.
+
+    Trabaja sobre los valores distintos de cada campo (unos pocos), con un
+    update_many por valor a corregir, en lugar de recorrer documento por documento.
+    """
+    modificados = 0
+    for coleccion, campos in CAMPOS_CATEGORICOS.items():
+        for campo in campos:
+            for valor in db[coleccion].distinct(campo):
+                canonico = normalizar_categoria(valor)
+                if canonico == valor:
+                    continue
+                result = db[coleccion].update_many({campo: valor}, {'$set': {campo: canonico}})
+                log.info(f"{coleccion}.{campo}: '{valor}' -> '{canonico}' ({result.modified_count} documentos)")
+                modificados += result.modified_count
+
+    for coleccion, campos in CAMPOS_BOOLEANOS.items():
+        for campo in campos:
+            for valor in db[coleccion].distinct(campo):
+                if not isinstance(valor, str):
+                    continue
+                try:
+                    booleano = normalizar_booleano(valor)
+                except ValueError as e:
+                    log.warning(f"{coleccion}.{campo}: {e}. Se deja sin cambios.")
+                    continue
+
+                if '.' in campo:
+                    # Campo dentro de un array embebido (ej: vehiculos.asegurado).
+                    array, subcampo = campo.split('.', 1)
+                    result = db[coleccion].update_many(
+                        {campo: valor},
+                        {'$set': {f'{array}.$[elem].{subcampo}': booleano}},
+                        array_filters=[{f'elem.{subcampo}': valor}]
+                    )
+                else:
+                    result = db[coleccion].update_many({campo: valor}, {'$set': {campo: booleano}})
+                log.info(f"{coleccion}.{campo}: '{valor}' -> {booleano} ({result.modified_count} documentos)")
+                modificados += result.modified_count
+
+    return modificados
+
+
+def migrar_fechas(db):
+    """Convierte a fecha BSON los campos fecha guardados como texto 'DD/MM/YYYY'.
+
+    La conversión se hace del lado del servidor con un update por pipeline; los
+    textos que no respetan el formato quedan como están.
+    """
+    modificados = 0
+    for coleccion, campos in CAMPOS_FECHA.items():
+        for campo in campos:
+            result = db[coleccion].update_many(
+                {campo: {'$type': 'string'}},
+                [{
+                    '$set': {
+                        campo: {
+                            '$dateFromString': {
+                                'dateString': f'${campo}',
+                                'format': FORMATO_FECHA,
+                                'onError': f'${campo}'
+                            }
+                        }
+                    }
+                }]
+            )
+            pendientes = db[coleccion].count_documents({campo: {'$type': 'string'}})
+            log.info(f"{coleccion}.{campo}: {result.modified_count} documentos convertidos a fecha.")
+            if pendientes:
+                log.warning(f"{coleccion}.{campo}: {pendientes} documentos con fecha inválida siguen como texto.")
+            modificados += result.modified_count
+    return modificados
+
+
+def migrar_vehiculos_asegurados(db):
+    """Recalcula clientes.vehiculos_asegurados a partir de los vehículos embebidos.
+
+    Corre después de 'normalizacion' para contar los 'asegurado' que estaban como texto.
+    """
+    result = db.clientes.update_many({}, UPDATE_VEHICULOS_ASEGURADOS)
+    log.info(f"clientes.{CAMPO_VEHICULOS_ASEGURADOS}: {result.modified_count} documentos actualizados.")
+    return result.modified_count
+
+
+def migrar_clientes_en_siniestros(db):
+    """Embebe en cada siniestro el id y el nombre del cliente de su póliza (los usa q2).
+
+    Corre en el servidor con una agregación que termina en $merge sobre 'siniestros'.
+    """
+    embeber_clientes_en_siniestros(db)
+    con_cliente = db.siniestros.count_documents({CAMPO_NOMBRE_CLIENTE_SINIESTRO: {'$type': 'string'}})
+    log.info(f"siniestros: {con_cliente} documentos con el cliente de su póliza embebido.")
+    return con_cliente
+
+
+PASOS = {
+    'normalizacion': migrar_normalizacion,
+    'fechas': migrar_fechas,
+    'vehiculos_asegurados': migrar_vehiculos_asegurados,
+    'clientes_en_siniestros': migrar_clientes_en_siniestros,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Migra los documentos existentes al formato que escriben el loader y los servicios."
+    )
+    parser.add_argument(
+        'pasos', nargs='*', metavar='paso',
+        help=f"Pasos a ejecutar: {', '.join(PASOS)} (default: todos)."
+    )
+    args = parser.parse_args(argv)
+    invalidos = [paso for paso in args.pasos if paso not in PASOS]
+    if invalidos:
+        parser.error(f"Pasos no reconocidos: {', '.join(invalidos)}.")
+    args.pasos = args.pasos or list(PASOS)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        mongo_client, redis_client = conectar()
+        db = mongo_client[DB_NAME]
+    except Exception as e:
+        log.error(f"Error al conectar con las bases de datos: {e}")
+        sys.exit(1)
+
+    try:
+        for paso in args.pasos:
+            log.info(f"Ejecutando migración '{paso}'...")
+            modificados = PASOS[paso](db)
+            log.info(f"-> Migración '{paso}' terminada: {modificados} documentos modificados.")
+        crear_indices(db)
+    except Exception as e:
+        log.error(f"Error durante la migración: {e}")
+        sys.exit(1)
+    finally:
+        mongo_client.close()
+        redis_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# src/loader/reconstruir_vistas.py
+
+import sys
+import os
+
+script_path = os.path.abspath(__file__)
+src_dir = os.path.dirname(os.path.dirname(script_path))
+project_root = os.path.dirname(src_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.logger import getLogger
+from src.service.conexion import DB_NAME, conectar
+from src.loader.lotes import BATCH_SIZE_DEFAULT, en_lotes
+from src.service.outbox import COLECCION_OUTBOX, estado_outbox
+from src.service.vistas import (
+    KEY_AGENTE_STATS, KEY_CLIENTES, KEY_CLIENTES_CON_POLIZA_ACTIVA, KEY_NOMBRES_CLIENTES, KEY_POLIZAS_ACTIVAS,
+    KEY_RANKING_COBERTURA, KEY_SINIESTROS_POR_AGENTE, KEYS_HASH, KEYS_SET, PIPELINE_AGENTE_STATS,
+    PIPELINE_CLIENTES_CON_POLIZA_ACTIVA, PIPELINE_POLIZAS_ACTIVAS, PIPELINE_RANKING_COBERTURA,
+    PIPELINE_RANKING_COBERTURA_POR_TIPO, clave_agente, clave_cliente, clave_ranking_tipo, nombre_cliente,
+    siniestros_por_agente_desde_mongo
+)
+
+log = getLogger(__name__)
+
+SUFIJO_TEMPORAL = ':reconstruccion'
+
+# Lotes de HSET/ZADD que se envían juntos en cada pipeline.
+LOTES_POR_PIPELINE = 10
+
+# Diferencias que se listan como ejemplo en el reporte de drift.
+EJEMPLOS_DRIFT = 5
+
+
+def _por_agente(db, pipeline):
+    # 101 y 101.0 son el mismo agente: se acumulan bajo la misma clave.
+    conteo = {}
+    for grupo in db.polizas.aggregate(pipeline, allowDiskUse=True):
+        clave = clave_agente(grupo['_id'])
+        if clave is not None:
+            conteo[clave] = conteo.get(clave, 0) + grupo['valor']
+    return conteo.items()
+
+
+def _por_documento(db, pipeline):
+    for grupo in db.polizas.aggregate(pipeline, allowDiskUse=True):
+        yield str(grupo['_id']), grupo['valor']
+
+
+def _nombres_clientes(db):
+    for cliente in db.clientes.find({}, {'_id': 0, 'id_cliente': 1, 'nombre': 1, 'apellido': 1}):
+        yield str(cliente['id_cliente']), nombre_cliente(cliente)
+
+
+# Los sets se manejan como pares (miembro, 1) para reutilizar el armado por lotes y el drift.
+def _ids_clientes(db):
+    for cliente in db.clientes.find({}, {'_id': 0, 'id_cliente': 1}):
+        yield str(cliente['id_cliente']), 1
+
+
+def _clientes_con_poliza_activa(db):
+    # 101 y 101.0 son el mismo cliente: el set los deduplica.
+    for grupo in db.polizas.aggregate(PIPELINE_CLIENTES_CON_POLIZA_ACTIVA, allowDiskUse=True):
+        yield clave_cliente(grupo['_id']), 1
+
+
+def _rankings_por_tipo(db):
+    """{clave del ranking de cada tipo: pares (id_cliente, cobertura)}, con una sola agregación."""
+    rankings = {}
+    for grupo in db.polizas.aggregate(PIPELINE_RANKING_COBERTURA_POR_TIPO, allowDiskUse=True):
+        clave = clave_ranking_tipo(grupo['_id']['tipo'])
+        rankings.setdefault(clave, []).append((str(grupo['_id']['id_cliente']), grupo['valor']))
+    return rankings
+
+
+# Vista -> función que devuelve sus pares (campo, valor) calculados en Mongo.
+VISTAS = {
+    KEY_AGENTE_STATS: lambda db: _por_agente(db, PIPELINE_AGENTE_STATS),
+    KEY_RANKING_COBERTURA: lambda db: _por_documento(db, PIPELINE_RANKING_COBERTURA),
+    KEY_POLIZAS_ACTIVAS: lambda db: _por_documento(db, PIPELINE_POLIZAS_ACTIVAS),
+    KEY_SINIESTROS_POR_AGENTE: lambda db: siniestros_por_agente_desde_mongo(db).items(),
+    KEY_NOMBRES_CLIENTES: _nombres_clientes,
+    KEY_CLIENTES: _ids_clientes,
+    KEY_CLIENTES_CON_POLIZA_ACTIVA: _clientes_con_poliza_activa,
+}
+
+# Selector de --vistas para los rankings por tipo: una vista por cada tipo de póliza en Mongo.
+VISTA_RANKINGS_POR_TIPO = clave_ranking_tipo('<tipo>')
+
+
+def _leer_vista(r, key):
+    if key == KEY_NOMBRES_CLIENTES:
+        return dict(r.hscan_iter(key))
+    if key in KEYS_HASH:
+        return {campo: float(valor) for campo, valor in r.hscan_iter(key)}
+    if key in KEYS_SET:
+        return dict.fromkeys(r.sscan_iter(key), 1)
+    return dict(r.zscan_iter(key))
+
+
+def _distinto(actual, reconstruido):
+    if isinstance(reconstruido, str):
+        return actual != reconstruido
+    return abs(float(actual) - float(reconstruido)) > 1e-6
+
+
+def calcular_drift(viva, reconstruida):
+    """Compara la vista en uso con la reconstruida desde Mongo."""
+    faltantes = [campo for campo in reconstruida if campo not in viva]
+    sobrantes = [campo for campo in viva if campo not in reconstruida]
+    distintos = [
+        campo for campo, valor in reconstruida.items()
+        if campo in viva and _distinto(viva[campo], valor)
+    ]
+    return {
+        'faltantes': len(faltantes),
+        'sobrantes': len(sobrantes),
+        'distintos': len(distintos),
+        'ejemplos': [
+            {'campo': campo, 'actual': viva.get(campo), 'reconstruido': reconstruida.get(campo)}
+            for campo in (distintos + faltantes + sobrantes)[:EJEMPLOS_DRIFT]
+        ],
+    }
+
+
+def reconstruir_vista(db, r, key, batch_size=BATCH_SIZE_DEFAULT, con_drift=True, pares=None):
+    """Recalcula `key` en Mongo, la escribe en una clave temporal y la reemplaza con RENAME.
+
+    `pares` son los (campo, valor) ya calculados; por defecto se calculan con VISTAS[key].
+
+    RENAME es atómico: los lectores ven la vista vieja o la nueva completa, nunca
+    una a medio escribir. Los incrementos que hagan los servicios de escritura
+    mientras corre la reconstrucción se pierden al reemplazarla.
+    """
+    inicio = time.perf_counter()
+    temporal = f"{key}{SUFIJO_TEMPORAL}"
+    r.delete(temporal)
+
+    reconstruida = {} if con_drift else None
+    campos = 0
+    pipe = r.pipeline(transaction=False)
+    pares = VISTAS[key](db) if pares is None else pares
+    for numero, lote in enumerate(en_lotes(pares, batch_size), start=1):
+        mapping = dict(lote)
+        if key in KEYS_HASH:
+            pipe.hset(temporal, mapping=mapping)
+        elif key in KEYS_SET:
+            pipe.sadd(temporal, *mapping)
+        else:
+            pipe.zadd(temporal, mapping)
+        if numero % LOTES_POR_PIPELINE == 0:
+            pipe.execute()
+        campos += len(mapping)
+        if con_drift:
+            reconstruida.update(mapping)
+    pipe.execute()
+
+    drift = calcular_drift(_leer_vista(r, key), reconstruida) if con_drift else None
+    if campos:
+        r.rename(temporal, key)
+    else:
+        r.delete(key)
+
+    segundos = time.perf_counter() - inicio
+    log.info(f"-> {key}: {campos} campos reconstruidos en {segundos:.2f}s. Drift: "
+             f"{'-' if drift is None else {k: v for k, v in drift.items() if k != 'ejemplos'}}")
+    return {'campos': campos, 'segundos': segundos, 'drift': drift}
+
+
+def _rankings_por_tipo_sobrantes(r, reconstruidos):
+    """Rankings por tipo que hay en Redis y no están en `reconstruidos` (tipos que ya no tienen pólizas)."""
+    return sorted(
+        key for key in r.scan_iter(match=clave_ranking_tipo('*'))
+        if key not in reconstruidos and not key.endswith(SUFIJO_TEMPORAL)
+    )
+
+
+def reconstruir(db, r, vistas=None, batch_size=BATCH_SIZE_DEFAULT, con_drift=True):
+    """Reconstruye en paralelo las `vistas` (default: todas). Devuelve el reporte por vista.
+
+    Con los rankings por tipo, además borra los de tipos que ya no aparecen en Mongo
+    (se informan en 'rankings_borrados').
+
+    No corre si el outbox de vistas tiene eventos pendientes: esas pólizas ya están
+    en Mongo, así que el trabajador las volvería a sumar sobre las vistas
+    reconstruidas. En ese caso devuelve un mensaje "Error: ...".
+    """
+    # Diferido (bson/redis): --help y los errores de argumentos no lo cargan.
+    from src.service.cache import invalidar_colecciones
+
+    pendientes = estado_outbox(db)['pendientes']
+    if pendientes:
+        return (f"Error: Hay {pendientes} eventos pendientes en '{COLECCION_OUTBOX}'. Drenarlos antes de "
+                f"reconstruir (src/api/trabajador_outbox.py --una-vez) para no contarlos dos veces.")
+
+    vistas = list(vistas or [*VISTAS, VISTA_RANKINGS_POR_TIPO])
+    inicio = time.perf_counter()
+    trabajos = {key: None for key in vistas if key != VISTA_RANKINGS_POR_TIPO}
+    if VISTA_RANKINGS_POR_TIPO in vistas:
+        trabajos.update(_rankings_por_tipo(db))
+    with ThreadPoolExecutor(max_workers=len(trabajos) or 1, thread_name_prefix='reconstruccion') as pool:
+        futuros = {
+            key: pool.submit(reconstruir_vista, db, r, key, batch_size, con_drift, pares)
+            for key, pares in trabajos.items()
+        }
+        reporte = {'vistas': {key: futuro.result() for key, futuro in futuros.items()}}
+    if VISTA_RANKINGS_POR_TIPO in vistas:
+        sobrantes = _rankings_por_tipo_sobrantes(r, trabajos)
+        if sobrantes:
+            r.delete(*sobrantes)
+            log.info(f"-> Rankings de tipos que ya no están en Mongo borrados: {', '.join(sobrantes)}.")
+        reporte['rankings_borrados'] = sobrantes
+    invalidar_colecciones(r, 'polizas', 'siniestros', 'clientes')
+    reporte['segundos'] = time.perf_counter() - inicio
+    return reporte
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reconstruye las vistas de Redis desde MongoDB sin cortar las lecturas (no borra nada más)."
+    )
+    todas = [*VISTAS, VISTA_RANKINGS_POR_TIPO]
+    parser.add_argument('--vistas', default=','.join(todas),
+                        help=f"Vistas a reconstruir, separadas por coma (default: todas: {', '.join(todas)}).")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE_DEFAULT,
+                        help=f"Campos por HSET/ZADD/SADD (default: {BATCH_SIZE_DEFAULT}).")
+    parser.add_argument('--sin-drift', action='store_true',
+                        help="No compara con la vista actual (evita leerla completa).")
+    args = parser.parse_args(argv)
+    args.vistas = [v.strip() for v in args.vistas.split(',') if v.strip()]
+    invalidas = [v for v in args.vistas if v not in todas]
+    if invalidas:
+        parser.error(f"Vistas no válidas: {', '.join(invalidas)}.")
+    if args.batch_size < 1:
+        parser.error("--batch-size debe ser >= 1.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        mongo_client, redis_client = conectar()
+        db = mongo_client[DB_NAME]
+    except Exception as e:
+        log.error(f"FATAL: No se pudo conectar a las bases de datos: {e}")
+        sys.exit(1)
+
+    try:
+        log.info(f"Reconstruyendo {len(args.vistas)} vistas de Redis en paralelo...")
+        reporte = reconstruir(db, redis_client, args.vistas, args.batch_size, con_drift=not args.sin_drift)
+        if isinstance(reporte, str):
+            log.error(reporte)
+            sys.exit(1)
+        log.info(f"Vistas reconstruidas en {reporte['segundos']:.2f}s.")
+        print(json.dumps(reporte, indent=2, ensure_ascii=False))
+        return reporte
+    finally:
+        mongo_client.close()
+        redis_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# src/loader/streaming.py
+
+import os
+import queue
+import threading
+
+import pandas as pd
+from pymongo import UpdateOne
+
+from src.logger import getLogger
+from src.loader.lotes import (
+    BATCH_SIZE_DEFAULT, CHUNK_ROWS_DEFAULT, MAX_CHUNKS_EN_COLA_DEFAULT, WRITERS_DEFAULT, MedidorCarga, en_lotes,
+    insertar_en_lotes
+)
+from src.loader.vistas_redis import calcular_vistas, calcular_vistas_clientes, escribir_vistas, incrementar_vistas
+from src.service.vistas import KEY_SINIESTROS_POR_AGENTE, siniestros_por_agente_desde_mongo
+from src.service.derivados import (
+    CAMPO_VEHICULOS_ASEGURADOS, contar_vehiculos_asegurados, embeber_clientes_en_siniestros
+)
+from src.service.indices import asegurar_indices
+from src.service.normalizacion import normalizar_df
+
+log = getLogger(__name__)
+
+# Un productor por CSV; cada uno puede retener un chunk mientras espera lugar en la cola.
+COLECCIONES = ('clientes', 'vehiculos', 'agentes', 'siniestros', 'polizas')
+
+_FIN = None
+
+
+class _Grupo:
+    """Lleva la cuenta de los chunks pendientes de escritura de una colección."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.cantidad = 0
+        self.errores = []
+        self._pendientes = 0
+        self._produccion_cerrada = False
+        self._cond = threading.Condition()
+
+    def agregar(self):
+        with self._cond:
+            self._pendientes += 1
+
+    def completar(self, cantidad=0, error=None):
+        with self._cond:
+            self._pendientes -= 1
+            self.cantidad += cantidad
+            if error is not None:
+                self.errores.append(error)
+            self._cond.notify_all()
+
+    def cerrar_produccion(self, error=None):
+        with self._cond:
+            self._produccion_cerrada = True
+            if error is not None:
+                self.errores.append(error)
+            self._cond.notify_all()
+
+    def esperar(self):
+        """Bloquea hasta que se leyeron todos los chunks y se escribieron todos."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._produccion_cerrada and self._pendientes == 0)
+        return not self.errores
+
+
+class CargaStreaming:
+    """Carga los CSV por chunks a través de una cola acotada y un pool de escritores.
+
+    Cada CSV tiene su hilo productor, que lee chunks de `chunk_rows` filas y los
+    encola. La cola admite a lo sumo `max_chunks_en_cola` chunks, así que en memoria
+    nunca hay más de (max_chunks_en_cola + writers + productores) chunks a la vez.
+    Los `writers` hilos consumen la cola y ejecutan insert_many / bulk_write en Mongo
+    y pipelines en Redis.
+
+    Las colecciones independientes (clientes, agentes, siniestros, pólizas) se cargan
+    en paralelo. Los vehículos se embeben en clientes con $push, por lo que su
+    productor espera a que todos los clientes estén escritos.
+    """
+
+    def __init__(self, db, redis_client, csv_base_path,
+                 chunk_rows=CHUNK_ROWS_DEFAULT,
+                 max_chunks_en_cola=MAX_CHUNKS_EN_COLA_DEFAULT,
+                 writers=WRITERS_DEFAULT,
+                 batch_size=BATCH_SIZE_DEFAULT):
+        self.db = db
+        self.r = redis_client
+        self.csv_base_path = csv_base_path
+        self.chunk_rows = chunk_rows
+        self.writers = writers
+        self.batch_size = batch_size
+        self._cola = queue.Queue(maxsize=max_chunks_en_cola)
+        self.max_chunks_en_memoria = max_chunks_en_cola + writers + len(COLECCIONES)
+
+    def ejecutar(self):
+        """Ejecuta la carga completa. Devuelve True si todas las colecciones se cargaron sin errores."""
+        log.info(
+            f"Carga streaming: chunks de {self.chunk_rows} filas, {self.writers} escritores, "
+            f"a lo sumo {self.max_chunks_en_memoria} chunks en memoria."
+        )
+        grupos = {nombre: _Grupo(nombre) for nombre in COLECCIONES}
+
+        # Los vehículos se aplican con $push por id_cliente: sin índice cada update recorre la colección.
+        asegurar_indices(self.db, colecciones=['clientes'])
+
+        escritores = [
+            threading.Thread(target=self._escritor, name=f"writer-{i}", daemon=True)
+            for i in range(self.writers)
+        ]
+        productores = [
+            self._productor(grupos['clientes'], 'clientes.csv', self._escribir_clientes),
+            self._productor(grupos['vehiculos'], 'vehiculos.csv', self._escribir_vehiculos,
+                            depende_de=grupos['clientes']),
+            self._productor(grupos['agentes'], 'agentes.csv', self._escribir_coleccion('agentes')),
+            self._productor(grupos['siniestros'], 'siniestros.csv', self._escribir_coleccion('siniestros')),
+            self._productor(grupos['polizas'], 'polizas.csv', self._escribir_polizas),
+        ]
+
+        for hilo in escritores + productores:
+            hilo.start()
+        for hilo in productores:
+            hilo.join()
+        for _ in escritores:
+            self._cola.put(_FIN)
+        for hilo in escritores:
+            hilo.join()
+
+        if not grupos['siniestros'].errores and not grupos['polizas'].errores:
+            # Necesita siniestros y pólizas completos: se calcula en Mongo al final.
+            try:
+                conteo = siniestros_por_agente_desde_mongo(self.db)
+                escribir_vistas(self.r, {KEY_SINIESTROS_POR_AGENTE: conteo}, self.batch_size)
+                log.info(f"-> Siniestros por agente actualizados en Redis ({len(conteo)} agentes).")
+            except Exception as e:
+                grupos['siniestros'].errores.append(f"no se pudo calcular 'agente:siniestros': {e}")
+
+        if not any(grupos[nombre].errores for nombre in ('siniestros', 'polizas', 'clientes')):
+            # Los chunks de siniestros se escriben sin esperar a pólizas y clientes: el cliente se embebe al final.
+            try:
+                embeber_clientes_en_siniestros(self.db)
+                log.info("-> Cliente de cada siniestro embebido desde pólizas y clientes.")
+            except Exception as e:
+                grupos['siniestros'].errores.append(f"no se pudo embeber el cliente en los siniestros: {e}")
+
+        exito = True
+        for grupo in grupos.values():
+            for error in grupo.errores:
+                exito = False
+                log.error(f"Carga streaming de {grupo.nombre}: {error}")
+        return exito
+
+    # --- Productores y escritores ---
+
+    def _productor(self, grupo, archivo, escribir, depende_de=None):
+        return threading.Thread(
+            target=self._producir, args=(grupo, archivo, escribir, depende_de),
+            name=f"reader-{grupo.nombre}", daemon=True
+        )
+
+    def _producir(self, grupo, archivo, escribir, depende_de):
+        log.info(f"Procesando y cargando {grupo.nombre} (streaming)...")
+        try:
+            with MedidorCarga(grupo.nombre) as medidor:
+                if depende_de is not None and not depende_de.esperar():
+                    grupo.cerrar_produccion(f"se omite porque falló la carga de {depende_de.nombre}.")
+                else:
+                    ruta = os.path.join(self.csv_base_path, archivo)
+                    try:
+                        with pd.read_csv(ruta, chunksize=self.chunk_rows) as lector:
+                            for chunk in lector:
+                                grupo.agregar()
+                                self._cola.put((grupo, escribir, chunk))
+                        grupo.cerrar_produccion()
+                    except Exception as e:
+                        grupo.cerrar_produccion(e)
+                grupo.esperar()
+                medidor.cantidad = grupo.cantidad
+        except Exception as e:
+            log.error(f"Error inesperado en el productor de {grupo.nombre}: {e}")
+
+    def _escritor(self):
+        while True:
+            tarea = self._cola.get()
+            try:
+                if tarea is _FIN:
+                    return
+                grupo, escribir, chunk = tarea
+                try:
+                    grupo.completar(cantidad=escribir(chunk))
+                except Exception as e:
+                    grupo.completar(error=e)
+            finally:
+                self._cola.task_done()
+
+    # --- Escritura de cada tipo de chunk (devuelven la cantidad escrita) ---
+
+    def _escribir_coleccion(self, nombre):
+        def escribir(chunk):
+            normalizar_df(chunk, nombre)
+            return insertar_en_lotes(self.db[nombre], chunk.to_dict('records'), self.batch_size)
+        return escribir
+
+    def _escribir_clientes(self, chunk):
+        documentos = chunk.to_dict('records')
+        for cliente_doc in documentos:
+            cliente_doc['vehiculos'] = []
+            cliente_doc[CAMPO_VEHICULOS_ASEGURADOS] = 0
+        cantidad = insertar_en_lotes(self.db.clientes, documentos, self.batch_size)
+        escribir_vistas(self.r, calcular_vistas_clientes(documentos), self.batch_size)
+        return cantidad
+
+    def _escribir_vehiculos(self, chunk):
+        vehiculos_por_cliente = {}
+        for vehiculo in chunk.to_dict('records'):
+            vehiculos_por_cliente.setdefault(vehiculo.pop('id_cliente'), []).append(vehiculo)
+
+        operaciones = [
+            UpdateOne({'id_cliente': id_cliente}, {
+                '$push': {'vehiculos': {'$each': vehiculos}},
+                '$inc': {CAMPO_VEHICULOS_ASEGURADOS: contar_vehiculos_asegurados(vehiculos)},
+            })
+            for id_cliente, vehiculos in vehiculos_por_cliente.items()
+        ]
+        for lote in en_lotes(operaciones, self.batch_size):
+            self.db.clientes.bulk_write(lote, ordered=False)
+        return len(chunk)
+
+    def _escribir_polizas(self, chunk):
+        normalizar_df(chunk, 'polizas')
+        cantidad = insertar_en_lotes(self.db.polizas, chunk.to_dict('records'), self.batch_size)
+        incrementar_vistas(self.r, calcular_vistas(chunk))
+        return cantidad
@@ -0,0 +1,188 @@
+# src/loader/vistas_redis.py
+
+import pandas as pd
+
+from src.logger import getLogger
+from src.loader.lotes import BATCH_SIZE_DEFAULT, en_lotes
+from src.service.vistas import (
+    KEY_AGENTE_STATS, KEY_CLIENTES, KEY_CLIENTES_CON_POLIZA_ACTIVA, KEY_NOMBRES_CLIENTES, KEY_POLIZAS_ACTIVAS,
+    KEY_RANKING_COBERTURA, KEY_SINIESTROS_POR_AGENTE, KEYS_HASH, KEYS_SET, clave_ranking_tipo, es_ranking_cobertura,
+    nombre_cliente
+)
+
+log = getLogger(__name__)
+
+
+EPOCH = pd.Timestamp('1970-01-01')
+
+
+def calcular_vistas(df_polizas):
+    """Calcula las vistas derivadas de Redis a partir del DataFrame de pólizas.
+
+    Devuelve un dict con los mappings listos para HSET/ZADD (y los miembros para SADD):
+      - 'agente:stats': {id_agente: cantidad de pólizas}
+      - 'ranking:clientes:cobertura': {id_cliente: suma de cobertura_total}
+      - 'ranking:clientes:cobertura:<tipo>': lo mismo, por cada tipo de póliza
+      - 'idx:polizas:activas': {nro_poliza: timestamp de fecha_inicio}
+      - 'idx:clientes:con_poliza_activa': {id_cliente con alguna póliza activa}
+    """
+    ids_agente = pd.to_numeric(df_polizas['id_agente'], errors='coerce')
+    ids_cliente = pd.to_numeric(df_polizas['id_cliente'], errors='coerce')
+    validas = ids_agente.notna() & ids_cliente.notna()
+    for nro_poliza in df_polizas.loc[~validas, 'nro_poliza']:
+        log.warning(f"ID de agente/cliente no numérico en póliza {nro_poliza}. Saltando.")
+
+    conteo = ids_agente[validas].astype('int64').value_counts()
+    cobertura = (
+        df_polizas.loc[validas, 'cobertura_total']
+        .groupby(ids_cliente[validas].astype('int64'))
+        .sum()
+    )
+    rankings_por_tipo = {}
+    cobertura_por_tipo = (
+        df_polizas.loc[validas, 'cobertura_total']
+        .groupby([df_polizas.loc[validas, 'tipo'], ids_cliente[validas].astype('int64')])
+        .sum()
+    )
+    for (tipo, id_cliente), valor in cobertura_por_tipo.items():
+        rankings_por_tipo.setdefault(clave_ranking_tipo(tipo), {})[str(id_cliente)] = float(valor)
+
+    activas = df_polizas[df_polizas['estado'].astype(str).str.lower() == 'activa']
+    fechas = pd.to_datetime(activas['fecha_inicio'], format='%d/%m/%Y', errors='coerce')
+    for nro_poliza, fecha in activas.loc[fechas.isna(), ['nro_poliza', 'fecha_inicio']].itertuples(index=False):
+        log.warning(f"Fecha en formato incorrecto para póliza {nro_poliza}: '{fecha}'")
+    fechas_validas = fechas.notna()
+    timestamps = (fechas[fechas_validas] - EPOCH) // pd.Timedelta(seconds=1)
+    # Como en q4, cuenta cualquier póliza activa con id_cliente numérico (aunque no tenga agente).
+    clientes_activos = pd.to_numeric(activas['id_cliente'], errors='coerce').dropna().astype('int64')
+
+    return {
+        KEY_AGENTE_STATS: {str(k): int(v) for k, v in conteo.items()},
+        KEY_RANKING_COBERTURA: {str(k): float(v) for k, v in cobertura.items()},
+        **rankings_por_tipo,
+        KEY_POLIZAS_ACTIVAS: {
+            str(nro): int(ts)
+            for nro, ts in zip(activas.loc[fechas_validas, 'nro_poliza'], timestamps)
+        },
+        KEY_CLIENTES_CON_POLIZA_ACTIVA: {str(id_cliente) for id_cliente in clientes_activos},
+    }
+
+
+def calcular_siniestros_por_agente(df_siniestros, df_polizas):
+    """Cuenta los siniestros de cada agente uniendo cada siniestro con el agente de su póliza.
+
+    Devuelve {'agente:siniestros': {id_agente: cantidad}}. Los siniestros de pólizas
+    inexistentes o sin agente numérico no se cuentan (igual que en q12).
+    """
+    polizas = df_polizas.drop_duplicates('nro_poliza').set_index('nro_poliza')
+    agente_por_poliza = pd.to_numeric(polizas['id_agente'], errors='coerce')
+    ids_agente = df_siniestros['nro_poliza'].map(agente_por_poliza).dropna().astype('int64')
+    conteo = ids_agente.value_counts()
+    return {KEY_SINIESTROS_POR_AGENTE: {str(k): int(v) for k, v in conteo.items()}}
+
+
+def calcular_vistas_clientes(clientes):
+    """Vistas de Redis a partir de documentos de clientes.
+
+    Devuelve {'clientes:nombre': {id_cliente: nombre para mostrar}, 'idx:clientes': {id_cliente}}.
+    """
+    return {
+        KEY_NOMBRES_CLIENTES: {str(cliente['id_cliente']): nombre_cliente(cliente) for cliente in clientes},
+        KEY_CLIENTES: {str(cliente['id_cliente']) for cliente in clientes},
+    }
+
+
+def escribir_vistas(redis_client, vistas, batch_size=BATCH_SIZE_DEFAULT):
+    """Escribe las vistas con HSET/ZADD/SADD de `batch_size` campos, todo en un solo pipeline.
+
+    Asume que las claves están vacías (carga limpia): los valores se setean, no se incrementan.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    comandos = 0
+    for key, mapping in vistas.items():
+        if key in KEYS_SET:
+            for lote in en_lotes(mapping, batch_size):
+                pipe.sadd(key, *lote)
+                comandos += 1
+            continue
+        for lote in en_lotes(mapping.items(), batch_size):
+            if key in KEYS_HASH:
+                pipe.hset(key, mapping=dict(lote))
+            else:
+                pipe.zadd(key, dict(lote))
+            comandos += 1
+    pipe.execute()
+    return comandos
+
+
+def incrementar_vistas(redis_client, vistas):
+    """Aplica las vistas de un chunk de pólizas como incrementos en un solo pipeline.
+
+    A diferencia de escribir_vistas, no pisa los valores existentes: sirve para
+    acumular chunks sucesivos sobre las mismas claves.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    for id_agente, cantidad in vistas[KEY_AGENTE_STATS].items():
+        pipe.hincrby(KEY_AGENTE_STATS, id_agente, cantidad)
+    for key, mapping in vistas.items():
+        if es_ranking_cobertura(key):
+            for id_cliente, cobertura in mapping.items():
+                pipe.zincrby(key, cobertura, id_cliente)
+    if vistas[KEY_POLIZAS_ACTIVAS]:
+        pipe.zadd(KEY_POLIZAS_ACTIVAS, vistas[KEY_POLIZAS_ACTIVAS])
+    if vistas[KEY_CLIENTES_CON_POLIZA_ACTIVA]:
+        pipe.sadd(KEY_CLIENTES_CON_POLIZA_ACTIVA, *vistas[KEY_CLIENTES_CON_POLIZA_ACTIVA])
+    pipe.execute()
+
+
+def diferencia_vistas(nuevas, viejas):
+    """Delta entre las vistas de dos conjuntos de pólizas (las mismas, antes y después de cambiar).
+
+    Devuelve los incrementos de 'agente:stats' y de los rankings de cobertura (sin
+    los ceros) y, para 'idx:polizas:activas', las pólizas a quitar y a (re)agregar.
+
+    Para 'idx:clientes:con_poliza_activa' sólo devuelve los clientes a agregar; en
+    'clientes_a_verificar' quedan los que dejaron de tener una póliza activa entre
+    estas, que pueden seguir teniendo otras (eso sólo lo sabe Mongo).
+    """
+    def restar(clave):
+        delta = dict(nuevas.get(clave, {}))
+        for campo, valor in viejas.get(clave, {}).items():
+            delta[campo] = delta.get(campo, 0) - valor
+        return {campo: valor for campo, valor in delta.items() if valor}
+
+    rankings = {clave for clave in list(nuevas) + list(viejas) if es_ranking_cobertura(clave)}
+    return {
+        KEY_AGENTE_STATS: restar(KEY_AGENTE_STATS),
+        **{clave: restar(clave) for clave in rankings},
+        'quitar_activas': [nro for nro in viejas[KEY_POLIZAS_ACTIVAS] if nro not in nuevas[KEY_POLIZAS_ACTIVAS]],
+        KEY_POLIZAS_ACTIVAS: nuevas[KEY_POLIZAS_ACTIVAS],
+        KEY_CLIENTES_CON_POLIZA_ACTIVA: nuevas[KEY_CLIENTES_CON_POLIZA_ACTIVA],
+        'clientes_a_verificar': viejas[KEY_CLIENTES_CON_POLIZA_ACTIVA] - nuevas[KEY_CLIENTES_CON_POLIZA_ACTIVA],
+    }
+
+
+def aplicar_diferencia_vistas(redis_client, delta, marca=None):
+    """Aplica un delta de diferencia_vistas en un solo pipeline. Devuelve la cantidad de comandos.
+
+    Con `marca` = (set, miembro), el pipeline es un MULTI/EXEC que además agrega el
+    miembro al set: quien lo llama puede saber si el delta ya se aplicó.
+    """
+    pipe = redis_client.pipeline(transaction=marca is not None)
+    for id_agente, cantidad in delta[KEY_AGENTE_STATS].items():
+        pipe.hincrby(KEY_AGENTE_STATS, id_agente, cantidad)
+    for key, mapping in delta.items():
+        if es_ranking_cobertura(key):
+            for id_cliente, cobertura in mapping.items():
+                pipe.zincrby(key, cobertura, id_cliente)
+    if delta['quitar_activas']:
+        pipe.zrem(KEY_POLIZAS_ACTIVAS, *delta['quitar_activas'])
+    if delta[KEY_POLIZAS_ACTIVAS]:
+        pipe.zadd(KEY_POLIZAS_ACTIVAS, delta[KEY_POLIZAS_ACTIVAS])
+    if delta[KEY_CLIENTES_CON_POLIZA_ACTIVA]:
+        pipe.sadd(KEY_CLIENTES_CON_POLIZA_ACTIVA, *delta[KEY_CLIENTES_CON_POLIZA_ACTIVA])
+    if marca is not None:
+        pipe.sadd(*marca)
+    comandos = len(pipe)
+    pipe.execute()
+    return comandos
@@ -0,0 +1,121 @@
+# src/service/cache.py
+
+import functools
+import hashlib
+import json
+import threading
+
+from bson import json_util
+from redis.exceptions import RedisError
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+TTL_DEFAULT = 300
+
+PREFIJO_VERSION = 'cache:version:'
+PREFIJO_RESULTADO = 'cache:consulta:'
+
+
+def clave_version(coleccion):
+    return f"{PREFIJO_VERSION}{coleccion}"
+
+
+def invalidar_colecciones(r, *colecciones):
+    """Incrementa la versión de cada colección, dejando inaccesibles los resultados cacheados que dependen de ella.
+
+    Los servicios de escritura la llaman siempre (haya o no cache en ese proceso),
+    para que otro proceso con cache activo nunca sirva datos viejos.
+    """
+    try:
+        pipe = r.pipeline(transaction=False)
+        for coleccion in colecciones:
+            pipe.incr(clave_version(coleccion))
+        pipe.execute()
+    except RedisError as e:
+        log.error(f"No se pudo invalidar el cache de {colecciones}: {e}")
+
+
+class CacheConsultas:
+    """Cache de resultados de consultas de lectura en Redis, con TTL.
+
+    La clave de cada resultado incluye la versión actual de las colecciones de las
+    que depende la consulta; al escribir se incrementa esa versión (ver
+    invalidar_colecciones), así que un resultado viejo nunca vuelve a leerse y
+    simplemente expira por TTL.
+    """
+
+    def __init__(self, r, ttl=TTL_DEFAULT):
+        self.r = r
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errores = 0
+
+    def _clave(self, nombre, colecciones, versiones, args, kwargs):
+        version = ','.join(f"{c}={v or 0}" for c, v in zip(colecciones, versiones))
+        parametros = json.dumps([args, kwargs], sort_keys=True, default=str)
+        digest = hashlib.sha1(parametros.encode('utf-8')).hexdigest()[:16]
+        return f"{PREFIJO_RESULTADO}{nombre}:{version}:{digest}"
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def obtener_o_calcular(self, nombre, colecciones, calcular, args=(), kwargs=None):
+        kwargs = kwargs or {}
+        try:
+            versiones = self.r.mget([clave_version(c) for c in colecciones])
+            clave = self._clave(nombre, colecciones, versiones, args, kwargs)
+            cacheado = self.r.get(clave)
+        except RedisError as e:
+            log.warning(f"Cache no disponible para {nombre}, se consulta directo: {e}")
+            self._contar('errores')
+            return calcular()
+
+        if cacheado is not None:
+            self._contar('hits')
+            return json_util.loads(cacheado)
+
+        self._contar('misses')
+        resultado = calcular()
+        try:
+            self.r.set(clave, json_util.dumps(resultado), ex=self.ttl)
+        except RedisError as e:
+            log.warning(f"No se pudo guardar en cache el resultado de {nombre}: {e}")
+            self._contar('errores')
+        return resultado
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'errores': self.errores,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+
+def cacheable(*colecciones):
+    """Decorador para métodos de lectura de ServicioAseguradora.
+
+    Si la instancia tiene `cache` (CacheConsultas), el resultado se sirve desde
+    Redis mientras no cambie ninguna de `colecciones`; si no, se ejecuta directo.
+    """
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return metodo(self, *args, **kwargs)
+            return cache.obtener_o_calcular(
+                metodo.__name__, colecciones,
+                lambda: metodo(self, *args, **kwargs),
+                args, kwargs
+            )
+        envoltura.colecciones = colecciones
+        return envoltura
+    return decorador
@@ -0,0 +1,161 @@
+# src/service/conexion.py
+
+import os
+import threading
+import time
+from collections import namedtuple
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+# Parámetros de conexión a MongoDB y Redis. Los tiempos de Mongo van en milisegundos y
+# los de Redis en segundos, como los reciben sus clientes; 0 = sin límite.
+ConfiguracionConexion = namedtuple('ConfiguracionConexion', [
+    'mongo_host', 'mongo_port', 'mongo_db', 'mongo_pool',
+    'mongo_timeout_ms', 'mongo_connect_timeout_ms', 'mongo_socket_timeout_ms',
+    'redis_host', 'redis_port', 'redis_db', 'redis_pool', 'redis_pool_timeout',
+    'redis_timeout', 'redis_connect_timeout', 'redis_keepalive',
+])
+
+# Variable de entorno -> (campo de ConfiguracionConexion, tipo, default).
+VARIABLES_ENTORNO = {
+    'MONGO_HOST': ('mongo_host', str, 'mongo'),
+    'MONGO_PORT': ('mongo_port', int, 27017),
+    'MONGO_DB': ('mongo_db', str, 'aseguradora_db'),
+    'MONGO_POOL': ('mongo_pool', int, 100),
+    'MONGO_TIMEOUT_MS': ('mongo_timeout_ms', int, 5000),
+    'MONGO_CONNECT_TIMEOUT_MS': ('mongo_connect_timeout_ms', int, 5000),
+    'MONGO_SOCKET_TIMEOUT_MS': ('mongo_socket_timeout_ms', int, 0),
+    'REDIS_HOST': ('redis_host', str, 'redis'),
+    'REDIS_PORT': ('redis_port', int, 6379),
+    'REDIS_DB': ('redis_db', int, 0),
+    'REDIS_POOL': ('redis_pool', int, 0),
+    'REDIS_POOL_TIMEOUT': ('redis_pool_timeout', float, 5.0),
+    'REDIS_TIMEOUT': ('redis_timeout', float, 0.0),
+    'REDIS_CONNECT_TIMEOUT': ('redis_connect_timeout', float, 5.0),
+    'REDIS_KEEPALIVE': ('redis_keepalive', bool, True),
+}
+
+DB_NAME = os.environ.get('MONGO_DB', VARIABLES_ENTORNO['MONGO_DB'][2])
+
+
+def _convertir(variable, tipo, texto):
+    if tipo is bool:
+        return texto.strip().lower() in ('1', 'true', 'si')
+    try:
+        return tipo(texto)
+    except ValueError:
+        raise ValueError(f"La variable de entorno {variable} debe ser de tipo {tipo.__name__} (recibido: '{texto}').")
+
+
+def configuracion_desde_entorno(**cambios):
+    """ConfiguracionConexion leída de las variables de entorno (ver VARIABLES_ENTORNO).
+
+    Los `cambios` (p. ej. mongo_pool=20 desde una opción de la CLI) pisan al entorno.
+    """
+    valores = {}
+    for variable, (campo, tipo, default) in VARIABLES_ENTORNO.items():
+        texto = os.environ.get(variable)
+        valores[campo] = default if texto is None else _convertir(variable, tipo, texto)
+    return ConfiguracionConexion(**valores)._replace(**cambios)
+
+
+class Conexiones:
+    """MongoClient y cliente de Redis que se importan y crean recién al usarlos por primera vez.
+
+    Construirla no toca la red ni importa pymongo/redis: los scripts pueden validar
+    sus argumentos o mostrar la ayuda sin pagar ninguno de los dos. Los clientes se
+    comparten entre hilos (cada uno tiene su propio pool de conexiones).
+
+    MongoDB siempre abre sus sockets con TCP keepalive; en Redis se controla con
+    REDIS_KEEPALIVE.
+    """
+
+    def __init__(self, configuracion=None, event_listeners=()):
+        self.configuracion = configuracion or configuracion_desde_entorno()
+        self._event_listeners = list(event_listeners)
+        self._mongo_client = None
+        self._redis_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def mongo_client(self):
+        with self._lock:
+            if self._mongo_client is None:
+                from pymongo import MongoClient
+
+                c = self.configuracion
+                self._mongo_client = MongoClient(
+                    c.mongo_host, c.mongo_port,
+                    maxPoolSize=c.mongo_pool,
+                    serverSelectionTimeoutMS=c.mongo_timeout_ms,
+                    connectTimeoutMS=c.mongo_connect_timeout_ms,
+                    socketTimeoutMS=c.mongo_socket_timeout_ms or None,
+                    event_listeners=self._event_listeners,
+                )
+            return self._mongo_client
+
+    @property
+    def db(self):
+        return self.mongo_client[self.configuracion.mongo_db]
+
+    @property
+    def redis_client(self):
+        with self._lock:
+            if self._redis_client is None:
+                import redis
+
+                c = self.configuracion
+                opciones = dict(
+                    host=c.redis_host, port=c.redis_port, db=c.redis_db, decode_responses=True,
+                    socket_timeout=c.redis_timeout or None,
+                    socket_connect_timeout=c.redis_connect_timeout or None,
+                    socket_keepalive=c.redis_keepalive,
+                )
+                if c.redis_pool > 0:
+                    # Con tope, los hilos esperan una conexión libre en lugar de fallar.
+                    pool = redis.BlockingConnectionPool(
+                        max_connections=c.redis_pool, timeout=c.redis_pool_timeout, **opciones
+                    )
+                else:
+                    pool = redis.ConnectionPool(**opciones)
+                self._redis_client = redis.Redis(connection_pool=pool)
+            return self._redis_client
+
+    def verificar(self):
+        """Se conecta a las dos bases (server_info y PING). Devuelve los milisegundos de cada una."""
+        inicio = time.perf_counter()
+        self.mongo_client.server_info()
+        mongo_ms = (time.perf_counter() - inicio) * 1000
+        log.info(f"Conexión a MongoDB exitosa ({mongo_ms:.1f} ms).")
+
+        inicio = time.perf_counter()
+        self.redis_client.ping()
+        redis_ms = (time.perf_counter() - inicio) * 1000
+        log.info(f"Conexión a Redis exitosa ({redis_ms:.1f} ms).")
+        return {'mongo_ms': mongo_ms, 'redis_ms': redis_ms}
+
+    def cerrar(self):
+        """Cierra los clientes que se hayan llegado a crear."""
+        with self._lock:
+            if self._mongo_client is not None:
+                self._mongo_client.close()
+                self._mongo_client = None
+            if self._redis_client is not None:
+                self._redis_client.close()
+                self._redis_client = None
+
+
+def conectar(event_listeners=(), **cambios):
+    """Crea y verifica los clientes de Mongo y Redis con la configuración del entorno (y `cambios`).
+
+    Devuelve (mongo_client, redis_client); si alguna base no responde, lanza la excepción.
+    """
+    conexiones = Conexiones(configuracion_desde_entorno(**cambios), event_listeners)
+    try:
+        conexiones.verificar()
+    except Exception:
+        conexiones.cerrar()
+        raise
+    return conexiones.mongo_client, conexiones.redis_client
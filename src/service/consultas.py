@@ -0,0 +1,27 @@
+# src/service/consultas.py
+
+# Números de consulta y parámetros por defecto de las consultas de lectura. No importa
+# nada más: las CLI los usan para validar argumentos antes de importar pymongo/redis.
+
+PAGINA_Q9_DEFAULT = 50
+TOP_Q7_DEFAULT = 10
+MINIMO_Q11_DEFAULT = 2
+
+# Documentos por lote de cursor en ServicioAseguradora.iterar_consulta.
+BATCH_SIZE_STREAMING = 500
+
+# Número de consulta de lectura -> método de ServicioAseguradora.
+CONSULTAS_LECTURA = {
+    '1': 'q1_clientes_activos_con_polizas',
+    '2': 'q2_siniestros_abiertos_con_cliente',
+    '3': 'q3_vehiculos_asegurados_con_cliente_poliza',
+    '4': 'q4_clientes_sin_polizas_activas',
+    '5': 'q5_agentes_activos_con_polizas',
+    '6': 'q6_polizas_vencidas_con_cliente',
+    '7': 'q7_top_10_clientes_cobertura',
+    '8': 'q8_siniestros_accidente_ultimo_anio',
+    '9': 'q9_vista_polizas_activas_ordenadas',
+    '10': 'q10_polizas_suspendidas_estado_cliente',
+    '11': 'q11_clientes_con_mas_de_un_vehiculo',
+    '12': 'q12_agentes_y_siniestros_asociados',
+}
@@ -0,0 +1,63 @@
+# src/service/dashboard.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.logger import getLogger
+from src.service.consultas import CONSULTAS_LECTURA
+
+log = getLogger(__name__)
+
+CONCURRENCIA_DEFAULT = 4
+
+
+def _ejecutar_consulta(servicio, query_num, kwargs):
+    inicio = time.perf_counter()
+    try:
+        resultado = getattr(servicio, CONSULTAS_LECTURA[query_num])(**kwargs)
+        error = resultado if isinstance(resultado, str) and resultado.startswith('Error') else None
+    except Exception as e:
+        log.error(f"Error ejecutando Q{query_num} en el dashboard: {e}")
+        resultado, error = None, str(e)
+    return {
+        'resultado': None if error else resultado,
+        'documentos': len(resultado) if isinstance(resultado, list) else None,
+        'error': error,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def ejecutar_dashboard(servicio, consultas=None, concurrencia=CONCURRENCIA_DEFAULT, parametros=None):
+    """Corre las consultas de lectura `consultas` (default: 1-12) en paralelo, de a `concurrencia`.
+
+    Todas usan el mismo `servicio` y por lo tanto el mismo MongoClient y pool de Redis.
+    `parametros` es {query_num: kwargs del método}. Devuelve el resultado, la cantidad
+    de documentos, el error (o None) y los segundos de cada consulta, el total de
+    pared y la suma de los tiempos individuales (lo que tardaría correrlas en serie).
+    """
+    consultas = [str(q) for q in (consultas or CONSULTAS_LECTURA)]
+    invalidas = [q for q in consultas if q not in CONSULTAS_LECTURA]
+    if invalidas:
+        return f"Error: Consultas no válidas para el dashboard: {', '.join(invalidas)}. Deben ser de 1 a 12."
+    if concurrencia < 1:
+        return "Error: La concurrencia debe ser >= 1."
+    parametros = parametros or {}
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(concurrencia, len(consultas)), thread_name_prefix='dashboard') as pool:
+        futuros = {
+            q: pool.submit(_ejecutar_consulta, servicio, q, parametros.get(q, {}))
+            for q in dict.fromkeys(consultas)
+        }
+        resultados = {q: futuro.result() for q, futuro in futuros.items()}
+    segundos = time.perf_counter() - inicio
+
+    errores = sum(1 for resultado in resultados.values() if resultado['error'])
+    log.info(f"Dashboard: {len(resultados)} consultas ({errores} con error) en {segundos:.3f}s "
+             f"con concurrencia {concurrencia}.")
+    return {
+        'consultas': resultados,
+        'concurrencia': concurrencia,
+        'segundos_total': segundos,
+        'segundos_en_serie': sum(resultado['segundos'] for resultado in resultados.values()),
+    }
@@ -0,0 +1,92 @@
+# src/service/derivados.py
+
+from src.service.vistas import nombre_cliente
+
+# Campos derivados que se guardan en los documentos de Mongo para que las consultas
+# filtren por igualdad/rango sobre un índice en lugar de recalcularlos con $expr.
+
+# clientes.vehiculos_asegurados: cantidad de vehículos embebidos con asegurado == True.
+CAMPO_VEHICULOS_ASEGURADOS = 'vehiculos_asegurados'
+
+# El mismo conteo como expresión de agregación, para los updates por pipeline.
+EXPR_VEHICULOS_ASEGURADOS = {
+    '$size': {
+        '$filter': {
+            'input': {'$ifNull': ['$vehiculos', []]},
+            'as': 'v',
+            'cond': {'$eq': ['$$v.asegurado', True]}
+        }
+    }
+}
+
+# siniestros.id_cliente y siniestros.nombre_cliente: el cliente de la póliza del siniestro y
+# su nombre para mostrar (ver vistas.nombre_cliente), copiados para que q2 no haga joins.
+CAMPO_ID_CLIENTE_SINIESTRO = 'id_cliente'
+CAMPO_NOMBRE_CLIENTE_SINIESTRO = 'nombre_cliente'
+
+# Update por pipeline que recalcula el conteo a partir del array 'vehiculos' guardado.
+UPDATE_VEHICULOS_ASEGURADOS = [{'$set': {CAMPO_VEHICULOS_ASEGURADOS: EXPR_VEHICULOS_ASEGURADOS}}]
+
+
+def contar_vehiculos_asegurados(vehiculos):
+    """Cantidad de vehículos con asegurado True (los textos 'True' no cuentan, como en Mongo)."""
+    return sum(1 for vehiculo in vehiculos or [] if vehiculo.get('asegurado') is True)
+
+
+def cambia_vehiculos(cambios):
+    """True si un $set con `cambios` toca el array 'vehiculos' (entero o un elemento/subcampo)."""
+    return any(campo == 'vehiculos' or campo.startswith('vehiculos.') for campo in cambios)
+
+
+def cliente_de_siniestro(cliente):
+    """Campos del cliente que se copian en un siniestro, a partir del documento del cliente."""
+    return {
+        CAMPO_ID_CLIENTE_SINIESTRO: cliente['id_cliente'],
+        CAMPO_NOMBRE_CLIENTE_SINIESTRO: nombre_cliente(cliente),
+    }
+
+
+def pipeline_clientes_en_siniestros(filtro=None):
+    """Agregación que copia a los siniestros que cumplen `filtro` el cliente de su póliza.
+
+    Corre entera en el servidor y termina en un $merge sobre 'siniestros'. Si la
+    póliza o el cliente no existen, los campos quedan en null.
+    """
+    return [
+        {'$match': filtro or {}},
+        {
+            '$lookup': {
+                'from': 'polizas',
+                'localField': 'nro_poliza',
+                'foreignField': 'nro_poliza',
+                'pipeline': [{'$project': {'_id': 0, 'id_cliente': 1}}],
+                'as': 'poliza'
+            }
+        },
+        {'$set': {'poliza': {'$first': '$poliza'}}},
+        {
+            '$lookup': {
+                'from': 'clientes',
+                'localField': 'poliza.id_cliente',
+                'foreignField': 'id_cliente',
+                'pipeline': [{'$project': {'_id': 0, 'id_cliente': 1, 'nombre': 1, 'apellido': 1}}],
+                'as': 'cliente'
+            }
+        },
+        {'$set': {'cliente': {'$first': '$cliente'}}},
+        {
+            '$project': {
+                '_id': 1,
+                CAMPO_ID_CLIENTE_SINIESTRO: {'$ifNull': ['$cliente.id_cliente', None]},
+                CAMPO_NOMBRE_CLIENTE_SINIESTRO: {
+                    '$ifNull': [{'$concat': ['$cliente.nombre', ' ', '$cliente.apellido']}, None]
+                }
+            }
+        },
+        {'$merge': {'into': 'siniestros', 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'discard'}}
+    ]
+
+
+def embeber_clientes_en_siniestros(db, filtro=None):
+    """Actualiza id_cliente y nombre_cliente de los siniestros que cumplen `filtro` (default: todos)."""
+    db.siniestros.aggregate(pipeline_clientes_en_siniestros(filtro), allowDiskUse=True)
@@ -0,0 +1,79 @@
+# src/service/fechas.py
+
+import calendar
+from datetime import datetime
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+# Formato en el que llegan las fechas (CSV y CLI) y en el que se muestran.
+FORMATO_FECHA = '%d/%m/%Y'
+
+# Campos que se guardan como fecha BSON nativa en cada colección.
+CAMPOS_FECHA = {
+    'polizas': ['fecha_inicio', 'fecha_fin'],
+    'siniestros': ['fecha'],
+}
+
+
+def parsear_fecha(valor):
+    """Convierte 'DD/MM/YYYY' a datetime. Si ya es datetime lo devuelve tal cual.
+
+    Lanza ValueError si el texto no respeta el formato.
+    """
+    if isinstance(valor, datetime):
+        return valor
+    return datetime.strptime(valor.strip(), FORMATO_FECHA)
+
+
+def formatear_fecha(valor):
+    """Inverso de parsear_fecha, para mostrar. Los valores que no son fecha se devuelven sin cambios."""
+    if isinstance(valor, datetime):
+        return valor.strftime(FORMATO_FECHA)
+    return valor
+
+
+def timestamp_fecha(fecha):
+    """Segundos desde epoch de una fecha sin zona horaria (tomada como UTC).
+
+    Es el score de 'idx:polizas:activas'; coincide con el cálculo vectorizado del loader.
+    """
+    return calendar.timegm(fecha.timetuple())
+
+
+def expr_fecha_texto(campo):
+    """Expresión de agregación que muestra un campo fecha como 'DD/MM/YYYY'.
+
+    Si el campo no es fecha (dato sin migrar o inválido) se devuelve tal cual.
+    """
+    return {
+        '$cond': [
+            {'$eq': [{'$type': f'${campo}'}, 'date']},
+            {'$dateToString': {'date': f'${campo}', 'format': FORMATO_FECHA}},
+            f'${campo}'
+        ]
+    }
+
+
+def convertir_fechas_df(df, coleccion):
+    """Convierte in place las columnas fecha de `coleccion` a datetime.
+
+    Las fechas que no respetan el formato quedan con su texto original (y se avisa),
+    así no se pierde el dato; las consultas por rango simplemente no las incluyen.
+    """
+    import pandas as pd
+
+    for campo in CAMPOS_FECHA.get(coleccion, []):
+        if campo not in df.columns:
+            continue
+        texto = df[campo]
+        fechas = pd.to_datetime(texto, format=FORMATO_FECHA, errors='coerce')
+        invalidas = fechas.isna() & texto.notna()
+        if invalidas.any():
+            log.warning(
+                f"{invalidas.sum()} valores de {coleccion}.{campo} no respetan el formato DD/MM/YYYY; "
+                f"se guardan como texto (ej: '{texto[invalidas].iloc[0]}')."
+            )
+        df[campo] = fechas.astype(object).where(fechas.notna(), texto)
+    return df
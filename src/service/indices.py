@@ -0,0 +1,74 @@
+# src/service/indices.py
+
+from collections import namedtuple
+
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+Indice = namedtuple('Indice', ['coleccion', 'claves', 'unique'])
+
+# Índices que necesitan los $lookup / $match de ServicioAseguradora y los chequeos
+# de existencia de los servicios de escritura. Las claves de negocio son únicas.
+# Los filtros por estado/tipo usan igualdad sobre valores canónicos (ver normalizacion.py).
+INDICES_REQUERIDOS = [
+    Indice('clientes', [('id_cliente', ASCENDING)], True),
+    Indice('clientes', [('vehiculos_asegurados', ASCENDING)], False),
+    Indice('agentes', [('id_agente', ASCENDING)], True),
+    Indice('polizas', [('nro_poliza', ASCENDING)], True),
+    Indice('polizas', [('id_cliente', ASCENDING)], False),
+    Indice('polizas', [('id_agente', ASCENDING)], False),
+    Indice('polizas', [('estado', ASCENDING)], False),
+    Indice('siniestros', [('id_siniestro', ASCENDING)], True),
+    Indice('siniestros', [('nro_poliza', ASCENDING)], False),
+    Indice('siniestros', [('estado', ASCENDING)], False),
+    Indice('siniestros', [('id_cliente', ASCENDING)], False),
+    Indice('siniestros', [('tipo', ASCENDING), ('fecha', ASCENDING)], False),
+    Indice('siniestros', [('fecha', ASCENDING)], False),
+]
+
+
+def _existe(indice, indices_actuales):
+    for info in indices_actuales.values():
+        claves = [(campo, direccion) for campo, direccion in info['key']]
+        if claves == indice.claves and bool(info.get('unique', False)) == indice.unique:
+            return True
+    return False
+
+
+def indices_faltantes(db, colecciones=None):
+    """Devuelve los índices requeridos que todavía no existen en `db`."""
+    faltantes = []
+    cache = {}
+    for indice in INDICES_REQUERIDOS:
+        if colecciones is not None and indice.coleccion not in colecciones:
+            continue
+        if indice.coleccion not in cache:
+            cache[indice.coleccion] = db[indice.coleccion].index_information()
+        if not _existe(indice, cache[indice.coleccion]):
+            faltantes.append(indice)
+    return faltantes
+
+
+def asegurar_indices(db, colecciones=None):
+    """Crea los índices requeridos que falten. Es idempotente.
+
+    Devuelve un dict con los índices 'creados' y los 'errores' (por ejemplo, un
+    índice único que no se puede crear porque hay claves duplicadas).
+    """
+    reporte = {'creados': [], 'errores': []}
+    for indice in indices_faltantes(db, colecciones):
+        descripcion = f"{indice.coleccion}({', '.join(campo for campo, _ in indice.claves)})"
+        if indice.unique:
+            descripcion += " [único]"
+        try:
+            db[indice.coleccion].create_index(indice.claves, unique=indice.unique)
+            reporte['creados'].append(descripcion)
+            log.info(f"Índice creado: {descripcion}")
+        except PyMongoError as e:
+            reporte['errores'].append(f"{descripcion}: {e}")
+            log.error(f"No se pudo crear el índice {descripcion}: {e}")
+    return reporte
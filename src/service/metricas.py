@@ -0,0 +1,308 @@
+# src/service/metricas.py
+
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+
+from pymongo import monitoring
+
+from src.logger import getLogger
+
+log = getLogger(__name__)
+
+# Límites (en segundos) de los buckets del histograma de duración.
+BUCKETS_DURACION = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Comandos de Mongo que se pueden pasar a 'explain'.
+COMANDOS_EXPLICABLES = ('aggregate', 'find', 'count', 'distinct')
+
+# Medición en curso en este hilo/contexto (None fuera de un método instrumentado).
+_medicion_actual = contextvars.ContextVar('medicion_actual', default=None)
+
+
+class _Medicion:
+    def __init__(self, capturar_comandos):
+        self.mongo_roundtrips = 0
+        self.redis_roundtrips = 0
+        self.capturar_comandos = capturar_comandos
+        self.comandos = []
+
+
+class ListenerMongo(monitoring.CommandListener):
+    """Cuenta los comandos que se envían a Mongo durante un método instrumentado.
+
+    Se registra en el MongoClient con event_listeners=[LISTENER_MONGO].
+    """
+
+    def started(self, event):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return
+        medicion.mongo_roundtrips += 1
+        if medicion.capturar_comandos and event.command_name in COMANDOS_EXPLICABLES:
+            comando = {k: v for k, v in event.command.items()
+                       if not k.startswith('$') and k not in ('lsid', 'txnNumber', 'cursor')}
+            if event.command_name == 'aggregate':
+                comando['cursor'] = {}
+            medicion.comandos.append((event.database_name, comando))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+LISTENER_MONGO = ListenerMongo()
+
+
+def instrumentar_redis(r):
+    """Hace que el cliente Redis cuente sus round trips en la medición en curso.
+
+    Cada comando suelto es un round trip; un pipeline completo cuenta como uno.
+    """
+    if getattr(r, '_instrumentado', False):
+        return r
+    execute_command = r.execute_command
+    crear_pipeline = r.pipeline
+
+    def execute_command_contado(*args, **kwargs):
+        medicion = _medicion_actual.get()
+        if medicion is not None:
+            medicion.redis_roundtrips += 1
+        return execute_command(*args, **kwargs)
+
+    def pipeline_contado(*args, **kwargs):
+        pipe = crear_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def execute_contado(*e_args, **e_kwargs):
+            medicion = _medicion_actual.get()
+            if medicion is not None:
+                medicion.redis_roundtrips += 1
+            return execute(*e_args, **e_kwargs)
+
+        pipe.execute = execute_contado
+        return pipe
+
+    r.execute_command = execute_command_contado
+    r.pipeline = pipeline_contado
+    r._instrumentado = True
+    return r
+
+
+def _sumar_claves(documento, clave):
+    """Suma todas las apariciones de `clave` en un documento de explain (a cualquier profundidad)."""
+    total = 0
+    if isinstance(documento, dict):
+        for k, v in documento.items():
+            if k == clave and isinstance(v, (int, float)):
+                total += v
+            else:
+                total += _sumar_claves(v, clave)
+    elif isinstance(documento, list):
+        for elemento in documento:
+            total += _sumar_claves(elemento, clave)
+    return total
+
+
+class _MetricasMetodo:
+    def __init__(self):
+        self.llamadas = 0
+        self.errores = 0
+        self.segundos_total = 0.0
+        self.segundos_max = 0.0
+        self.buckets = [0] * len(BUCKETS_DURACION)
+        self.mongo_roundtrips = 0
+        self.redis_roundtrips = 0
+        self.documentos = 0
+        self.explain = None
+
+    def a_dict(self):
+        return {
+            'llamadas': self.llamadas,
+            'errores': self.errores,
+            'segundos_total': self.segundos_total,
+            'segundos_promedio': self.segundos_total / self.llamadas if self.llamadas else 0.0,
+            'segundos_max': self.segundos_max,
+            'mongo_roundtrips': self.mongo_roundtrips,
+            'redis_roundtrips': self.redis_roundtrips,
+            'documentos': self.documentos,
+            'explain': self.explain,
+        }
+
+
+class RegistroMetricas:
+    """Registro en memoria de las métricas de cada método del servicio.
+
+    Se exporta en formato de texto de Prometheus (a_prometheus) o como JSON (a_json).
+    """
+
+    def __init__(self, explain=False):
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._metodos = {}
+
+    def registrar(self, metodo, segundos, medicion, documentos, error, explain=None):
+        with self._lock:
+            m = self._metodos.setdefault(metodo, _MetricasMetodo())
+            m.llamadas += 1
+            m.errores += int(error)
+            m.segundos_total += segundos
+            m.segundos_max = max(m.segundos_max, segundos)
+            for i, limite in enumerate(BUCKETS_DURACION):
+                if segundos <= limite:
+                    m.buckets[i] += 1
+            m.mongo_roundtrips += medicion.mongo_roundtrips
+            m.redis_roundtrips += medicion.redis_roundtrips
+            m.documentos += documentos
+            if explain is not None:
+                m.explain = explain
+
+    def a_dict(self):
+        with self._lock:
+            return {metodo: m.a_dict() for metodo, m in sorted(self._metodos.items())}
+
+    def a_json(self):
+        return json.dumps(self.a_dict(), indent=2)
+
+    def a_prometheus(self):
+        with self._lock:
+            metodos = sorted(self._metodos.items())
+            lineas = []
+
+            def serie(nombre, tipo, ayuda, valores):
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+                lineas.extend(valores)
+
+            serie('aseguradora_metodo_duracion_segundos', 'histogram', 'Duración de cada método del servicio.', [
+                linea
+                for metodo, m in metodos
+                for linea in (
+                    [f'aseguradora_metodo_duracion_segundos_bucket{{metodo="{metodo}",le="{limite}"}} {cantidad}'
+                     for limite, cantidad in zip(BUCKETS_DURACION, m.buckets)]
+                    + [f'aseguradora_metodo_duracion_segundos_bucket{{metodo="{metodo}",le="+Inf"}} {m.llamadas}',
+                       f'aseguradora_metodo_duracion_segundos_sum{{metodo="{metodo}"}} {m.segundos_total}',
+                       f'aseguradora_metodo_duracion_segundos_count{{metodo="{metodo}"}} {m.llamadas}']
+                )
+            ])
+            for nombre, atributo, ayuda in (
+                ('aseguradora_metodo_errores_total', 'errores', 'Llamadas que terminaron en excepción.'),
+                ('aseguradora_mongo_roundtrips_total', 'mongo_roundtrips', 'Comandos enviados a MongoDB.'),
+                ('aseguradora_redis_roundtrips_total', 'redis_roundtrips', 'Round trips a Redis (un pipeline cuenta como uno).'),
+                ('aseguradora_documentos_devueltos_total', 'documentos', 'Documentos devueltos por el método.'),
+            ):
+                serie(nombre, 'counter', ayuda, [
+                    f'{nombre}{{metodo="{metodo}"}} {getattr(m, atributo)}' for metodo, m in metodos
+                ])
+            for nombre, clave, ayuda in (
+                ('aseguradora_explain_docs_examinados', 'docs_examinados', 'Documentos examinados en la última ejecución explicada.'),
+                ('aseguradora_explain_keys_examinadas', 'keys_examinadas', 'Claves de índice examinadas en la última ejecución explicada.'),
+            ):
+                serie(nombre, 'gauge', ayuda, [
+                    f'{nombre}{{metodo="{metodo}"}} {m.explain[clave]}' for metodo, m in metodos if m.explain
+                ])
+            return '\n'.join(lineas) + '\n'
+
+
+def _explicar(db, comandos):
+    """Ejecuta explain(executionStats) sobre los comandos capturados y suma lo examinado."""
+    docs = keys = 0
+    for nombre_db, comando in comandos:
+        try:
+            resultado = db.client[nombre_db].command('explain', comando, verbosity='executionStats')
+        except Exception as e:
+            log.warning(f"No se pudo obtener explain de {next(iter(comando))}: {e}")
+            continue
+        docs += _sumar_claves(resultado, 'totalDocsExamined')
+        keys += _sumar_claves(resultado, 'totalKeysExamined')
+    return {'docs_examinados': docs, 'keys_examinadas': keys, 'comandos': len(comandos)}
+
+
+def instrumentar_servicio(servicio, registro):
+    """Envuelve los métodos públicos de `servicio` (la instancia) para medirlos en `registro`.
+
+    Sólo se mide la llamada más externa: si q8 llama a siniestros_en_rango_fechas,
+    todo se registra en q8. Para contar round trips de Mongo, el MongoClient tiene
+    que tener LISTENER_MONGO entre sus event_listeners.
+    """
+    instrumentar_redis(servicio.r)
+    for nombre in dir(type(servicio)):
+        if nombre.startswith('_') or not callable(getattr(type(servicio), nombre)):
+            continue
+        setattr(servicio, nombre, _envolver(getattr(servicio, nombre), nombre, servicio.db, registro))
+    servicio.metricas = registro
+    return servicio
+
+
+def _envolver(metodo, nombre, db, registro):
+    if inspect.isgeneratorfunction(metodo):
+        return _envolver_generador(metodo, nombre, db, registro)
+
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        if _medicion_actual.get() is not None:
+            return metodo(*args, **kwargs)
+
+        medicion = _Medicion(capturar_comandos=registro.explain)
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        error = False
+        resultado = None
+        try:
+            resultado = metodo(*args, **kwargs)
+            return resultado
+        except Exception:
+            error = True
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            _medicion_actual.reset(token)
+            documentos = len(resultado) if isinstance(resultado, list) else 0
+            explain = _explicar(db, medicion.comandos) if medicion.comandos else None
+            registro.registrar(nombre, segundos, medicion, documentos, error, explain)
+    return envoltura
+
+
+def _envolver_generador(metodo, nombre, db, registro):
+    """Como _envolver, para métodos que devuelven un generador (p.ej. iterar_consulta).
+
+    La medición queda activa sólo mientras el generador produce cada documento: no
+    incluye el tiempo de quien los consume. Se registra al agotarlo o cerrarlo.
+    """
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        if _medicion_actual.get() is not None:
+            yield from metodo(*args, **kwargs)
+            return
+
+        medicion = _Medicion(capturar_comandos=registro.explain)
+        generador = metodo(*args, **kwargs)
+        segundos = 0.0
+        documentos = 0
+        error = False
+        try:
+            while True:
+                token = _medicion_actual.set(medicion)
+                inicio = time.perf_counter()
+                try:
+                    documento = next(generador)
+                except StopIteration:
+                    break
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    segundos += time.perf_counter() - inicio
+                    _medicion_actual.reset(token)
+                documentos += 1
+                yield documento
+        finally:
+            generador.close()
+            explain = _explicar(db, medicion.comandos) if medicion.comandos else None
+            registro.registrar(nombre, segundos, medicion, documentos, error, explain)
+    return envoltura
@@ -0,0 +1,93 @@
+# src/service/normalizacion.py
+
+from src.service.fechas import convertir_fechas_df
+
+# Valores canónicos de los campos categóricos. Se guardan así en Mongo para que
+# las consultas usen igualdad exacta (indexable) en lugar de $regex con 'i'.
+ESTADO_POLIZA_ACTIVA = 'Activa'
+ESTADO_POLIZA_VENCIDA = 'Vencida'
+ESTADO_POLIZA_SUSPENDIDA = 'Suspendida'
+ESTADOS_POLIZA = [ESTADO_POLIZA_ACTIVA, ESTADO_POLIZA_VENCIDA, ESTADO_POLIZA_SUSPENDIDA]
+
+ESTADO_SINIESTRO_ABIERTO = 'Abierto'
+ESTADO_SINIESTRO_CERRADO = 'Cerrado'
+ESTADO_SINIESTRO_EN_EVALUACION = 'En Evaluacion'
+ESTADOS_SINIESTRO = [ESTADO_SINIESTRO_ABIERTO, ESTADO_SINIESTRO_CERRADO, ESTADO_SINIESTRO_EN_EVALUACION]
+
+TIPO_POLIZA_AUTO = 'Auto'
+TIPO_SINIESTRO_ACCIDENTE = 'Accidente'
+
+# Campos categóricos por colección, y campos booleanos que pueden llegar como texto.
+CAMPOS_CATEGORICOS = {
+    'polizas': ['estado', 'tipo'],
+    'siniestros': ['estado', 'tipo'],
+}
+CAMPOS_BOOLEANOS = {
+    'clientes': ['activo', 'vehiculos.asegurado'],
+    'agentes': ['activo'],
+}
+
+_VERDADEROS = {'true', 'verdadero', 'si', 'sí', '1'}
+_FALSOS = {'false', 'falso', 'no', '0'}
+
+
+def normalizar_categoria(valor):
+    """Forma canónica de un estado/tipo: sin espacios sobrantes y en Title Case.
+
+    ' activa ' -> 'Activa', 'En  evaluacion' -> 'En Evaluacion'. Los valores que no
+    son texto se devuelven sin cambios.
+    """
+    if not isinstance(valor, str):
+        return valor
+    return ' '.join(valor.split()).title()
+
+
+def normalizar_booleano(valor):
+    """Convierte 'True'/'false'/'si'/1... a bool. Lanza ValueError si no es reconocible."""
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float)) and valor in (0, 1):
+        return bool(valor)
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto in _VERDADEROS:
+            return True
+        if texto in _FALSOS:
+            return False
+    raise ValueError(f"Valor booleano no reconocido: {valor!r}")
+
+
+def _ruta_sin_posiciones(ruta):
+    """'vehiculos.0.asegurado' o 'vehiculos.$[].asegurado' -> 'vehiculos.asegurado'."""
+    return '.'.join(parte for parte in ruta.split('.') if not (parte.isdigit() or parte.startswith('$')))
+
+
+def normalizar_booleanos(datos, coleccion):
+    """Convierte in place a bool los CAMPOS_BOOLEANOS de `coleccion` en `datos` (un documento o un $set).
+
+    Los reconoce también en rutas con punto y posiciones de array ('vehiculos.0.asegurado',
+    'vehiculos.$[].asegurado') y dentro de subdocumentos o listas ('vehiculos.0': {...}).
+    Lanza ValueError si alguno no es reconocible.
+    """
+    booleanos = set(CAMPOS_BOOLEANOS.get(coleccion, []))
+
+    def normalizar(valor, ruta):
+        if ruta in booleanos:
+            return normalizar_booleano(valor)
+        if isinstance(valor, dict):
+            return {clave: normalizar(v, _ruta_sin_posiciones(f"{ruta}.{clave}")) for clave, v in valor.items()}
+        if isinstance(valor, list):
+            return [normalizar(v, ruta) for v in valor]
+        return valor
+
+    for clave in list(datos):
+        datos[clave] = normalizar(datos[clave], _ruta_sin_posiciones(clave))
+    return datos
+
+
+def normalizar_df(df, coleccion):
+    """Normaliza in place un DataFrame a cargar en `coleccion`: categorías canónicas y fechas nativas."""
+    for campo in CAMPOS_CATEGORICOS.get(coleccion, []):
+        if campo in df.columns:
+            df[campo] = df[campo].map(normalizar_categoria)
+    return convertir_fechas_df(df, coleccion)
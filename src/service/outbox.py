@@ -0,0 +1,219 @@
+# src/service/outbox.py
+
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from src.logger import getLogger
+from src.service.fechas import timestamp_fecha
+from src.service.normalizacion import ESTADO_POLIZA_ACTIVA
+from src.service.vistas import (
+    KEY_AGENTE_STATS, KEY_CLIENTES_CON_POLIZA_ACTIVA, KEY_POLIZAS_ACTIVAS, KEY_RANKING_COBERTURA, clave_agente,
+    clave_ranking_tipo
+)
+
+# redis y src.service.cache (bson) se importan dentro de las funciones que los usan: las CLI
+# toman de acá sus defaults y su --help no los carga.
+
+log = getLogger(__name__)
+
+# Eventos de actualización de vistas pendientes de aplicar en Redis.
+COLECCION_OUTBOX = 'outbox_vistas'
+
+# Set con los ids de eventos ya aplicados en Redis pero todavía no borrados del outbox.
+KEY_OUTBOX_APLICADOS = 'outbox:aplicados'
+
+# Lease del trabajador que drena el outbox: su valor es el token del trabajador que lo tiene.
+KEY_OUTBOX_LEASE = 'outbox:trabajador'
+
+TIPO_POLIZA_EMITIDA = 'poliza_emitida'
+
+LOTE_DEFAULT = 500
+INTERVALO_DEFAULT = 0.5
+LEASE_MS_DEFAULT = 10000
+
+
+def evento_poliza(datos_poliza):
+    """Evento con lo necesario para reflejar una póliza emitida en las vistas de Redis."""
+    activa = datos_poliza['estado'] == ESTADO_POLIZA_ACTIVA
+    return {
+        'tipo': TIPO_POLIZA_EMITIDA,
+        'nro_poliza': str(datos_poliza['nro_poliza']),
+        'id_agente': clave_agente(datos_poliza['id_agente']),
+        'id_cliente': str(datos_poliza['id_cliente']),
+        'tipo_poliza': datos_poliza.get('tipo'),
+        'cobertura_total': datos_poliza['cobertura_total'],
+        'timestamp_activa': timestamp_fecha(datos_poliza['fecha_inicio']) if activa else None,
+    }
+
+
+def registrar_eventos(db, eventos):
+    if eventos:
+        db[COLECCION_OUTBOX].insert_many(eventos, ordered=False)
+
+
+def token_trabajador():
+    """Identificador de un trabajador de outbox: host, pid y un sufijo aleatorio."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def tomar_lease(r, token, lease_ms=LEASE_MS_DEFAULT):
+    """Toma el lease del trabajador, o lo renueva si ya es de `token`. Devuelve si quedó en manos de `token`."""
+    if r.set(KEY_OUTBOX_LEASE, token, nx=True, px=lease_ms):
+        return True
+    return _con_lease(r, token, lambda pipe: pipe.pexpire(KEY_OUTBOX_LEASE, lease_ms))
+
+
+def liberar_lease(r, token):
+    """Borra el lease si todavía es de `token`."""
+    _con_lease(r, token, lambda pipe: pipe.delete(KEY_OUTBOX_LEASE))
+
+
+def aplicar_eventos(db, r, limite=LOTE_DEFAULT, token=None):
+    """Aplica en Redis hasta `limite` eventos del outbox, en orden de llegada. Devuelve cuántos procesó.
+
+    Es idempotente: los incrementos de un lote y el registro de sus ids en
+    KEY_OUTBOX_APLICADOS van en el mismo MULTI/EXEC, y un evento cuyo id ya está en
+    ese set no se vuelve a aplicar (p.ej. si el proceso murió antes de borrarlo de
+    Mongo).
+
+    Con `token`, sólo aplica si ese trabajador tiene el lease (ver tomar_lease): el
+    MULTI/EXEC vigila KEY_OUTBOX_LEASE, así que si el lease venció y lo tomó otro
+    trabajador, el lote no se aplica y devuelve 0. Sin `token` no hay esa
+    protección: sólo sirve con un único trabajador por base.
+    """
+    eventos = list(db[COLECCION_OUTBOX].find().sort('_id', 1).limit(limite))
+    if not eventos:
+        return 0
+    ids = [str(evento['_id']) for evento in eventos]
+
+    pipe = r.pipeline(transaction=False)
+    for id_evento in ids:
+        pipe.sismember(KEY_OUTBOX_APLICADOS, id_evento)
+    ya_aplicados = pipe.execute()
+
+    pendientes = [evento for evento, aplicado in zip(eventos, ya_aplicados) if not aplicado]
+    if pendientes and not _con_lease(r, token, lambda pipe: _encolar_eventos(pipe, pendientes)):
+        log.warning("El trabajador perdió el lease del outbox; el lote no se aplicó.")
+        return 0
+
+    db[COLECCION_OUTBOX].delete_many({'_id': {'$in': [evento['_id'] for evento in eventos]}})
+    # También con el lease: si no, otro trabajador que ya leyó estos eventos podría verlos sin aplicar.
+    _con_lease(r, token, lambda pipe: pipe.srem(KEY_OUTBOX_APLICADOS, *ids))
+    return len(eventos)
+
+
+def _con_lease(r, token, encolar):
+    """Ejecuta en un MULTI/EXEC los comandos que `encolar` agrega al pipeline.
+
+    Con `token`, vigila KEY_OUTBOX_LEASE y no ejecuta nada (devuelve False) si el
+    lease no es de ese trabajador o cambia antes del EXEC.
+    """
+    from redis.exceptions import WatchError
+
+    with r.pipeline(transaction=True) as pipe:
+        try:
+            if token is not None:
+                pipe.watch(KEY_OUTBOX_LEASE)
+                if pipe.get(KEY_OUTBOX_LEASE) != token:
+                    return False
+                pipe.multi()
+            encolar(pipe)
+            pipe.execute()
+            return True
+        except WatchError:
+            return False
+
+
+def _encolar_eventos(pipe, eventos):
+    from src.service.cache import clave_version
+
+    for evento in eventos:
+        if evento['tipo'] != TIPO_POLIZA_EMITIDA:
+            log.warning(f"Evento de outbox de tipo desconocido '{evento['tipo']}' ({evento['_id']}); se descarta.")
+            continue
+        if evento['id_agente'] is not None:
+            pipe.hincrby(KEY_AGENTE_STATS, evento['id_agente'], 1)
+        pipe.zincrby(KEY_RANKING_COBERTURA, evento['cobertura_total'], evento['id_cliente'])
+        if evento.get('tipo_poliza'):
+            pipe.zincrby(clave_ranking_tipo(evento['tipo_poliza']), evento['cobertura_total'], evento['id_cliente'])
+        if evento['timestamp_activa'] is not None:
+            pipe.zadd(KEY_POLIZAS_ACTIVAS, {evento['nro_poliza']: evento['timestamp_activa']})
+            pipe.sadd(KEY_CLIENTES_CON_POLIZA_ACTIVA, evento['id_cliente'])
+    pipe.sadd(KEY_OUTBOX_APLICADOS, *[str(evento['_id']) for evento in eventos])
+    pipe.incr(clave_version('polizas'))
+
+
+def estado_outbox(db):
+    """Eventos pendientes y antigüedad del más viejo (cuánto van atrasadas las vistas de Redis)."""
+    coleccion = db[COLECCION_OUTBOX]
+    mas_viejo = coleccion.find_one({}, {'_id': 1}, sort=[('_id', 1)])
+    lag = 0.0
+    if mas_viejo is not None:
+        lag = max(0.0, (datetime.now(timezone.utc) - mas_viejo['_id'].generation_time).total_seconds())
+    return {'pendientes': coleccion.count_documents({}), 'lag_segundos': lag}
+
+
+class TrabajadorOutbox:
+    """Hilo que drena el outbox en lotes de `lote` eventos.
+
+    Si no hay eventos (o Redis falla) espera `intervalo` segundos antes de volver a
+    intentar; mientras tanto los eventos se acumulan en Mongo y el lag crece.
+
+    Sólo drena mientras tiene el lease de KEY_OUTBOX_LEASE (de `lease_ms`, renovado
+    en cada vuelta): con varios trabajadores, uno solo aplica eventos y los demás
+    esperan para tomarlo si ese se cae.
+    """
+
+    def __init__(self, db, r, lote=LOTE_DEFAULT, intervalo=INTERVALO_DEFAULT, lease_ms=LEASE_MS_DEFAULT):
+        self.db = db
+        self.r = r
+        self.lote = lote
+        self.intervalo = intervalo
+        self.lease_ms = lease_ms
+        self.token = token_trabajador()
+        self.aplicados = 0
+        self.errores = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ejecutar, name='outbox', daemon=True)
+
+    def tomar_lease(self):
+        """Intenta tomar el lease antes de iniciar. False si lo tiene otro trabajador."""
+        return tomar_lease(self.r, self.token, self.lease_ms)
+
+    def iniciar(self):
+        log.info(f"Trabajador de outbox {self.token} iniciado (lotes de {self.lote}, intervalo {self.intervalo}s).")
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        try:
+            liberar_lease(self.r, self.token)
+        except Exception as e:
+            log.error(f"No se pudo liberar el lease del outbox (vence solo en {self.lease_ms} ms): {e}")
+        log.info(f"Trabajador de outbox detenido ({self.aplicados} eventos aplicados, {self.errores} errores).")
+
+    def _ejecutar(self):
+        while not self._detener.is_set():
+            try:
+                if tomar_lease(self.r, self.token, self.lease_ms):
+                    procesados = aplicar_eventos(self.db, self.r, self.lote, token=self.token)
+                else:
+                    procesados = 0
+                self.aplicados += procesados
+            except Exception as e:
+                self.errores += 1
+                log.error(f"Error aplicando eventos del outbox: {e}")
+                procesados = 0
+            if procesados < self.lote:
+                self._detener.wait(self.intervalo)
+
+    def estadisticas(self):
+        return {
+            **estado_outbox(self.db), 'aplicados': self.aplicados, 'errores': self.errores,
+            'trabajador': self.token, 'trabajador_con_lease': self.r.get(KEY_OUTBOX_LEASE),
+        }
@@ -1,23 +1,137 @@
 # src/service/services.py
 
 from src.logger import getLogger
+from src.service import indices
+from src.service.consultas import (
+    BATCH_SIZE_STREAMING, CONSULTAS_LECTURA, MINIMO_Q11_DEFAULT, PAGINA_Q9_DEFAULT, TOP_Q7_DEFAULT
+)
+from src.service.cache import CacheConsultas, cacheable, clave_version, invalidar_colecciones
+from src.service.outbox import evento_poliza, registrar_eventos
+from src.service.derivados import (
+    CAMPO_ID_CLIENTE_SINIESTRO, CAMPO_NOMBRE_CLIENTE_SINIESTRO, CAMPO_VEHICULOS_ASEGURADOS,
+    UPDATE_VEHICULOS_ASEGURADOS, cambia_vehiculos, cliente_de_siniestro, contar_vehiculos_asegurados
+)
+from src.service.fechas import expr_fecha_texto, formatear_fecha, parsear_fecha, timestamp_fecha
+from src.service.vistas import (
+    KEY_CLIENTES, KEY_CLIENTES_CON_POLIZA_ACTIVA, KEY_NOMBRES_CLIENTES, KEY_RANKING_COBERTURA,
+    KEY_SINIESTROS_POR_AGENTE, PIPELINE_SINIESTROS_POR_AGENTE, clave_agente, clave_ranking_tipo, nombre_cliente
+)
+from src.service.normalizacion import (
+    ESTADO_POLIZA_ACTIVA, ESTADO_POLIZA_VENCIDA, ESTADO_POLIZA_SUSPENDIDA, ESTADOS_POLIZA,
+    ESTADO_SINIESTRO_ABIERTO, ESTADOS_SINIESTRO, TIPO_POLIZA_AUTO, TIPO_SINIESTRO_ACCIDENTE,
+    normalizar_booleanos, normalizar_categoria
+)
+from pymongo import InsertOne, UpdateMany, UpdateOne
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from redis import Redis
-from datetime import datetime, timedelta 
-import time
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 log = getLogger(__name__)
 
+# Clientes por cada $in con el que q4 trae de Mongo los datos de los ids que salen de Redis.
+LOTE_IN_CLIENTES = 1000
+
+# Campos de los clientes que devuelve q4.
+PROYECCION_Q4 = {
+    '_id': 0, 'id_cliente': 1, 'dni': 1, 'telefono': 1, 'nombre': 1, 'apellido': 1,
+    'email': 1, 'direccion': 1, 'ciudad': 1, 'provincia': 1, 'activo': 1
+}
+
+# Campos de un cliente que forman su nombre para mostrar (ver KEY_NOMBRES_CLIENTES).
+CAMPOS_NOMBRE_CLIENTE = {'nombre', 'apellido'}
+PROYECCION_NOMBRE_CLIENTE = {'_id': 0, 'id_cliente': 1, 'nombre': 1, 'apellido': 1}
+
+# Hilos para las verificaciones concurrentes de q15_emitir_poliza_rapida.
+HILOS_VERIFICACION = 8
+
+# Campos que cada ítem de los servicios en lote tiene que traer (los que q14/q15 indexan).
+CAMPOS_SINIESTRO_LOTE = ('id_siniestro', 'nro_poliza', 'fecha', 'tipo', 'estado')
+CAMPOS_POLIZA_LOTE = (
+    'nro_poliza', 'id_cliente', 'id_agente', 'tipo', 'fecha_inicio', 'fecha_fin', 'estado', 'cobertura_total'
+)
+
+
+def _resultado_item(ok, mensaje):
+    return {'ok': ok, 'mensaje': mensaje}
+
+
+def _validar_campos_lote(items, campos, resultados):
+    """Marca con error en `resultados` los ítems a los que les falta alguno de `campos`.
+
+    Así un ítem mal formado falla solo, en lugar de cortar el lote con un KeyError.
+    """
+    for i, datos in enumerate(items):
+        faltante = next((campo for campo in campos if campo not in datos), None)
+        if faltante is not None:
+            resultados[i] = _resultado_item(False, f"Error: falta {faltante}")
+
+
+def _bulk_write_no_ordenado(coleccion, operaciones):
+    """Ejecuta `operaciones` con un bulk_write no ordenado.
+
+    Devuelve {índice de operación: mensaje} con las operaciones que fallaron; el
+    resto quedó aplicado aunque alguna haya fallado.
+    """
+    if not operaciones:
+        return {}
+    try:
+        coleccion.bulk_write(operaciones, ordered=False)
+        return {}
+    except BulkWriteError as e:
+        return {
+            error['index']: error.get('errmsg', 'Error de escritura')
+            for error in e.details.get('writeErrors', [])
+        }
+
+
 class ServicioAseguradora:
-    def __init__(self, db_mongo: Database, r_redis: Redis):
+    def __init__(self, db_mongo: Database, r_redis: Redis, asegurar_indices: bool = True,
+                 cache: Optional[CacheConsultas] = None, outbox: bool = False):
         self.db = db_mongo
         self.r = r_redis
+        self.cache = cache
+        # Con outbox=True las emisiones de pólizas no tocan las vistas de Redis: registran
+        # un evento en Mongo que aplica src.service.outbox.TrabajadorOutbox.
+        self.outbox = outbox
+        # Pool de q15_emitir_poliza_rapida: se crea con la primera emisión rápida (ver cerrar()).
+        self._pool_verificacion = None
+        self._lock_pool = threading.Lock()
+        if asegurar_indices:
+            try:
+                indices.asegurar_indices(self.db)
+            except Exception as e:
+                log.error(f"No se pudieron verificar los índices de MongoDB: {e}")
+
+    def cerrar(self):
+        """Libera los hilos del servicio. Las conexiones son de quien las creó y no se cierran acá."""
+        with self._lock_pool:
+            if self._pool_verificacion is not None:
+                self._pool_verificacion.shutdown(wait=True)
+                self._pool_verificacion = None
+
+    def _pool(self):
+        with self._lock_pool:
+            if self._pool_verificacion is None:
+                self._pool_verificacion = ThreadPoolExecutor(
+                    max_workers=HILOS_VERIFICACION, thread_name_prefix='verificacion'
+                )
+            return self._pool_verificacion
+
     # --- CONSULTAS ---
 
+    @cacheable('clientes', 'polizas')
     def q1_clientes_activos_con_polizas(self):
         """1. Clientes activos con sus pólizas vigentes"""
         log.info("EJECUTANDO Q1 (Mongo): Clientes activos con pólizas vigentes")
-        pipeline = [
+        return list(self.db.clientes.aggregate(self._pipeline_q1()))
+
+    def _pipeline_q1(self):
+        return [
             { '$match': { 'activo': True } },
             {
                 '$lookup': {
@@ -25,7 +139,8 @@ class ServicioAseguradora:
                     'localField': 'id_cliente',
                     'foreignField': 'id_cliente',
                     'pipeline': [
-                        { '$match': { 'estado': { '$regex': '^activa$', '$options': 'i' } } }
+                        { '$match': { 'estado': ESTADO_POLIZA_ACTIVA } },
+                        { '$project': { '_id': 0, 'nro_poliza': 1 } }
                     ],
                     'as': 'polizas_vigentes'
                 }
@@ -39,38 +154,21 @@ class ServicioAseguradora:
                 }
             }
         ]
-        return list(self.db.clientes.aggregate(pipeline))
     
+    @cacheable('siniestros', 'polizas', 'clientes')
     def q2_siniestros_abiertos_con_cliente(self):
         log.info("EJECUTANDO Q2 (Mongo): Siniestros abiertos con cliente")
-        pipeline = [
+        return list(self.db.siniestros.aggregate(self._pipeline_q2()))
+
+    def _pipeline_q2(self):
+        # El cliente de la póliza viene embebido en el siniestro (ver src/service/derivados.py): sin joins.
+        return [
             {
                 '$match': {
-                    'estado': { '$regex': '^abierto$', '$options': 'i' }
-                }
-            },
-            {
-                '$lookup': {
-                    'from': 'polizas',
-                    'localField': 'nro_poliza',
-                    'foreignField': 'nro_poliza',
-                    'as': 'poliza_info'
+                    'estado': ESTADO_SINIESTRO_ABIERTO,
+                    CAMPO_NOMBRE_CLIENTE_SINIESTRO: { '$type': 'string' }
                 }
             },
-            {
-                '$unwind': '$poliza_info'
-            },
-            {
-                '$lookup': {
-                    'from': 'clientes',
-                    'localField': 'poliza_info.id_cliente',
-                    'foreignField': 'id_cliente',
-                    'as': 'cliente_info'
-                }
-            },
-            {
-                '$unwind': '$cliente_info'
-            },
             {
                 '$project': {
                     '_id': 0,
@@ -78,18 +176,18 @@ class ServicioAseguradora:
                     'tipo_siniestro': '$tipo',
                     'monto_estimado': '$monto_estimado',
                     'estado_siniestro': '$estado',
-                    'cliente_afectado': { 
-                        '$concat': ['$cliente_info.nombre', ' ', '$cliente_info.apellido'] 
-                    }
+                    'cliente_afectado': f'${CAMPO_NOMBRE_CLIENTE_SINIESTRO}'
                 }
             }
         ]
-        
-        return list(self.db.siniestros.aggregate(pipeline))
     
+    @cacheable('clientes', 'polizas')
     def q3_vehiculos_asegurados_con_cliente_poliza(self):
         log.info("EJECUTANDO Q3 (Mongo): Vehículos asegurados con cliente y póliza")
-        pipeline = [
+        return list(self.db.clientes.aggregate(self._pipeline_q3()))
+
+    def _pipeline_q3(self):
+        return [
             {
                 '$unwind': '$vehiculos'
             },
@@ -105,9 +203,10 @@ class ServicioAseguradora:
                     'foreignField': 'id_cliente',
                     'pipeline': [
                         { '$match': { 
-                            'tipo': { '$regex': '^auto$', '$options': 'i' }
+                            'tipo': TIPO_POLIZA_AUTO
                           } 
-                        }
+                        },
+                        { '$project': { '_id': 0, 'nro_poliza': 1 } }
                     ],
                     'as': 'polizas_info'
                 }
@@ -130,13 +229,66 @@ class ServicioAseguradora:
                 }
             }
         ]
-        
-        return list(self.db.clientes.aggregate(pipeline))
     
-    def q4_clientes_sin_polizas_activas(self):
-        log.info("EJECUTANDO Q4 (Mongo): Clientes sin pólizas activas")
-        
-        pipeline = [
+    @cacheable('clientes', 'polizas')
+    def q4_clientes_sin_polizas_activas(self, offset=0, limit=None, desde_mongo=False):
+        """4. Clientes sin pólizas activas, ordenados por id_cliente y paginados (limit=None: todos).
+
+        Por defecto los ids salen de la diferencia de los sets 'idx:clientes' e
+        'idx:clientes:con_poliza_activa' (un SDIFF) y los datos de esa página se
+        traen de Mongo con $in por lotes. Con desde_mongo=True (o si los sets no
+        existen) usa el anti-join con $lookup contra 'polizas', útil para verificarlos.
+        """
+        return list(self._iterar_q4(LOTE_IN_CLIENTES, offset, limit, desde_mongo))
+
+    def _iterar_q4(self, batch_size, offset=0, limit=None, desde_mongo=False):
+        if offset < 0 or (limit is not None and limit < 1):
+            log.error(f"Q4: offset debe ser >= 0 y limit >= 1 (recibido offset={offset}, limit={limit}).")
+            return
+        if not desde_mongo:
+            ids = self._q4_ids_desde_redis()
+            if ids is not None:
+                log.info(f"EJECUTANDO Q4 (Redis + Mongo): Clientes sin pólizas activas (offset={offset}, limit={limit})")
+                yield from self._q4_clientes(ids[offset:None if limit is None else offset + limit], batch_size)
+                return
+
+        log.info(f"EJECUTANDO Q4 (Mongo): Clientes sin pólizas activas (offset={offset}, limit={limit})")
+        yield from self.db.clientes.aggregate(self._pipeline_q4(offset, limit), batchSize=batch_size)
+
+    def _q4_ids_desde_redis(self):
+        """Ids (ordenados) de los clientes sin pólizas activas según Redis, o None si los sets no están."""
+        try:
+            pipe = self.r.pipeline(transaction=False)
+            pipe.exists(KEY_CLIENTES)
+            pipe.sdiff(KEY_CLIENTES, KEY_CLIENTES_CON_POLIZA_ACTIVA)
+            existe, ids = pipe.execute()
+        except Exception as e:
+            log.error(f"Error al consultar '{KEY_CLIENTES}' en Redis: {e}")
+            return None
+        if not existe:
+            log.warning(f"No se encontró '{KEY_CLIENTES}' en Redis. Se usa el anti-join en Mongo.")
+            return None
+        return sorted(ids, key=int)
+
+    def _q4_clientes(self, ids_ordenados, tamanio_lote):
+        """Datos de Mongo de los clientes, en el orden de `ids_ordenados`, con un $in por lote."""
+        for inicio in range(0, len(ids_ordenados), tamanio_lote):
+            lote = ids_ordenados[inicio:inicio + tamanio_lote]
+            clientes_por_id = {
+                str(cliente['id_cliente']): cliente
+                for cliente in self.db.clientes.find({'id_cliente': {'$in': [int(i) for i in lote]}}, PROYECCION_Q4)
+            }
+            for id_cliente in lote:
+                cliente = clientes_por_id.get(id_cliente)
+                if cliente is None:
+                    log.warning(f"Cliente {id_cliente} está en '{KEY_CLIENTES}' pero no en Mongo.")
+                    continue
+                yield cliente
+
+    def _pipeline_q4(self, offset=0, limit=None):
+        return [
+            # Recorre los clientes en el orden del índice de id_cliente: la paginación no necesita un sort en memoria.
+            { '$sort': { 'id_cliente': 1 } },
             {
                 '$lookup': {
                     'from': 'polizas',
@@ -144,9 +296,12 @@ class ServicioAseguradora:
                     'foreignField': 'id_cliente',
                     'pipeline': [
                         { '$match': { 
-                            'estado': { '$regex': '^activa$', '$options': 'i' }
+                            'estado': ESTADO_POLIZA_ACTIVA
                           } 
-                        }
+                        },
+                        # Sólo importa si existe alguna: alcanza con la primera y sin campos.
+                        { '$limit': 1 },
+                        { '$project': { '_id': 1 } }
                     ],
                     'as': 'polizas_activas'
                 }
@@ -156,43 +311,16 @@ class ServicioAseguradora:
                     'polizas_activas': { '$size': 0 } 
                 }
             },
-            {
-                '$project': {
-                    '_id': 0,
-                    'id_cliente': '$id_cliente',
-                    'dni': '$dni',
-                    'telefono': '$telefono',
-                    'nombre': '$nombre',
-                    'apellido': '$apellido',
-                    'email': '$email',
-                    'direccion': '$direccion',
-                    'ciudad': '$ciudad',
-                    'provincia': '$provincia',
-                    'telefono': '$telefono',
-                    'activo': '$activo'
-                }
-            }
+            { '$skip': offset },
+            *([{ '$limit': limit }] if limit is not None else []),
+            { '$project': PROYECCION_Q4 }
         ]
-        
-        return list(self.db.clientes.aggregate(pipeline))
     
+    @cacheable('agentes', 'polizas')
     def q5_agentes_activos_con_polizas(self):
         log.info("EJECUTANDO Q5 (Mongo + Redis): Agentes activos y conteo de pólizas")
         
-        pipeline_mongo = [
-            {
-                '$match': { 'activo': True }
-            },
-            {
-                '$project': {
-                    '_id': 0,
-                    'id_agente': '$id_agente',
-                    'nombre_completo': { '$concat': ['$nombre', ' ', '$apellido'] },
-                    'matricula': '$matricula'
-                }
-            }
-        ]
-        agentes_activos = list(self.db.agentes.aggregate(pipeline_mongo))
+        agentes_activos = list(self.db.agentes.aggregate(self._pipeline_q5()))
         
         try:
             conteo_polizas_hash = self.r.hgetall('agente:stats')
@@ -208,14 +336,32 @@ class ServicioAseguradora:
             resultado_final.append(agente)
             
         return resultado_final
+
+    def _pipeline_q5(self):
+        return [
+            {
+                '$match': { 'activo': True }
+            },
+            {
+                '$project': {
+                    '_id': 0,
+                    'id_agente': '$id_agente',
+                    'nombre_completo': { '$concat': ['$nombre', ' ', '$apellido'] },
+                    'matricula': '$matricula'
+                }
+            }
+        ]
     
+    @cacheable('polizas', 'clientes')
     def q6_polizas_vencidas_con_cliente(self):
         log.info("EJECUTANDO Q6 (Mongo): Pólizas vencidas con cliente")
-        
-        pipeline = [
+        return list(self.db.polizas.aggregate(self._pipeline_q6()))
+
+    def _pipeline_q6(self):
+        return [
             {
                 '$match': {
-                    'estado': { '$regex': '^vencida$', '$options': 'i' }
+                    'estado': ESTADO_POLIZA_VENCIDA
                 }
             },
             {
@@ -223,6 +369,9 @@ class ServicioAseguradora:
                     'from': 'clientes',
                     'localField': 'id_cliente',
                     'foreignField': 'id_cliente',
+                    'pipeline': [
+                        { '$project': { '_id': 0, 'nombre': 1, 'apellido': 1 } }
+                    ],
                     'as': 'cliente_info'
                 }
             },
@@ -234,140 +383,133 @@ class ServicioAseguradora:
                     '_id': 0,
                     'nro_poliza': '$nro_poliza',
                     'estado_poliza': '$estado',
-                    'fecha_fin': '$fecha_fin',
+                    'fecha_fin': expr_fecha_texto('fecha_fin'),
                     'cliente': { 
                         '$concat': ['$cliente_info.nombre', ' ', '$cliente_info.apellido'] 
                     }
                 }
             }
         ]
-        
-        return list(self.db.polizas.aggregate(pipeline))
     
     
-    def q7_top_10_clientes_cobertura(self):
-        log.info("EJECUTANDO Q7 (Redis + Mongo): Top 10 clientes por cobertura")
-        
+    @cacheable('polizas', 'clientes')
+    def q7_top_10_clientes_cobertura(self, n=TOP_Q7_DEFAULT, offset=0, tipo=None):
+        """7. Ranking de clientes por cobertura total: `n` posiciones desde `offset` (default: top 10).
+
+        Con `tipo` usa el ranking de las pólizas de ese tipo ('ranking:clientes:cobertura:<tipo>').
+        Los nombres salen del hash 'clientes:nombre': una página es un ZREVRANGE y un
+        HMGET. Sólo se va a Mongo por los clientes que falten en el hash, y se agregan.
+        """
+        clave_ranking = KEY_RANKING_COBERTURA if tipo is None else clave_ranking_tipo(normalizar_categoria(tipo))
+        log.info(f"EJECUTANDO Q7 (Redis): Ranking '{clave_ranking}' por cobertura (n={n}, offset={offset})")
+
+        if n < 1 or offset < 0:
+            log.error(f"Q7: n debe ser >= 1 y offset >= 0 (recibido n={n}, offset={offset}).")
+            return []
+
         try:
-            top_10_raw = self.r.zrevrange(
-                'ranking:clientes:cobertura', 
-                0, 
-                9,
-                withscores=True 
-            )
+            ranking_raw = self.r.zrevrange(clave_ranking, offset, offset + n - 1, withscores=True)
+            if not ranking_raw:
+                log.warning(f"No se encontraron datos en el ranking '{clave_ranking}' de Redis.")
+                return []
+            ids_str = [id_cliente for id_cliente, score in ranking_raw]
+            nombres = dict(zip(ids_str, self.r.hmget(KEY_NOMBRES_CLIENTES, ids_str)))
         except Exception as e:
             log.error(f"Error al consultar ranking en Redis: {e}")
             return []
 
-        if not top_10_raw:
-            log.warning("No se encontraron datos en el ranking 'ranking:clientes:cobertura' de Redis.")
-            return []
-
-    
-        top_10_ids_str = [id_cliente for id_cliente, score in top_10_raw]
         try:
-            top_10_ids_int = [int(id_str) for id_str in top_10_ids_str]
+            ids_int = [int(id_str) for id_str in ids_str]
         except ValueError as e:
-            log.error(f"Error convirtiendo IDs de cliente de Redis a int: {e}. IDs: {top_10_ids_str}")
+            log.error(f"Error convirtiendo IDs de cliente de Redis a int: {e}. IDs: {ids_str}")
             return [] 
 
-        pipeline_mongo = [
-            {
-                '$match': { 'id_cliente': { '$in': top_10_ids_int } }
-            },
-            {
-                '$project': {
-                    '_id': 0,
-                    'id_cliente': '$id_cliente',
-                    'nombre_completo': { '$concat': ['$nombre', ' ', '$apellido'] }
-                }
-            }
-        ]
-        clientes_info_list = list(self.db.clientes.aggregate(pipeline_mongo))
-        
-        clientes_lookup = {
-            cliente['id_cliente']: cliente['nombre_completo'] 
-            for cliente in clientes_info_list
-        }
+        faltantes = [int(id_str) for id_str, nombre in nombres.items() if nombre is None]
+        if faltantes:
+            log.warning(f"{len(faltantes)} clientes del ranking sin nombre en '{KEY_NOMBRES_CLIENTES}'. Se leen de Mongo.")
+            try:
+                nombres.update(self._actualizar_nombres_clientes(faltantes))
+            except Exception as e:
+                log.error(f"Error al completar '{KEY_NOMBRES_CLIENTES}': {e}")
 
         resultado_final = []
-        for id_cliente_str, score in top_10_raw:
-            id_cliente_int = int(id_cliente_str)
-            
-            nombre_cliente = clientes_lookup.get(id_cliente_int, "Nombre No Encontrado")
-            
+        for (id_cliente_str, score), id_cliente_int in zip(ranking_raw, ids_int):
             resultado_final.append({
                 'id_cliente': id_cliente_int,
-                'nombre_cliente': nombre_cliente,
+                'nombre_cliente': nombres.get(id_cliente_str) or "Nombre No Encontrado",
                 'cobertura_total_acumulada': float(score)
             })
             
         return resultado_final
     
-    def q8_siniestros_accidente_ultimo_anio(self):
-        log.info("EJECUTANDO Q8 (Mongo PURO): Siniestros 'Accidente' último año")
-        
-        pipeline = [
-            {
-                '$match': {
-                    'tipo': { '$regex': '^accidente$', '$options': 'i' }
-                }
-            },
-            {
-                '$addFields': {
-                    'fecha_dt': {
-                        '$dateFromString': {
-                            'dateString': '$fecha',
-                            'format': '%d/%m/%Y', 
-                            'onError': None 
-                        }
-                    }
-                }
-            },
+    def q8_siniestros_accidente_ultimo_anio(self, desde=None, hasta=None, tipo=TIPO_SINIESTRO_ACCIDENTE):
+        """8. Siniestros de `tipo` (default: 'Accidente'; None = todos) con fecha en [desde, hasta].
+
+        `desde` y `hasta` van como DD/MM/YYYY; por defecto, el último año (ver _rango_q8).
+        """
+        log.info(f"EJECUTANDO Q8 (Mongo PURO): Siniestros '{tipo or 'todos'}' entre {desde or 'hace un año'} y {hasta or 'hoy'}")
+
+        try:
+            desde, hasta = self._rango_q8(desde, hasta)
+        except ValueError:
+            log.error(f"Q8: Formato de fecha incorrecto (desde={desde}, hasta={hasta}). Use DD/MM/YYYY.")
+            return "Error: Formato de fecha incorrecto. Use DD/MM/YYYY."
+        return self.siniestros_en_rango_fechas(desde, hasta, tipo=tipo)
+
+    def _rango_q8(self, desde=None, hasta=None):
+        # Las fechas se guardan a las 00:00, así que alcanza con límites por día
+        # (hoy y los 364 días anteriores); además la clave de cache queda fija todo el día.
+        hoy = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        hasta = hoy if hasta is None else parsear_fecha(hasta)
+        desde = hoy - timedelta(days=364) if desde is None else parsear_fecha(desde)
+        return desde, hasta
+
+    @cacheable('siniestros')
+    def siniestros_en_rango_fechas(self, desde, hasta, tipo=None):
+        """Siniestros con fecha en [desde, hasta], opcionalmente de un tipo.
+
+        Con `tipo` es un range scan sobre el índice (tipo, fecha); sin él, sobre (fecha).
+        """
+        log.info(f"EJECUTANDO Siniestros por rango de fechas (Mongo): {desde} - {hasta}, tipo={tipo}")
+        return list(self.db.siniestros.aggregate(self._pipeline_siniestros_en_rango(desde, hasta, tipo)))
+
+    def _pipeline_siniestros_en_rango(self, desde, hasta, tipo=None):
+        filtro = { 'fecha': { '$gte': parsear_fecha(desde), '$lte': parsear_fecha(hasta) } }
+        if tipo is not None:
+            filtro['tipo'] = normalizar_categoria(tipo)
+
+        return [
             {
-                '$match': {
-                    '$expr': {
-                        '$let': {
-                            'vars': {
-                                'hoy': '$$NOW',
-                                'hace_un_anio': {
-                                    '$dateSubtract': {
-                                        'startDate': '$$NOW',
-                                        'unit': 'day',
-                                        'amount': 365
-                                    }
-                                }
-                            },
-                            'in': {
-                                '$and': [
-                                    { '$ne': ['$fecha_dt', None] }, 
-                                    { '$gte': ['$fecha_dt', '$$hace_un_anio'] },
-                                    { '$lte': ['$fecha_dt', '$$hoy'] }
-                                ]
-                            }
-                        }
-                    }
-                }
+                '$match': filtro
             },
             {
                 '$project': {
                     '_id': 0,
                     'id_siniestro': '$id_siniestro',
                     'tipo': '$tipo',
-                    'fecha_siniestro': '$fecha', 
+                    'fecha_siniestro': expr_fecha_texto('fecha'), 
                     'monto_estimado': '$monto_estimado',
                     'estado': '$estado'
                 }
             }
         ]
-        
-        return list(self.db.siniestros.aggregate(pipeline))
 
-    def q9_vista_polizas_activas_ordenadas(self):
-        log.info("EJECUTANDO Q9 (Redis + Mongo): Pólizas activas ordenadas")
+    @cacheable('polizas')
+    def q9_vista_polizas_activas_ordenadas(self, offset=0, limit=PAGINA_Q9_DEFAULT):
+        """9. Pólizas activas ordenadas por fecha de inicio, paginadas.
+
+        Sólo se lee de Redis la ventana [offset, offset + limit) del sorted set
+        (ZRANGE por rango, O(log N + limit)) y se reordena en memoria lo que
+        devuelve Mongo, así el costo de una página no depende del total.
+        """
+        log.info(f"EJECUTANDO Q9 (Redis + Mongo): Pólizas activas ordenadas (offset={offset}, limit={limit})")
         
+        if offset < 0 or limit < 1:
+            log.error(f"Q9: offset debe ser >= 0 y limit >= 1 (recibido offset={offset}, limit={limit}).")
+            return []
+
         try:
-            poliza_numeros_ordenados = self.r.zrange('idx:polizas:activas', 0, -1)
+            poliza_numeros_ordenados = self.r.zrange('idx:polizas:activas', offset, offset + limit - 1)
             
             if not poliza_numeros_ordenados:
                 log.warning("No se encontraron pólizas en 'idx:polizas:activas' de Redis.")
@@ -377,44 +519,46 @@ class ServicioAseguradora:
             log.error(f"Error al consultar índice 'idx:polizas:activas' en Redis: {e}")
             return []
 
-        pipeline_mongo = [
-            {
-                '$match': { 
-                    'nro_poliza': { '$in': poliza_numeros_ordenados } 
-                }
-            },
-            {
-                '$addFields': {
-                    'sort_order': {
-                        '$indexOfArray': [poliza_numeros_ordenados, '$nro_poliza']
-                    }
-                }
-            },
-            {
-                '$sort': { 'sort_order': 1 }
-            },
-            {
-                '$project': {
-                    '_id': 0,
-                    'nro_poliza': 1,
-                    'tipo': 1,
-                    'fecha_inicio': 1,
-                    'fecha_fin': 1,
-                    'cobertura_total': 1,
-                    'estado': 1
-                }
-            }
-        ]
-        
-        return list(self.db.polizas.aggregate(pipeline_mongo))
+        return self._q9_polizas(poliza_numeros_ordenados)
+
+    def _q9_polizas(self, poliza_numeros_ordenados):
+        """Datos de Mongo de las pólizas, en el orden de `poliza_numeros_ordenados`."""
+        proyeccion = {
+            '_id': 0,
+            'nro_poliza': 1,
+            'tipo': 1,
+            'fecha_inicio': 1,
+            'fecha_fin': 1,
+            'cobertura_total': 1,
+            'estado': 1
+        }
+        polizas_por_numero = {
+            poliza['nro_poliza']: poliza
+            for poliza in self.db.polizas.find({ 'nro_poliza': { '$in': poliza_numeros_ordenados } }, proyeccion)
+        }
+
+        resultado_final = []
+        for nro_poliza in poliza_numeros_ordenados:
+            poliza = polizas_por_numero.get(nro_poliza)
+            if poliza is None:
+                log.warning(f"Póliza {nro_poliza} está en 'idx:polizas:activas' pero no en MongoDB.")
+                continue
+            poliza['fecha_inicio'] = formatear_fecha(poliza.get('fecha_inicio'))
+            poliza['fecha_fin'] = formatear_fecha(poliza.get('fecha_fin'))
+            resultado_final.append(poliza)
+            
+        return resultado_final
     
+    @cacheable('polizas', 'clientes')
     def q10_polizas_suspendidas_estado_cliente(self):
         log.info("EJECUTANDO Q10 (Mongo): Pólizas suspendidas y estado del cliente")
-        
-        pipeline = [
+        return list(self.db.polizas.aggregate(self._pipeline_q10()))
+
+    def _pipeline_q10(self):
+        return [
             {
                 '$match': {
-                    'estado': { '$regex': '^suspendida$', '$options': 'i' }
+                    'estado': ESTADO_POLIZA_SUSPENDIDA
                 }
             },
             {
@@ -422,6 +566,9 @@ class ServicioAseguradora:
                     'from': 'clientes',
                     'localField': 'id_cliente',
                     'foreignField': 'id_cliente',
+                    'pipeline': [
+                        { '$project': { '_id': 0, 'nombre': 1, 'apellido': 1, 'activo': 1 } }
+                    ],
                     'as': 'cliente_info'
                 }
             },
@@ -440,29 +587,25 @@ class ServicioAseguradora:
                 }
             }
         ]
-        
-        return list(self.db.polizas.aggregate(pipeline))
 
-    def q11_clientes_con_mas_de_un_vehiculo(self):
-        log.info("EJECUTANDO Q11 (Mongo): Clientes con más de un vehículo asegurado")
-        
-        pipeline = [
+    @cacheable('clientes')
+    def q11_clientes_con_mas_de_un_vehiculo(self, minimo=MINIMO_Q11_DEFAULT):
+        """11. Clientes con al menos `minimo` vehículos asegurados (default: más de uno).
+
+        Filtra por el campo mantenido 'vehiculos_asegurados' (indexado), sin recorrer
+        el array de vehículos de cada cliente.
+        """
+        log.info(f"EJECUTANDO Q11 (Mongo): Clientes con al menos {minimo} vehículos asegurados")
+        if minimo < 0:
+            log.error(f"Q11: minimo debe ser >= 0 (recibido minimo={minimo}).")
+            return []
+        return list(self.db.clientes.aggregate(self._pipeline_q11(minimo)))
+
+    def _pipeline_q11(self, minimo=MINIMO_Q11_DEFAULT):
+        return [
             {
                 '$match': {
-                    '$expr': {
-                        '$gt': [
-                            {
-                                '$size': {
-                                    '$filter': {
-                                        'input': '$vehiculos', 
-                                        'as': 'v', 
-                                        'cond': { '$eq': ['$$v.asegurado', True] } 
-                                    }
-                                }
-                            },
-                            1 
-                        ]
-                    }
+                    CAMPO_VEHICULOS_ASEGURADOS: { '$gte': minimo }
                 }
             },
             {
@@ -480,35 +623,40 @@ class ServicioAseguradora:
                 }
             }
         ]
-        
-        return list(self.db.clientes.aggregate(pipeline))
     
-    def q12_agentes_y_siniestros_asociados(self):
+    @cacheable('siniestros', 'polizas', 'agentes')
+    def q12_agentes_y_siniestros_asociados(self, desde_mongo=False):
+        """12. Agentes con la cantidad de siniestros de sus pólizas.
+
+        Por defecto lee el hash 'agente:siniestros' (mantenido por el loader y S14) y
+        sólo consulta en Mongo los datos de esos agentes. Con desde_mongo=True (o si
+        el hash no existe) usa la agregación completa, útil para verificar el hash.
+        """
+        if not desde_mongo:
+            try:
+                conteo_hash = self.r.hgetall(KEY_SINIESTROS_POR_AGENTE)
+            except Exception as e:
+                log.error(f"Error al obtener '{KEY_SINIESTROS_POR_AGENTE}' de Redis: {e}")
+                conteo_hash = {}
+
+            if conteo_hash:
+                log.info("EJECUTANDO Q12 (Redis + Mongo): Conteo de siniestros por agente")
+                return self._q12_desde_redis(conteo_hash)
+            log.warning(f"No se encontró '{KEY_SINIESTROS_POR_AGENTE}' en Redis. Se usa la agregación completa.")
+
         log.info("EJECUTANDO Q12 (Mongo): Conteo de siniestros por agente")
-        
-        pipeline = [
-            {
-                '$lookup': {
-                    'from': 'polizas',
-                    'localField': 'nro_poliza',
-                    'foreignField': 'nro_poliza',
-                    'as': 'poliza_info'
-                }
-            },
-            {
-                '$unwind': '$poliza_info'
-            },
-            {
-                '$group': {
-                    '_id': '$poliza_info.id_agente', 
-                    'cantidad_siniestros': { '$sum': 1 } 
-                }
-            },
+        return list(self.db.siniestros.aggregate(self._pipeline_q12()))
+
+    def _pipeline_q12(self):
+        return PIPELINE_SINIESTROS_POR_AGENTE + [
             {
                 '$lookup': {
                     'from': 'agentes',
                     'localField': '_id',
                     'foreignField': 'id_agente',
+                    'pipeline': [
+                        { '$project': { '_id': 0, 'id_agente': 1, 'nombre': 1, 'apellido': 1, 'matricula': 1 } }
+                    ],
                     'as': 'agente_info'
                 }
             },
@@ -532,13 +680,137 @@ class ServicioAseguradora:
                 }
             }
         ]
-        
-        return list(self.db.siniestros.aggregate(pipeline))
+
+    def _q12_desde_redis(self, conteo_hash):
+        conteo_por_agente = {int(id_agente): int(cantidad) for id_agente, cantidad in conteo_hash.items()}
+        pipeline_mongo = [
+            {
+                '$match': { 'id_agente': { '$in': list(conteo_por_agente) } }
+            },
+            {
+                '$project': {
+                    '_id': 0,
+                    'id_agente': '$id_agente',
+                    'nombre_agente': { '$concat': ['$nombre', ' ', '$apellido'] },
+                    'matricula': '$matricula'
+                }
+            }
+        ]
+
+        resultado_final = []
+        for agente in self.db.agentes.aggregate(pipeline_mongo):
+            cantidad = conteo_por_agente.get(int(agente['id_agente']), 0)
+            if cantidad > 0:
+                agente['cantidad_siniestros'] = cantidad
+                resultado_final.append(agente)
+
+        resultado_final.sort(key=lambda agente: agente['cantidad_siniestros'], reverse=True)
+        return resultado_final
     
+    # --- CONSULTAS EN STREAMING ---
+
+    def iterar_consulta(self, query_num, batch_size=BATCH_SIZE_STREAMING, **parametros):
+        """Versión en streaming de la consulta de lectura `query_num` (ver CONSULTAS_LECTURA).
+
+        Devuelve los mismos documentos que el método de la consulta, pero de a uno y
+        a medida que llegan del cursor en lotes de `batch_size`: la memoria no depende
+        del tamaño del resultado. No usa el cache de consultas. Q9 recorre el índice de
+        Redis por ventanas de `batch_size` desde `offset` (sin `limit`, hasta el final).
+        """
+        query_num = str(query_num)
+        if query_num not in CONSULTAS_LECTURA:
+            log.error(f"Número de consulta '{query_num}' no válido para streaming. Debe ser de 1 a 12.")
+            return
+        log.info(f"EJECUTANDO Q{query_num} en streaming (batchSize={batch_size})")
+
+        if query_num == '5':
+            try:
+                conteo_polizas_hash = self.r.hgetall('agente:stats')
+            except Exception as e:
+                log.error(f"Error al obtener 'agente:stats' de Redis: {e}")
+                return
+            for agente in self.db.agentes.aggregate(self._pipeline_q5(), batchSize=batch_size):
+                agente['cantidad_polizas'] = int(conteo_polizas_hash.get(str(agente['id_agente']), '0'))
+                yield agente
+
+        elif query_num == '7':
+            # Una página del ranking: acotada por `n`.
+            yield from self.q7_top_10_clientes_cobertura(**parametros)
+
+        elif query_num == '4':
+            yield from self._iterar_q4(batch_size, **parametros)
+
+        elif query_num == '9':
+            yield from self._iterar_q9(batch_size, **parametros)
+
+        elif query_num == '12' and not parametros.get('desde_mongo'):
+            try:
+                conteo_hash = self.r.hgetall(KEY_SINIESTROS_POR_AGENTE)
+            except Exception as e:
+                log.error(f"Error al obtener '{KEY_SINIESTROS_POR_AGENTE}' de Redis: {e}")
+                conteo_hash = {}
+            if conteo_hash:
+                # Ya ordenado en memoria: son tantos documentos como agentes con siniestros.
+                yield from self._q12_desde_redis(conteo_hash)
+            else:
+                log.warning(f"No se encontró '{KEY_SINIESTROS_POR_AGENTE}' en Redis. Se usa la agregación completa.")
+                yield from self.db.siniestros.aggregate(self._pipeline_q12(), batchSize=batch_size)
+
+        else:
+            coleccion, pipeline = {
+                '1': ('clientes', self._pipeline_q1),
+                '2': ('siniestros', self._pipeline_q2),
+                '3': ('clientes', self._pipeline_q3),
+                '6': ('polizas', self._pipeline_q6),
+                '8': ('siniestros', lambda: self._pipeline_siniestros_en_rango(
+                    *self._rango_q8(parametros.get('desde'), parametros.get('hasta')),
+                    tipo=parametros.get('tipo', TIPO_SINIESTRO_ACCIDENTE))),
+                '10': ('polizas', self._pipeline_q10),
+                '11': ('clientes', lambda: self._pipeline_q11(**parametros)),
+                '12': ('siniestros', self._pipeline_q12),
+            }[query_num]
+            try:
+                etapas = pipeline()
+            except ValueError as e:
+                log.error(f"Q{query_num}: parámetros inválidos ({e}). Las fechas van como DD/MM/YYYY.")
+                return
+            yield from self.db[coleccion].aggregate(etapas, batchSize=batch_size)
+
+    def _iterar_q9(self, batch_size, offset=0, limit=None):
+        if offset < 0 or (limit is not None and limit < 1):
+            log.error(f"Q9: offset debe ser >= 0 y limit >= 1 (recibido offset={offset}, limit={limit}).")
+            return
+        fin = None if limit is None else offset + limit
+        while fin is None or offset < fin:
+            tope = offset + batch_size if fin is None else min(offset + batch_size, fin)
+            try:
+                ventana = self.r.zrange('idx:polizas:activas', offset, tope - 1)
+            except Exception as e:
+                log.error(f"Error al consultar índice 'idx:polizas:activas' en Redis: {e}")
+                return
+            if not ventana:
+                return
+            yield from self._q9_polizas(ventana)
+            offset += len(ventana)
+
+    def _normalizar_datos_cliente(self, datos):
+        """Guarda 'activo' y 'asegurado' de los vehículos como bool, aunque lleguen como texto desde la CLI.
+
+        También en los $set con rutas como 'vehiculos.0.asegurado'.
+        """
+        normalizar_booleanos(datos, 'clientes')
+
     def q13_abm_clientes(self, accion, datos=None, cliente_id=None):
             log.info(f"EJECUTANDO S13 (Mongo): ABM Cliente - {accion}")
             
             try:
+                if datos:
+                    try:
+                        self._normalizar_datos_cliente(datos)
+                    except ValueError as e:
+                        log.warning(f"ABM {accion}: {e}")
+                        return f"Error: {e}"
+
                 if accion == 'alta' and datos:
                     
                     cliente_existente = self.db.clientes.find_one({'id_cliente': datos['id_cliente']})
@@ -556,6 +828,7 @@ class ServicioAseguradora:
                                 { 'id_cliente': datos['id_cliente'] },
                                 { '$set': { 'activo': True } } # Se reactiva (decisión del equipo)
                             )
+                            invalidar_colecciones(self.r, 'clientes')
                             return f"Cliente {datos['id_cliente']} ha sido reactivado (datos originales conservados)."
                     
                     # --- CASO 3: Cliente NO existe ---
@@ -565,8 +838,20 @@ class ServicioAseguradora:
                             datos['activo'] = True
                         if 'vehiculos' not in datos:
                             datos['vehiculos'] = []
+                        datos[CAMPO_VEHICULOS_ASEGURADOS] = contar_vehiculos_asegurados(datos['vehiculos'])
                         
                         result = self.db.clientes.insert_one(datos)
+                        try:
+                            pipe = self.r.pipeline(transaction=False)
+                            pipe.hset(KEY_NOMBRES_CLIENTES, str(datos['id_cliente']), nombre_cliente(datos))
+                            pipe.sadd(KEY_CLIENTES, str(datos['id_cliente']))
+                            pipe.execute()
+                        except Exception as e_redis:
+                            log.error(f"Cliente {datos['id_cliente']} creado pero falló la actualización de las vistas de clientes: {e_redis}")
+                            return f"Error CRÍTICO: Cliente creado en Mongo ({result.inserted_id}) pero falló la actualización en Redis."
+                        finally:
+                            # Después de las vistas: una lectura concurrente no puede cachear las viejas con la versión nueva.
+                            invalidar_colecciones(self.r, 'clientes')
                         return f"Cliente NUEVO creado con ID de Mongo: {result.inserted_id}"
 
                 # --- MODIFICACIÓN ---
@@ -578,7 +863,21 @@ class ServicioAseguradora:
                     if result.matched_count == 0:
                         log.warning(f"ABM Modificar: No se encontró cliente con ID {cliente_id}.")
                         return f"Error: No se encontró el cliente con ID {cliente_id} para modificar."
+                    if cambia_vehiculos(datos):
+                        # Se recalcula en el servidor sobre el array ya modificado.
+                        self.db.clientes.update_one({ 'id_cliente': cliente_id }, UPDATE_VEHICULOS_ASEGURADOS)
                     
+                    try:
+                        if CAMPOS_NOMBRE_CLIENTE & set(datos):
+                            nombres = self._nombres_clientes([cliente_id])
+                            self._propagar_nombres_a_siniestros(nombres)
+                            try:
+                                self._actualizar_nombres_clientes([cliente_id], nombres)
+                            except Exception as e_redis:
+                                log.error(f"Cliente {cliente_id} modificado pero falló la actualización de '{KEY_NOMBRES_CLIENTES}': {e_redis}")
+                                return f"Error CRÍTICO: Cliente ID {cliente_id} modificado en Mongo pero falló la actualización en Redis."
+                    finally:
+                        invalidar_colecciones(self.r, 'clientes')
                     return f"Cliente ID {cliente_id} modificado. Documentos afectados: {result.modified_count}"
 
                 # --- BAJA ---
@@ -591,6 +890,7 @@ class ServicioAseguradora:
                         log.warning(f"ABM Baja: No se encontró cliente con ID {cliente_id}.")
                         return f"Error: No se encontró el cliente con ID {cliente_id} para dar de baja."
                     
+                    invalidar_colecciones(self.r, 'clientes')
                     return f"Cliente ID {cliente_id} dado de baja (lógica). Documentos afectados: {result.modified_count}"
 
                 # --- Error de input ---
@@ -602,8 +902,38 @@ class ServicioAseguradora:
                 log.error(f"Error inesperado en ABM Clientes: {e}")
                 return f"Error inesperado en ABM Clientes: {e}"
         
+    def _nombres_clientes(self, ids_cliente):
+        """{id_cliente: nombre para mostrar} actual (en Mongo) de `ids_cliente`."""
+        return {
+            cliente['id_cliente']: nombre_cliente(cliente)
+            for cliente in self.db.clientes.find({'id_cliente': {'$in': list(ids_cliente)}}, PROYECCION_NOMBRE_CLIENTE)
+        }
+
+    def _actualizar_nombres_clientes(self, ids_cliente, nombres=None):
+        """Copia a 'clientes:nombre' el nombre para mostrar actual (en Mongo) de `ids_cliente`.
+
+        `nombres` evita volver a leerlos si ya se tienen de _nombres_clientes.
+        """
+        nombres = self._nombres_clientes(ids_cliente) if nombres is None else nombres
+        nombres = {str(id_cliente): nombre for id_cliente, nombre in nombres.items()}
+        if nombres:
+            self.r.hset(KEY_NOMBRES_CLIENTES, mapping=nombres)
+        return nombres
+
+    def _propagar_nombres_a_siniestros(self, nombres):
+        """Copia `nombres` ({id_cliente: nombre}) a los siniestros de cada cliente (índice siniestros.id_cliente)."""
+        if not nombres:
+            return 0
+        result = self.db.siniestros.bulk_write([
+            UpdateMany({CAMPO_ID_CLIENTE_SINIESTRO: id_cliente}, {'$set': {CAMPO_NOMBRE_CLIENTE_SINIESTRO: nombre}})
+            for id_cliente, nombre in nombres.items()
+        ], ordered=False)
+        if result.modified_count:
+            invalidar_colecciones(self.r, 'siniestros')
+        return result.modified_count
+        
     def q14_alta_siniestro(self, datos_siniestro):
-        log.info("EJECUTANDO S14 (Mongo): Alta Siniestro")
+        log.info("EJECUTANDO S14 (Mongo + Redis): Alta Siniestro")
             
         try:
             poliza = self.db.polizas.find_one({'nro_poliza': datos_siniestro['nro_poliza']})
@@ -615,20 +945,34 @@ class ServicioAseguradora:
                 log.warning(f"Alta Siniestro: id_siniestro {datos_siniestro['id_siniestro']} ya existe.")
                 return "Error: id_siniestro ya existe."
 
-            ESTADOS_VALIDOS = ['Abierto', 'Cerrado', 'En Evaluacion']
-            estado_normalizado = datos_siniestro['estado'].strip().title()
-            if estado_normalizado not in ESTADOS_VALIDOS:
+            estado_normalizado = normalizar_categoria(datos_siniestro['estado'])
+            if estado_normalizado not in ESTADOS_SINIESTRO:
                 log.warning(f"Alta Siniestro: Estado '{datos_siniestro['estado']}' no es válido.")
-                return f"Error: Estado no válido. Debe ser uno de: {ESTADOS_VALIDOS}"
+                return f"Error: Estado no válido. Debe ser uno de: {ESTADOS_SINIESTRO}"
             datos_siniestro['estado'] = estado_normalizado
+            datos_siniestro['tipo'] = normalizar_categoria(datos_siniestro['tipo'])
+
+            cliente = self.db.clientes.find_one({'id_cliente': poliza.get('id_cliente')}, PROYECCION_NOMBRE_CLIENTE)
+            if cliente:
+                datos_siniestro.update(cliente_de_siniestro(cliente))
             
             try:
-                datetime.strptime(datos_siniestro['fecha'], '%d/%m/%Y')
+                datos_siniestro['fecha'] = parsear_fecha(datos_siniestro['fecha'])
             except ValueError:
                 log.error(f"Alta Siniestro: Formato de fecha incorrecto. Use DD/MM/YYYY.")
                 return "Error: Formato de fecha incorrecto. Use DD/MM/YYYY."
                 
             result = self.db.siniestros.insert_one(datos_siniestro)
+
+            id_agente_key = clave_agente(poliza.get('id_agente'))
+            try:
+                if id_agente_key is not None:
+                    self.r.hincrby(KEY_SINIESTROS_POR_AGENTE, id_agente_key, 1)
+            except Exception as e_redis:
+                log.error(f"Siniestro {result.inserted_id} insertado pero falló la actualización de '{KEY_SINIESTROS_POR_AGENTE}': {e_redis}")
+                return f"Error CRÍTICO: Siniestro insertado en Mongo ({result.inserted_id}) pero falló la actualización en Redis."
+            finally:
+                invalidar_colecciones(self.r, 'siniestros')
             return f"Siniestro creado con ID de Mongo: {result.inserted_id}"
         
         except Exception as e:
@@ -651,25 +995,31 @@ class ServicioAseguradora:
                     return "Error: nro_poliza ya existe."
 
                 try:
-                    fecha_inicio_dt = datetime.strptime(datos_poliza['fecha_inicio'], '%d/%m/%Y')
-                    datetime.strptime(datos_poliza['fecha_fin'], '%d/%m/%Y')
+                    fecha_inicio_dt = parsear_fecha(datos_poliza['fecha_inicio'])
+                    fecha_fin_dt = parsear_fecha(datos_poliza['fecha_fin'])
                 except ValueError:
                     log.error(f"Emisión Póliza: Formato de fecha incorrecto (ej: {datos_poliza['fecha_inicio']}). Use DD/MM/YYYY.")
                     return "Error: Formato de fecha incorrecto. Use DD/MM/YYYY."
 
-                ESTADOS_VALIDOS = ['Activa', 'Vencida', 'Suspendida']
+                estado_normalizado = normalizar_categoria(datos_poliza['estado'])
                 
-                estado_normalizado = datos_poliza['estado'].strip().title()
-                
-                if estado_normalizado not in ESTADOS_VALIDOS:
+                if estado_normalizado not in ESTADOS_POLIZA:
                     log.warning(f"Emisión Póliza: Estado '{datos_poliza['estado']}' no es válido.")
-                    return f"Error: Estado no válido. Debe ser uno de: {ESTADOS_VALIDOS}"
+                    return f"Error: Estado no válido. Debe ser uno de: {ESTADOS_POLIZA}"
                 
                 datos_poliza['estado'] = estado_normalizado
+                datos_poliza['tipo'] = normalizar_categoria(datos_poliza['tipo'])
+                datos_poliza['fecha_inicio'] = fecha_inicio_dt
+                datos_poliza['fecha_fin'] = fecha_fin_dt
 
                 result = self.db.polizas.insert_one(datos_poliza)
                 poliza_id_mongo = result.inserted_id
                 log.info(f"Póliza {datos_poliza['nro_poliza']} insertada en MongoDB.")
+
+                if self.outbox:
+                    # Las vistas las actualiza el trabajador del outbox, que vuelve a incrementar la versión.
+                    invalidar_colecciones(self.r, 'polizas')
+                    return self._registrar_evento_poliza(datos_poliza, poliza_id_mongo)
                 
                 try:
                     self.r.hincrby('agente:stats', str(datos_poliza['id_agente']), 1)
@@ -677,10 +1027,14 @@ class ServicioAseguradora:
                     self.r.zincrby('ranking:clientes:cobertura', 
                                 datos_poliza['cobertura_total'], 
                                 str(datos_poliza['id_cliente']))
+                    if datos_poliza['tipo']:
+                        self.r.zincrby(clave_ranking_tipo(datos_poliza['tipo']),
+                                       datos_poliza['cobertura_total'], str(datos_poliza['id_cliente']))
                     
-                    if estado_normalizado.lower() == 'activa':
-                        timestamp = int(time.mktime(fecha_inicio_dt.timetuple()))
+                    if estado_normalizado == ESTADO_POLIZA_ACTIVA:
+                        timestamp = timestamp_fecha(fecha_inicio_dt)
                         self.r.zadd('idx:polizas:activas', {str(datos_poliza['nro_poliza']): timestamp})
+                        self.r.sadd(KEY_CLIENTES_CON_POLIZA_ACTIVA, str(datos_poliza['id_cliente']))
                     
                     log.info(f"Póliza {datos_poliza['nro_poliza']} actualizada en vistas de Redis.")
                     return f"Póliza emitida. Mongo ID: {poliza_id_mongo}. Vistas de Redis actualizadas."
@@ -688,7 +1042,444 @@ class ServicioAseguradora:
                 except Exception as e_redis:
                     log.error(f"Error CRÍTICO actualizando Redis. Póliza {poliza_id_mongo} insertada en Mongo pero Redis falló: {e_redis}")
                     return f"Error CRÍTICO: Póliza insertada en Mongo ({poliza_id_mongo}) pero falló la actualización en Redis."
+                finally:
+                    # Después de las vistas: una lectura concurrente no puede cachear las viejas con la versión nueva.
+                    invalidar_colecciones(self.r, 'polizas')
             
             except Exception as e:
                 log.error(f"Error en Emisión de Póliza: {e}")
-                return f"Error en Emisión de Póliza: {e}"
\ No newline at end of file
+                return f"Error en Emisión de Póliza: {e}"
+
+    def _nro_poliza_existe(self, nro_poliza):
+        # q15 informa un nro_poliza repetido antes que las fechas o el estado inválidos.
+        return self.db.polizas.find_one({'nro_poliza': nro_poliza}, {'_id': 1}) is not None
+
+    def _registrar_evento_poliza(self, datos_poliza, poliza_id_mongo):
+        try:
+            registrar_eventos(self.db, [evento_poliza(datos_poliza)])
+        except Exception as e_outbox:
+            log.error(f"Error CRÍTICO: Póliza {poliza_id_mongo} insertada en Mongo pero no se pudo registrar en el outbox: {e_outbox}")
+            return f"Error CRÍTICO: Póliza insertada en Mongo ({poliza_id_mongo}) pero no se registró el evento en el outbox."
+        log.info(f"Póliza {datos_poliza['nro_poliza']} registrada en el outbox de vistas.")
+        return f"Póliza emitida. Mongo ID: {poliza_id_mongo}. Vistas de Redis encoladas en el outbox."
+
+    def q15_emitir_poliza_rapida(self, datos_poliza):
+        """Emisión de póliza de baja latencia: mismas validaciones, en el mismo orden, y resultados que q15.
+
+        - Verifica en paralelo cliente y agente (sólo el campo 'activo').
+        - No busca antes si el nro_poliza existe: lo rechaza el índice único (DuplicateKeyError).
+          Sólo si las fechas o el estado son inválidos se consulta, para devolver el error que daría q15.
+        - Aplica las vistas de Redis y la invalidación del cache en un único MULTI/EXEC.
+
+        Quedan 3 round trips en serie (verificación, insert, Redis) en lugar de 8.
+        """
+        log.info("EJECUTANDO S15 rápida (Mongo + Redis): Emisión de Póliza")
+
+        try:
+            proyeccion = {'_id': 0, 'activo': 1}
+            pool = self._pool()
+            # copy_context: el hilo del pool ve el mismo contexto (p.ej. la medición de src.service.metricas).
+            futuro_cliente = pool.submit(
+                contextvars.copy_context().run,
+                self.db.clientes.find_one, {'id_cliente': datos_poliza['id_cliente']}, proyeccion
+            )
+            agente = self.db.agentes.find_one({'id_agente': datos_poliza['id_agente']}, proyeccion)
+            cliente = futuro_cliente.result()
+
+            if not cliente or not agente:
+                return "Error: Cliente o Agente no existen."
+            if not cliente.get('activo') or not agente.get('activo'):
+                return "Error: Cliente o Agente no están activos."
+
+            try:
+                fecha_inicio_dt = parsear_fecha(datos_poliza['fecha_inicio'])
+                fecha_fin_dt = parsear_fecha(datos_poliza['fecha_fin'])
+            except ValueError:
+                if self._nro_poliza_existe(datos_poliza['nro_poliza']):
+                    return "Error: nro_poliza ya existe."
+                log.error(f"Emisión Póliza: Formato de fecha incorrecto (ej: {datos_poliza['fecha_inicio']}). Use DD/MM/YYYY.")
+                return "Error: Formato de fecha incorrecto. Use DD/MM/YYYY."
+
+            estado_normalizado = normalizar_categoria(datos_poliza['estado'])
+            if estado_normalizado not in ESTADOS_POLIZA:
+                if self._nro_poliza_existe(datos_poliza['nro_poliza']):
+                    return "Error: nro_poliza ya existe."
+                log.warning(f"Emisión Póliza: Estado '{datos_poliza['estado']}' no es válido.")
+                return f"Error: Estado no válido. Debe ser uno de: {ESTADOS_POLIZA}"
+
+            datos_poliza['estado'] = estado_normalizado
+            datos_poliza['tipo'] = normalizar_categoria(datos_poliza['tipo'])
+            datos_poliza['fecha_inicio'] = fecha_inicio_dt
+            datos_poliza['fecha_fin'] = fecha_fin_dt
+
+            try:
+                poliza_id_mongo = self.db.polizas.insert_one(datos_poliza).inserted_id
+            except DuplicateKeyError:
+                return "Error: nro_poliza ya existe."
+            log.info(f"Póliza {datos_poliza['nro_poliza']} insertada en MongoDB.")
+
+            if self.outbox:
+                invalidar_colecciones(self.r, 'polizas')
+                return self._registrar_evento_poliza(datos_poliza, poliza_id_mongo)
+
+            try:
+                pipe = self.r.pipeline(transaction=True)
+                pipe.incr(clave_version('polizas'))
+                pipe.hincrby('agente:stats', str(datos_poliza['id_agente']), 1)
+                pipe.zincrby('ranking:clientes:cobertura', datos_poliza['cobertura_total'], str(datos_poliza['id_cliente']))
+                if datos_poliza['tipo']:
+                    pipe.zincrby(clave_ranking_tipo(datos_poliza['tipo']), datos_poliza['cobertura_total'],
+                                 str(datos_poliza['id_cliente']))
+                if estado_normalizado == ESTADO_POLIZA_ACTIVA:
+                    pipe.zadd('idx:polizas:activas', {str(datos_poliza['nro_poliza']): timestamp_fecha(fecha_inicio_dt)})
+                    pipe.sadd(KEY_CLIENTES_CON_POLIZA_ACTIVA, str(datos_poliza['id_cliente']))
+                pipe.execute()
+            except Exception as e_redis:
+                log.error(f"Error CRÍTICO actualizando Redis. Póliza {poliza_id_mongo} insertada en Mongo pero Redis falló: {e_redis}")
+                # El MULTI no se aplicó: la versión tampoco subió.
+                invalidar_colecciones(self.r, 'polizas')
+                return f"Error CRÍTICO: Póliza insertada en Mongo ({poliza_id_mongo}) pero falló la actualización en Redis."
+
+            return f"Póliza emitida. Mongo ID: {poliza_id_mongo}. Vistas de Redis actualizadas."
+
+        except Exception as e:
+            log.error(f"Error en Emisión de Póliza: {e}")
+            return f"Error en Emisión de Póliza: {e}"
+
+    # --- SERVICIOS EN LOTE ---
+    # Variantes de 13-15 para los feeds de brokers: validan las referencias con un
+    # único $in por colección, escriben con un bulk_write no ordenado y actualizan
+    # Redis con un solo pipeline. Devuelven un resultado {'ok', 'mensaje'} por ítem,
+    # en el mismo orden de la entrada.
+
+    def q13_abm_clientes_lote(self, operaciones):
+        """ABM de clientes en lote. Cada operación es {'accion', 'datos', 'cliente_id'} como en q13.
+
+        Las operaciones se evalúan en orden: un alta seguida de una baja del mismo
+        cliente en el mismo lote deja al cliente inactivo.
+        """
+        log.info(f"EJECUTANDO S13 en lote (Mongo): {len(operaciones)} operaciones de ABM")
+        resultados = [None] * len(operaciones)
+
+        ids = set()
+        for i, op in enumerate(operaciones):
+            datos = op.get('datos')
+            try:
+                if datos:
+                    self._normalizar_datos_cliente(datos)
+                if op.get('accion') == 'alta' and datos and 'id_cliente' in datos:
+                    ids.add(datos['id_cliente'])
+                elif op.get('accion') in ('modificar', 'baja') and op.get('cliente_id'):
+                    ids.add(op['cliente_id'])
+            except ValueError as e:
+                resultados[i] = _resultado_item(False, f"Error: {e}")
+
+        try:
+            # id_cliente -> activo, según lo que hay en Mongo y lo que va aplicando el lote.
+            estado = {
+                c['id_cliente']: c.get('activo', False)
+                for c in self.db.clientes.find({'id_cliente': {'$in': list(ids)}}, {'id_cliente': 1, 'activo': 1})
+            }
+            nuevos = {}
+            escrituras = []
+            items_por_escritura = []
+            # Clientes cuyo nombre para mostrar cambia: se copian a 'clientes:nombre' al final.
+            con_nombre_nuevo = set()
+
+            for i, op in enumerate(operaciones):
+                if resultados[i] is not None:
+                    continue
+                accion, datos, cliente_id = op.get('accion'), op.get('datos'), op.get('cliente_id')
+
+                if accion == 'alta' and datos and 'id_cliente' in datos:
+                    id_cliente = datos['id_cliente']
+                    if estado.get(id_cliente):
+                        resultados[i] = _resultado_item(False, f"Error: Cliente {id_cliente} ya existe y se encuentra activo.")
+                    elif id_cliente in nuevos:
+                        nuevos[id_cliente][0]['activo'] = True
+                        items_por_escritura[nuevos[id_cliente][1]].append(i)
+                        estado[id_cliente] = True
+                        resultados[i] = _resultado_item(True, f"Cliente {id_cliente} ha sido reactivado (datos originales conservados).")
+                    elif id_cliente in estado:
+                        escrituras.append(UpdateOne({'id_cliente': id_cliente}, {'$set': {'activo': True}}))
+                        items_por_escritura.append([i])
+                        estado[id_cliente] = True
+                        resultados[i] = _resultado_item(True, f"Cliente {id_cliente} ha sido reactivado (datos originales conservados).")
+                    else:
+                        datos.setdefault('activo', True)
+                        datos.setdefault('vehiculos', [])
+                        datos[CAMPO_VEHICULOS_ASEGURADOS] = contar_vehiculos_asegurados(datos['vehiculos'])
+                        nuevos[id_cliente] = (datos, len(escrituras))
+                        con_nombre_nuevo.add(id_cliente)
+                        escrituras.append(InsertOne(datos))
+                        items_por_escritura.append([i])
+                        estado[id_cliente] = datos['activo']
+                        resultados[i] = _resultado_item(True, f"Cliente NUEVO {id_cliente} creado.")
+
+                elif accion in ('modificar', 'baja') and cliente_id and (datos or accion == 'baja'):
+                    cambios = datos if accion == 'modificar' else {'activo': False}
+                    if cliente_id not in estado:
+                        verbo = 'modificar' if accion == 'modificar' else 'dar de baja'
+                        resultados[i] = _resultado_item(False, f"Error: No se encontró el cliente con ID {cliente_id} para {verbo}.")
+                        continue
+                    if cliente_id in nuevos:
+                        # El alta todavía no se escribió: el cambio se aplica sobre el documento a insertar.
+                        nuevo = nuevos[cliente_id][0]
+                        nuevo.update(cambios)
+                        if cambia_vehiculos(cambios):
+                            nuevo[CAMPO_VEHICULOS_ASEGURADOS] = contar_vehiculos_asegurados(nuevo['vehiculos'])
+                        items_por_escritura[nuevos[cliente_id][1]].append(i)
+                    else:
+                        escrituras.append(UpdateOne({'id_cliente': cliente_id}, {'$set': cambios}))
+                        items_por_escritura.append([i])
+                        if cambia_vehiculos(cambios):
+                            escrituras.append(UpdateOne({'id_cliente': cliente_id}, UPDATE_VEHICULOS_ASEGURADOS))
+                            items_por_escritura.append([i])
+                    if 'activo' in cambios:
+                        estado[cliente_id] = cambios['activo']
+                    if CAMPOS_NOMBRE_CLIENTE & set(cambios):
+                        con_nombre_nuevo.add(cliente_id)
+                    mensaje = 'modificado' if accion == 'modificar' else 'dado de baja (lógica)'
+                    resultados[i] = _resultado_item(True, f"Cliente ID {cliente_id} {mensaje}.")
+
+                else:
+                    resultados[i] = _resultado_item(
+                        False, "Acción ABM no válida o faltan datos (se requiere accion, cliente_id y/o datos)."
+                    )
+
+            fallidas = _bulk_write_no_ordenado(self.db.clientes, escrituras)
+            for indice, error in fallidas.items():
+                for i in items_por_escritura[indice]:
+                    resultados[i] = _resultado_item(False, f"Error: {error}")
+            insertados = [str(id_cliente) for id_cliente, (_, indice) in nuevos.items() if indice not in fallidas]
+            try:
+                if con_nombre_nuevo:
+                    nombres = self._nombres_clientes(con_nombre_nuevo)
+                    # Los clientes recién creados todavía no tienen siniestros.
+                    self._propagar_nombres_a_siniestros(
+                        {id_cliente: nombre for id_cliente, nombre in nombres.items() if id_cliente not in nuevos}
+                    )
+                    try:
+                        if insertados:
+                            self.r.sadd(KEY_CLIENTES, *insertados)
+                        self._actualizar_nombres_clientes(con_nombre_nuevo, nombres)
+                    except Exception as e_redis:
+                        log.error(f"ABM en lote aplicado pero falló la actualización de las vistas de clientes: {e_redis}")
+                        for i, op in enumerate(operaciones):
+                            id_op = op.get('cliente_id') or (op.get('datos') or {}).get('id_cliente')
+                            if resultados[i]['ok'] and id_op in con_nombre_nuevo:
+                                resultados[i] = _resultado_item(
+                                    False, "Error CRÍTICO: Cliente escrito en Mongo pero falló la actualización en Redis."
+                                )
+            finally:
+                # Después de las vistas: una lectura concurrente no puede cachear las viejas con la versión nueva.
+                if len(fallidas) < len(escrituras):
+                    invalidar_colecciones(self.r, 'clientes')
+
+        except Exception as e:
+            log.error(f"Error inesperado en ABM Clientes en lote: {e}")
+            resultados = [r if r is not None and not r['ok'] else _resultado_item(False, f"Error inesperado en ABM Clientes: {e}")
+                          for r in resultados]
+
+        log.info(f"S13 en lote: {sum(r['ok'] for r in resultados)}/{len(resultados)} operaciones aplicadas.")
+        return resultados
+
+    def q14_alta_siniestros_lote(self, siniestros):
+        """Alta de siniestros en lote (cada ítem con los mismos campos que q14)."""
+        log.info(f"EJECUTANDO S14 en lote (Mongo + Redis): {len(siniestros)} siniestros")
+        resultados = [None] * len(siniestros)
+        _validar_campos_lote(siniestros, CAMPOS_SINIESTRO_LOTE, resultados)
+
+        try:
+            nros = {s.get('nro_poliza') for s in siniestros}
+            ids = {s.get('id_siniestro') for s in siniestros}
+            polizas = {
+                p['nro_poliza']: p
+                for p in self.db.polizas.find(
+                    {'nro_poliza': {'$in': list(nros)}}, {'nro_poliza': 1, 'id_agente': 1, 'id_cliente': 1}
+                )
+            }
+            clientes = {
+                c['id_cliente']: c
+                for c in self.db.clientes.find(
+                    {'id_cliente': {'$in': [p.get('id_cliente') for p in polizas.values()]}}, PROYECCION_NOMBRE_CLIENTE
+                )
+            }
+            ids_usados = {
+                s['id_siniestro']
+                for s in self.db.siniestros.find({'id_siniestro': {'$in': list(ids)}}, {'id_siniestro': 1})
+            }
+
+            escrituras = []
+            items_por_escritura = []
+            for i, datos in enumerate(siniestros):
+                if resultados[i] is not None:
+                    continue
+                if datos.get('nro_poliza') not in polizas:
+                    resultados[i] = _resultado_item(False, "Error: La póliza asociada no existe.")
+                    continue
+                if datos.get('id_siniestro') in ids_usados:
+                    resultados[i] = _resultado_item(False, "Error: id_siniestro ya existe.")
+                    continue
+                estado_normalizado = normalizar_categoria(datos.get('estado'))
+                if estado_normalizado not in ESTADOS_SINIESTRO:
+                    resultados[i] = _resultado_item(False, f"Error: Estado no válido. Debe ser uno de: {ESTADOS_SINIESTRO}")
+                    continue
+                try:
+                    fecha = parsear_fecha(datos.get('fecha'))
+                except (AttributeError, ValueError):
+                    resultados[i] = _resultado_item(False, "Error: Formato de fecha incorrecto. Use DD/MM/YYYY.")
+                    continue
+
+                datos['estado'] = estado_normalizado
+                datos['tipo'] = normalizar_categoria(datos.get('tipo'))
+                datos['fecha'] = fecha
+                cliente = clientes.get(polizas[datos['nro_poliza']].get('id_cliente'))
+                if cliente:
+                    datos.update(cliente_de_siniestro(cliente))
+                ids_usados.add(datos['id_siniestro'])
+                escrituras.append(InsertOne(datos))
+                items_por_escritura.append(i)
+                resultados[i] = _resultado_item(True, f"Siniestro {datos['id_siniestro']} creado.")
+
+            fallidas = _bulk_write_no_ordenado(self.db.siniestros, escrituras)
+            for indice, error in fallidas.items():
+                resultados[items_por_escritura[indice]] = _resultado_item(False, f"Error: {error}")
+            insertados = [i for indice, i in enumerate(items_por_escritura) if indice not in fallidas]
+
+            incrementos = {}
+            for i in insertados:
+                clave = clave_agente(polizas[siniestros[i]['nro_poliza']].get('id_agente'))
+                if clave is not None:
+                    incrementos[clave] = incrementos.get(clave, 0) + 1
+            if incrementos:
+                try:
+                    pipe = self.r.pipeline(transaction=False)
+                    for clave, cantidad in incrementos.items():
+                        pipe.hincrby(KEY_SINIESTROS_POR_AGENTE, clave, cantidad)
+                    pipe.execute()
+                except Exception as e_redis:
+                    log.error(f"{len(insertados)} siniestros insertados pero falló la actualización de '{KEY_SINIESTROS_POR_AGENTE}': {e_redis}")
+                    for i in insertados:
+                        resultados[i] = _resultado_item(
+                            False, "Error CRÍTICO: Siniestro insertado en Mongo pero falló la actualización en Redis."
+                        )
+            # Después de la vista: una lectura concurrente no puede cachear la vieja con la versión nueva.
+            if insertados:
+                invalidar_colecciones(self.r, 'siniestros')
+
+        except Exception as e:
+            log.error(f"Error en Alta Siniestro en lote: {e}")
+            resultados = [r if r is not None and not r['ok'] else _resultado_item(False, f"Error en Alta Siniestro: {e}")
+                          for r in resultados]
+
+        log.info(f"S14 en lote: {sum(r['ok'] for r in resultados)}/{len(resultados)} siniestros creados.")
+        return resultados
+
+    def q15_emitir_polizas_lote(self, polizas):
+        """Emisión de pólizas en lote (cada ítem con los mismos campos que q15)."""
+        log.info(f"EJECUTANDO S15 en lote (Mongo + Redis): {len(polizas)} pólizas")
+        resultados = [None] * len(polizas)
+        _validar_campos_lote(polizas, CAMPOS_POLIZA_LOTE, resultados)
+
+        try:
+            clientes_activos = {
+                c['id_cliente']: c.get('activo', False)
+                for c in self.db.clientes.find(
+                    {'id_cliente': {'$in': list({p.get('id_cliente') for p in polizas})}}, {'id_cliente': 1, 'activo': 1}
+                )
+            }
+            agentes_activos = {
+                a['id_agente']: a.get('activo', False)
+                for a in self.db.agentes.find(
+                    {'id_agente': {'$in': list({p.get('id_agente') for p in polizas})}}, {'id_agente': 1, 'activo': 1}
+                )
+            }
+            nros_usados = {
+                p['nro_poliza']
+                for p in self.db.polizas.find(
+                    {'nro_poliza': {'$in': list({p.get('nro_poliza') for p in polizas})}}, {'nro_poliza': 1}
+                )
+            }
+
+            escrituras = []
+            items_por_escritura = []
+            for i, datos in enumerate(polizas):
+                if resultados[i] is not None:
+                    continue
+                id_cliente, id_agente = datos.get('id_cliente'), datos.get('id_agente')
+                if id_cliente not in clientes_activos or id_agente not in agentes_activos:
+                    resultados[i] = _resultado_item(False, "Error: Cliente o Agente no existen.")
+                    continue
+                if not clientes_activos[id_cliente] or not agentes_activos[id_agente]:
+                    resultados[i] = _resultado_item(False, "Error: Cliente o Agente no están activos.")
+                    continue
+                if datos.get('nro_poliza') in nros_usados:
+                    resultados[i] = _resultado_item(False, "Error: nro_poliza ya existe.")
+                    continue
+                try:
+                    fecha_inicio_dt = parsear_fecha(datos.get('fecha_inicio'))
+                    fecha_fin_dt = parsear_fecha(datos.get('fecha_fin'))
+                except (AttributeError, ValueError):
+                    resultados[i] = _resultado_item(False, "Error: Formato de fecha incorrecto. Use DD/MM/YYYY.")
+                    continue
+                estado_normalizado = normalizar_categoria(datos.get('estado'))
+                if estado_normalizado not in ESTADOS_POLIZA:
+                    resultados[i] = _resultado_item(False, f"Error: Estado no válido. Debe ser uno de: {ESTADOS_POLIZA}")
+                    continue
+
+                datos['estado'] = estado_normalizado
+                datos['tipo'] = normalizar_categoria(datos.get('tipo'))
+                datos['fecha_inicio'] = fecha_inicio_dt
+                datos['fecha_fin'] = fecha_fin_dt
+                nros_usados.add(datos['nro_poliza'])
+                escrituras.append(InsertOne(datos))
+                items_por_escritura.append(i)
+                resultados[i] = _resultado_item(True, f"Póliza {datos['nro_poliza']} emitida.")
+
+            fallidas = _bulk_write_no_ordenado(self.db.polizas, escrituras)
+            for indice, error in fallidas.items():
+                resultados[items_por_escritura[indice]] = _resultado_item(False, f"Error: {error}")
+            insertadas = [polizas[i] for indice, i in enumerate(items_por_escritura) if indice not in fallidas]
+            if insertadas and self.outbox:
+                invalidar_colecciones(self.r, 'polizas')
+                try:
+                    registrar_eventos(self.db, [evento_poliza(datos) for datos in insertadas])
+                except Exception as e_outbox:
+                    log.error(f"Error CRÍTICO: {len(insertadas)} pólizas insertadas pero no se pudieron registrar en el outbox: {e_outbox}")
+                    for indice, i in enumerate(items_por_escritura):
+                        if indice not in fallidas:
+                            resultados[i] = _resultado_item(
+                                False, "Error CRÍTICO: Póliza insertada en Mongo pero no se registró el evento en el outbox."
+                            )
+            elif insertadas:
+                try:
+                    pipe = self.r.pipeline(transaction=False)
+                    for datos in insertadas:
+                        clave = clave_agente(datos['id_agente'])
+                        if clave is not None:
+                            pipe.hincrby('agente:stats', clave, 1)
+                        pipe.zincrby('ranking:clientes:cobertura', datos['cobertura_total'], str(datos['id_cliente']))
+                        if datos['tipo']:
+                            pipe.zincrby(clave_ranking_tipo(datos['tipo']), datos['cobertura_total'], str(datos['id_cliente']))
+                        if datos['estado'] == ESTADO_POLIZA_ACTIVA:
+                            pipe.zadd('idx:polizas:activas', {str(datos['nro_poliza']): timestamp_fecha(datos['fecha_inicio'])})
+                            pipe.sadd(KEY_CLIENTES_CON_POLIZA_ACTIVA, str(datos['id_cliente']))
+                    pipe.execute()
+                except Exception as e_redis:
+                    log.error(f"Error CRÍTICO actualizando Redis. {len(insertadas)} pólizas insertadas en Mongo pero Redis falló: {e_redis}")
+                    for indice, i in enumerate(items_por_escritura):
+                        if indice not in fallidas:
+                            resultados[i] = _resultado_item(
+                                False, "Error CRÍTICO: Póliza insertada en Mongo pero falló la actualización en Redis."
+                            )
+                # Después de las vistas: una lectura concurrente no puede cachear las viejas con la versión nueva.
+                invalidar_colecciones(self.r, 'polizas')
+
+        except Exception as e:
+            log.error(f"Error en Emisión de Póliza en lote: {e}")
+            resultados = [r if r is not None and not r['ok'] else _resultado_item(False, f"Error en Emisión de Póliza: {e}")
+                          for r in resultados]
+
+        log.info(f"S15 en lote: {sum(r['ok'] for r in resultados)}/{len(resultados)} pólizas emitidas.")
+        return resultados
@@ -0,0 +1,151 @@
+# src/service/vistas.py
+
+from src.service.normalizacion import ESTADO_POLIZA_ACTIVA
+
+# Claves de las vistas derivadas que se mantienen en Redis.
+KEY_AGENTE_STATS = 'agente:stats'                       # hash id_agente -> cantidad de pólizas
+KEY_RANKING_COBERTURA = 'ranking:clientes:cobertura'    # zset id_cliente -> cobertura total
+KEY_POLIZAS_ACTIVAS = 'idx:polizas:activas'             # zset nro_poliza -> timestamp fecha_inicio
+KEY_SINIESTROS_POR_AGENTE = 'agente:siniestros'         # hash id_agente -> cantidad de siniestros
+KEY_NOMBRES_CLIENTES = 'clientes:nombre'                # hash id_cliente -> "Nombre Apellido"
+KEY_CLIENTES = 'idx:clientes'                           # set con todos los id_cliente
+KEY_CLIENTES_CON_POLIZA_ACTIVA = 'idx:clientes:con_poliza_activa'  # set de id_cliente con alguna póliza activa
+# Además, 'ranking:clientes:cobertura:<tipo>' (ver clave_ranking_tipo): el ranking sólo con las pólizas de un tipo.
+
+# Claves que son hashes y claves que son sets (el resto son sorted sets).
+KEYS_HASH = {KEY_AGENTE_STATS, KEY_SINIESTROS_POR_AGENTE, KEY_NOMBRES_CLIENTES}
+KEYS_SET = {KEY_CLIENTES, KEY_CLIENTES_CON_POLIZA_ACTIVA}
+
+# Pólizas con agente y cliente numéricos: las que cuentan para 'agente:stats' y el ranking
+# (el loader saltea las que tienen alguno de los dos vacío, que Mongo guarda como NaN).
+_MATCH_AGENTE_Y_CLIENTE = {
+    'id_agente': {'$type': 'number', '$ne': float('nan')},
+    'id_cliente': {'$type': 'number', '$ne': float('nan')},
+}
+
+# Vistas de Redis calculadas en Mongo a partir de 'polizas' (ver src/loader/reconstruir_vistas.py).
+PIPELINE_AGENTE_STATS = [
+    {'$match': _MATCH_AGENTE_Y_CLIENTE},
+    {'$group': {'_id': '$id_agente', 'valor': {'$sum': 1}}}
+]
+PIPELINE_RANKING_COBERTURA = [
+    {'$match': _MATCH_AGENTE_Y_CLIENTE},
+    {'$group': {'_id': '$id_cliente', 'valor': {'$sum': '$cobertura_total'}}}
+]
+PIPELINE_RANKING_COBERTURA_POR_TIPO = [
+    {'$match': {**_MATCH_AGENTE_Y_CLIENTE, 'tipo': {'$type': 'string'}}},
+    {'$group': {'_id': {'tipo': '$tipo', 'id_cliente': '$id_cliente'}, 'valor': {'$sum': '$cobertura_total'}}}
+]
+PIPELINE_POLIZAS_ACTIVAS = [
+    {'$match': {'estado': ESTADO_POLIZA_ACTIVA, 'fecha_inicio': {'$type': 'date'}}},
+    {'$project': {'_id': '$nro_poliza', 'valor': {'$floor': {'$divide': [{'$toLong': '$fecha_inicio'}, 1000]}}}}
+]
+PIPELINE_CLIENTES_CON_POLIZA_ACTIVA = [
+    {'$match': {'estado': ESTADO_POLIZA_ACTIVA, 'id_cliente': {'$type': 'number', '$ne': float('nan')}}},
+    {'$group': {'_id': '$id_cliente'}}
+]
+
+# Siniestros por agente calculados en Mongo: cada siniestro se une a su póliza para obtener el agente.
+PIPELINE_SINIESTROS_POR_AGENTE = [
+    {
+        '$lookup': {
+            'from': 'polizas',
+            'localField': 'nro_poliza',
+            'foreignField': 'nro_poliza',
+            'pipeline': [
+                {'$project': {'_id': 0, 'id_agente': 1}}
+            ],
+            'as': 'poliza_info'
+        }
+    },
+    {
+        '$unwind': '$poliza_info'
+    },
+    {
+        '$group': {
+            '_id': '$poliza_info.id_agente',
+            'cantidad_siniestros': { '$sum': 1 }
+        }
+    }
+]
+
+
+def clave_ranking_tipo(tipo):
+    """Clave del ranking de cobertura de las pólizas de `tipo` (en forma canónica, p.ej. 'Auto')."""
+    return f"{KEY_RANKING_COBERTURA}:{tipo}"
+
+
+def es_ranking_cobertura(key):
+    """True para el ranking general y para los rankings por tipo."""
+    return key == KEY_RANKING_COBERTURA or key.startswith(f"{KEY_RANKING_COBERTURA}:")
+
+
+def nombre_cliente(cliente):
+    """Nombre para mostrar de un cliente, como el '$concat' de nombre y apellido de las consultas."""
+    return f"{cliente.get('nombre', '')} {cliente.get('apellido', '')}".strip()
+
+
+def clave_agente(id_agente):
+    """Campo de hash para un id_agente (en Mongo puede estar guardado como 101 o 101.0).
+
+    Devuelve None si el id no es numérico.
+    """
+    try:
+        return str(int(id_agente))
+    except (TypeError, ValueError):
+        return None
+
+
+def clave_cliente(id_cliente):
+    """Miembro de los sets de clientes para un id_cliente (101 y 101.0 son el mismo). None si no es numérico."""
+    return clave_agente(id_cliente)
+
+
+def clientes_con_poliza_activa(db, ids_cliente):
+    """Subconjunto de `ids_cliente` (como claves de set) que tienen alguna póliza activa en Mongo."""
+    ids = [int(clave) for clave in map(clave_cliente, ids_cliente) if clave is not None]
+    return {
+        clave_cliente(poliza['id_cliente'])
+        for poliza in db.polizas.find(
+            {'id_cliente': {'$in': ids}, 'estado': ESTADO_POLIZA_ACTIVA}, {'_id': 0, 'id_cliente': 1}
+        )
+    }
+
+
+def siniestros_por_agente_desde_mongo(db):
+    """Mapping {id_agente: cantidad de siniestros} calculado con la agregación completa."""
+    conteo = {}
+    for grupo in db.siniestros.aggregate(PIPELINE_SINIESTROS_POR_AGENTE):
+        clave = clave_agente(grupo['_id'])
+        if clave is not None:
+            conteo[clave] = conteo.get(clave, 0) + grupo['cantidad_siniestros']
+    return conteo
+
+
+def siniestros_de_agentes(db, ids_agente):
+    """Mapping {id_agente: cantidad de siniestros} sólo para `ids_agente`.
+
+    Parte de las pólizas de esos agentes (índice polizas.id_agente) en lugar de
+    recorrer todos los siniestros. Los agentes sin siniestros quedan con 0.
+    """
+    conteo = {clave: 0 for clave in map(clave_agente, ids_agente) if clave is not None}
+    pipeline = [
+        {'$match': {'id_agente': {'$in': list(ids_agente)}}},
+        {
+            '$lookup': {
+                'from': 'siniestros',
+                'localField': 'nro_poliza',
+                'foreignField': 'nro_poliza',
+                'pipeline': [
+                    {'$project': {'_id': 1}}
+                ],
+                'as': 'siniestros'
+            }
+        },
+        {'$group': {'_id': '$id_agente', 'cantidad_siniestros': {'$sum': {'$size': '$siniestros'}}}}
+    ]
+    for grupo in db.polizas.aggregate(pipeline):
+        clave = clave_agente(grupo['_id'])
+        if clave is not None:
+            conteo[clave] = conteo.get(clave, 0) + grupo['cantidad_siniestros']
+    return conteo